@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Address Normalizer v6.2 - One parser for every address string in the pipeline
+Suffix abbreviations, unit numbers, casing and ZIP+4 handled in one place
+
+"14355 FOWLER AVENUE APT 2, tampa, fl 33615-1234" and
+"14355 Fowler Ave #2, Tampa, FL 33615" both parse to
+    street "14355 Fowler Ave Apt 2" (resp. "#2"), city "Tampa", state "FL",
+    zip5 "33615"
+and share the key "14355 fowler ave 2 tampa fl 33615", used for cache keys,
+geocode lookups, the store's address_key and deduplication.
+
+Patterns are compiled once and parse_address is memoized in a bounded LRU
+cache, so repeated addresses (the same subject searched again, the same
+house seen by both sources) cost a dict lookup.
+
+Usage: python address_normalizer.py [count]
+Benchmarks addresses/sec, cold (every address new) and warm (cache hits).
+"""
+
+import random
+import re
+import sys
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+# Distinct addresses memoized by parse_address
+ADDRESS_CACHE_SIZE = 65536
+
+# USPS standard suffix abbreviations, including common misspellings
+STREET_SUFFIXES = {
+    "alley": "aly", "ally": "aly", "avenue": "ave", "av": "ave", "aven": "ave", "avn": "ave",
+    "bend": "bnd", "boulevard": "blvd", "boul": "blvd", "blv": "blvd", "circle": "cir",
+    "circ": "cir", "court": "ct", "cove": "cv", "crossing": "xing", "crescent": "cres",
+    "drive": "dr", "driv": "dr", "drv": "dr", "expressway": "expy", "freeway": "fwy",
+    "highway": "hwy", "hiway": "hwy", "hway": "hwy", "lane": "ln", "parkway": "pkwy",
+    "pkway": "pkwy", "pky": "pkwy", "place": "pl", "plaza": "plz", "point": "pt",
+    "road": "rd", "square": "sq", "street": "st", "str": "st", "strt": "st",
+    "terrace": "ter", "trail": "trl", "way": "way"
+}
+DIRECTIONALS = {
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw"
+}
+UNIT_DESIGNATORS = {
+    "apt": "Apt", "apartment": "Apt", "unit": "Unit", "ste": "Ste", "suite": "Ste",
+    "bldg": "Bldg", "building": "Bldg", "lot": "Lot", "#": "#"
+}
+# USPS state codes by full name and common abbreviation (lowercase); the codes map to themselves
+STATE_CODES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "district of columbia": "DC",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL", "indiana": "IN",
+    "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS", "missouri": "MO",
+    "montana": "MT", "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ",
+    "new mexico": "NM", "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT",
+    "virginia": "VA", "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+    "puerto rico": "PR",
+    "ala": "AL", "ariz": "AZ", "ark": "AR", "calif": "CA", "cal": "CA", "colo": "CO", "conn": "CT",
+    "del": "DE", "fla": "FL", "ill": "IL", "ind": "IN", "kan": "KS", "kans": "KS", "mass": "MA",
+    "mich": "MI", "minn": "MN", "miss": "MS", "mont": "MT", "neb": "NE", "nebr": "NE", "nev": "NV",
+    "okla": "OK", "ore": "OR", "penn": "PA", "penna": "PA", "tenn": "TN", "tex": "TX", "wash": "WA",
+    "wis": "WI", "wisc": "WI", "wyo": "WY"
+}
+STATE_CODES.update({code.lower(): code for code in set(STATE_CODES.values())})
+_STATE_NAME_WORDS = max(len(name.split()) for name in STATE_CODES)
+
+# Designators that are also street names ("100 Lot Rd", "5 Unit Ave")
+AMBIGUOUS_DESIGNATORS = {"unit", "lot"}
+_DIRECTIONAL_ABBREVIATIONS = set(DIRECTIONALS.values())
+_DIRECTIONAL_WORDS = set(DIRECTIONALS) | _DIRECTIONAL_ABBREVIATIONS
+_SUFFIX_WORDS = set(STREET_SUFFIXES) | set(STREET_SUFFIXES.values())
+
+_IGNORED = re.compile(r"[.;]")
+_ZIP = re.compile(r"(?:^|\s)(?P<zip5>\d{5})(?:\s*-?\s*(?P<zip4>\d{4}))?$")
+_UNIT = re.compile(r"(?:^|\s)(?P<designator>#|(?:apt|apartment|unit|ste|suite|bldg|building|lot)\b)\s*#?\s*(?P<id>[a-z0-9-]+)$")
+_ZIP5 = re.compile(r"\d{5}")
+_KEY_CHARS = re.compile(r"[^a-z0-9 ]+")
+
+
+class ParsedAddress(NamedTuple):
+    number: Optional[str]
+    street_name: str
+    unit: Optional[str]
+    city: Optional[str]
+    state: Optional[str]
+    zip5: Optional[str]
+    zip4: Optional[str]
+    # The cleaned input when the parse was unsure (a comma part it could not
+    # place); full and key then use it instead of the components
+    unparsed: Optional[str] = None
+
+    @property
+    def street(self) -> str:
+        """Street line: number, name and unit ("14355 Fowler Ave Apt 2")"""
+        return " ".join(part for part in (self.number, self.street_name, self.unit) if part)
+
+    @property
+    def postal_code(self) -> str:
+        return self.zip5 or ""
+
+    @property
+    def full(self) -> str:
+        """Canonical display form ("14355 Fowler Ave, Tampa, FL 33615")"""
+        if self.unparsed is not None:
+            return self.unparsed
+        state_zip = " ".join(part for part in (self.state, self.zip5) if part)
+        return ", ".join(part for part in (self.street, self.city, state_zip) if part)
+
+    @property
+    def key(self) -> str:
+        """Lowercase matching key; ZIP+4, punctuation and the unit designator do not affect it"""
+        if self.unparsed is not None:
+            return " ".join(_KEY_CHARS.sub(" ", self.unparsed.lower()).split())
+        unit_id = self.unit.split()[-1].lstrip("#") if self.unit else None
+        parts = (self.number, self.street_name, unit_id, self.city, self.state, self.zip5)
+        return " ".join(_KEY_CHARS.sub(" ", " ".join(p for p in parts if p).lower()).split())
+
+
+def _word(token: str) -> str:
+    return token.capitalize()
+
+
+def _format_unit(designator: str, unit_id: str) -> Optional[str]:
+    unit_id = unit_id.strip("#-").upper()
+    if not unit_id:
+        return None
+    designator = UNIT_DESIGNATORS[designator]
+    return f"#{unit_id}" if designator == "#" else f"{designator} {unit_id}"
+
+
+def _split_state(text: str) -> tuple:
+    """(text before, USPS code) of text ending in a state code or name, else (text, None)"""
+    tokens = text.split()
+    for size in range(min(_STATE_NAME_WORDS, len(tokens)), 0, -1):
+        state = STATE_CODES.get(" ".join(tokens[-size:]))
+        if state:
+            return " ".join(tokens[:-size]), state
+    return text, None
+
+
+def _ends_with_suffix(street: str) -> bool:
+    """Whether a street line ends in a street suffix (optionally followed by a directional)"""
+    tokens = street.split()
+    if tokens and tokens[-1] in _DIRECTIONAL_WORDS:
+        tokens.pop()
+    return len(tokens) > 1 and tokens[-1] in _SUFFIX_WORDS
+
+
+def _parse_street(street: str):
+    """(number, street name, unit) of a lowercase street line"""
+    unit = None
+    match = _UNIT.search(street)
+    # "Unit" and "Lot" only designate a unit after the street suffix ("5 Unit Ave" is a street)
+    if match and (match.group("designator") not in AMBIGUOUS_DESIGNATORS
+                  or _ends_with_suffix(street[:match.start()])):
+        unit = _format_unit(match.group("designator"), match.group("id"))
+        street = street[:match.start()]
+
+    tokens = street.split()
+    number = None
+    if tokens and tokens[0][0].isdigit():
+        number = tokens.pop(0).upper()
+
+    # Directionals abbreviate only before or after the street name ("North Dale Mabry Hwy",
+    # "Main St West"), never inside it ("Dale North Rd") or as it ("North St")
+    name = list(tokens)
+    post_directional = None
+    if len(name) > 1 and name[-1] in _DIRECTIONAL_WORDS:
+        post_directional = name.pop()
+        post_directional = DIRECTIONALS.get(post_directional, post_directional)
+    if len(name) > 1:
+        has_suffix = name[-1] in _SUFFIX_WORDS
+        if has_suffix:
+            name[-1] = STREET_SUFFIXES.get(name[-1], name[-1])
+        if name[0] in DIRECTIONALS and len(name) - has_suffix > 1:
+            name[0] = DIRECTIONALS[name[0]]
+    if post_directional:
+        name.append(post_directional)
+    street_name = " ".join(t.upper() if t in _DIRECTIONAL_ABBREVIATIONS else _word(t) for t in name)
+    return number, street_name, unit
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def parse_address(address: str) -> ParsedAddress:
+    """
+    Parse a free-form US address
+
+    Accepts "street, city, ST zip", "street, city ST zip", "street, unit,
+    city, ST zip", a street line alone, a ZIP (or "ST zip") alone, ZIP+4
+    and full or abbreviated state names ("Florida", "Fla") in any of them.
+    A comma part that is neither the city nor a unit is never dropped: the
+    result keeps the cleaned input as unparsed.
+    """
+    cleaned = ", ".join(p for p in (" ".join(p.split()) for p in _IGNORED.sub("", address).split(",")) if p)
+    parts = cleaned.lower().split(", ") if cleaned else []
+
+    city = state = zip5 = zip4 = None
+    if parts:
+        last = parts[-1]
+        match = _ZIP.search(last)
+        if match:
+            zip5, zip4 = match.group("zip5"), match.group("zip4")
+            last = last[:match.start()].strip()
+        rest, state = _split_state(last)
+        # A single part is a street line unless it is nothing but a state and/or ZIP
+        if len(parts) == 1 and rest:
+            zip5 = zip4 = state = None
+        elif zip5 or state:
+            if rest:
+                parts[-1] = rest
+            else:
+                parts.pop()
+        if len(parts) >= 2:
+            city = " ".join(_word(t) for t in parts.pop().split())
+
+    number, street_name, unit = _parse_street(parts[0] if parts else "")
+    unsure = False
+    for extra in parts[1:]:
+        match = _UNIT.search(extra)
+        if match and unit is None and match.start() == 0:
+            unit = _format_unit(match.group("designator"), match.group("id"))
+        else:
+            unsure = True
+
+    return ParsedAddress(number, street_name, unit, city, state, zip5, zip4, cleaned if unsure else None)
+
+
+def normalize_address(address: Optional[str]) -> str:
+    """Canonical display form of an address ("" for none)"""
+    return parse_address(address).full if address else ""
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def address_key(address: Optional[str]) -> Optional[str]:
+    """Matching key of an address, or None for an empty one (memoized like parse_address)"""
+    if not address:
+        return None
+    return parse_address(address).key or None
+
+
+def format_address(street: Optional[str], city: Optional[str] = None, state: Optional[str] = None,
+                   zipcode: Optional[str] = None) -> str:
+    """Canonical address from separate components (any of which may be missing)"""
+    state_zip = " ".join(str(part) for part in (state, zipcode) if part)
+    joined = ", ".join(str(part) for part in (street, city, state_zip) if part)
+    return normalize_address(joined)
+
+
+def zip5(postal_code: Optional[Any]) -> Optional[str]:
+    """The 5-digit ZIP of a postal code (ZIP+4 accepted)"""
+    match = _ZIP5.search(str(postal_code)) if postal_code else None
+    return match.group(0) if match else None
+
+
+def dedupe_by_address(items: Iterable[Any], address_of: Callable[[Any], Optional[str]]) -> List[Any]:
+    """Items in order, dropping later ones whose address has the same key
+
+    Items without an address are always kept.
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        key = address_key(address_of(item))
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(item)
+    return unique
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters of the parse and key caches"""
+    stats = {}
+    for name, cached in (("parse", parse_address), ("key", address_key)):
+        info = cached.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+    return stats
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+_SPELLED_OUT = {abbreviation: word for word, abbreviation in STREET_SUFFIXES.items()
+                if len(word) > len(abbreviation) and word not in ("ally", "aven", "boul", "circ", "driv", "hiway",
+                                                                  "hway", "pkway", "strt")}
+
+
+def _variant(address: str, rng: random.Random) -> str:
+    """A messy spelling of a canonical "street, city, ST zip" address"""
+    street, city, state_zip = address.split(", ")
+    words = street.split()
+    words[-1] = _SPELLED_OUT.get(words[-1].lower(), words[-1])
+    if rng.random() < 0.2:
+        words.append(rng.choice(("Apt", "Unit", "#", "Suite")) + " " + str(rng.randint(1, 40)))
+    if rng.random() < 0.3:
+        state_zip += f"-{rng.randint(1000, 9999)}"
+    variant = f"{' '.join(words)}, {city}, {state_zip}"
+    return rng.choice((str.upper, str.lower, str.title, str))(variant)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    from generate_tampa_properties import TampaPropertiesGenerator
+
+    print(f"📮 ADDRESS NORMALIZER BENCHMARK ({count:,} addresses)")
+    print("=" * 80)
+
+    rng = random.Random(1)
+    addresses = [_variant(p["search_result"]["address"], rng)
+                 for p in TampaPropertiesGenerator(verbose=False).iter_bulk_properties(count, seed=1)]
+
+    parse_address.cache_clear()
+    address_key.cache_clear()
+    started = time.perf_counter()
+    keys = [address_key(a) for a in addresses]
+    cold = len(addresses) / (time.perf_counter() - started)
+
+    # Warm: the most recent ADDRESS_CACHE_SIZE addresses are all cached
+    warm_set = addresses[-ADDRESS_CACHE_SIZE:]
+    started = time.perf_counter()
+    for _ in range(3):
+        for a in warm_set:
+            address_key(a)
+    warm = 3 * len(warm_set) / (time.perf_counter() - started)
+
+    print(f"❄️ Cold (uncached): {cold:>12,.0f} addresses/s")
+    print(f"🔥 Warm (cached):   {warm:>12,.0f} addresses/s")
+    print(f"🔑 Distinct keys: {len(set(keys)):,} of {len(keys):,}")
+    print(f"📦 Cache: {cache_stats()}")
+    for a in addresses[:3]:
+        print(f"   {a!r} -> {normalize_address(a)!r}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Admission Control v6.2 - Bounded concurrency and load shedding for searches
+Max in-flight searches, a bounded wait queue and per-request deadlines
+
+When every slot is busy a request waits in the queue; when the queue is full,
+or the request's deadline passes while waiting, it is rejected immediately so
+the server can answer 503 with Retry-After instead of piling up work.
+Limits apply per process (each gunicorn worker has its own controller).
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted or runs past its deadline"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Deadline:
+    """Absolute per-request deadline on the monotonic clock"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, retry_after: int = 1):
+        """Raise Overloaded if the deadline has passed"""
+        if self.expired():
+            raise Overloaded("deadline exceeded", retry_after)
+
+
+class AdmissionController:
+    """Limit concurrent searches with a bounded, deadline-aware wait queue"""
+
+    def __init__(self,
+                 max_in_flight: Optional[int] = None,
+                 max_queue: Optional[int] = None,
+                 request_timeout: Optional[float] = None):
+        """
+        Initialize the controller
+
+        Args:
+            max_in_flight: Searches allowed to run at once (SEARCH_MAX_IN_FLIGHT, default 4)
+            max_queue: Requests allowed to wait for a slot (SEARCH_MAX_QUEUE, default 16)
+            request_timeout: Per-request deadline in seconds, queueing included
+                (SEARCH_DEADLINE_SECONDS, default 10)
+        """
+        self.max_in_flight = max_in_flight if max_in_flight is not None else \
+            int(os.environ.get("SEARCH_MAX_IN_FLIGHT", 4))
+        self.max_queue = max_queue if max_queue is not None else \
+            int(os.environ.get("SEARCH_MAX_QUEUE", 16))
+        self.request_timeout = request_timeout if request_timeout is not None else \
+            float(os.environ.get("SEARCH_DEADLINE_SECONDS", 10))
+
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.deadline_exceeded = 0
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying"""
+        return max(1, math.ceil(self.request_timeout / 2))
+
+    @contextmanager
+    def admit(self):
+        """
+        Hold a search slot for the enclosed block
+
+        Yields:
+            The request's Deadline, for the search to check between stages
+
+        Raises:
+            Overloaded: queue full, or no slot freed before the deadline
+        """
+        deadline = Deadline(self.request_timeout)
+
+        with self._condition:
+            if self.in_flight >= self.max_in_flight:
+                if self.queued >= self.max_queue:
+                    self.rejected_queue_full += 1
+                    raise Overloaded("search queue full", self.retry_after())
+
+                self.queued += 1
+                try:
+                    while self.in_flight >= self.max_in_flight:
+                        remaining = deadline.remaining()
+                        if remaining <= 0:
+                            self.rejected_timeout += 1
+                            raise Overloaded("timed out waiting for a search slot", self.retry_after())
+                        self._condition.wait(remaining)
+                finally:
+                    self.queued -= 1
+
+            self.in_flight += 1
+            self.admitted += 1
+
+        try:
+            yield deadline
+        except Overloaded:
+            with self._condition:
+                self.deadline_exceeded += 1
+            raise
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load and rejection counters"""
+        with self._condition:
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": self.queued,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "deadline_seconds": self.request_timeout,
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+                "deadline_exceeded": self.deadline_exceeded
+            }
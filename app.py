@@ -4,71 +4,196 @@ PropertyDetails v6.2 Web Application
 Flask server for the property search interface
 """
 
-from flask import Flask, render_template_string, request, jsonify
-import subprocess
-import json
+from flask import Flask, Response, request, jsonify
 import os
-import sys
 from datetime import datetime
+from typing import Optional
+
+import property_serializer as serializer
+from address_normalizer import normalize_address, zip5
+from admission_control import AdmissionController, Overloaded
+from http_cache import (ResponseCache, CachedTemplate, encode, negotiate_encoding, make_etag, variant_etag,
+                        etag_matches)
+from property_aggregates import GROUP_TYPES
+from property_search_v6_2_FINAL import PropertySearchV62Final
+from property_store import PropertyStore, DEFAULT_STORE_PATH, DEFAULT_DATA_FILE
 
 app = Flask(__name__)
 
+# One search engine per process: its record cache and property store are reused across requests
+engine = PropertySearchV62Final()
+
+# Response bodies, search response templates and compressed variants, keyed by ETag (dataset version + query)
+response_cache = ResponseCache()
+
+# Bounded concurrency for searches that miss the response cache
+admission = AdmissionController()
+
+# Largest max_properties a search may ask for (the web form allows 1-100)
+MAX_SEARCH_PROPERTIES = int(os.environ.get('MAX_SEARCH_PROPERTIES', 100))
+
+# index.html is held in memory and only re-read when it changes on disk
+html_template = CachedTemplate('index.html')
+
+# Store serving /api/aggregates when the engine searches a mapped snapshot
+_aggregate_store = None
+
+def preload_dataset():
+    """Load the dataset and warm caches once (called in the gunicorn master before forking)"""
+    count = engine.preload(int(os.environ.get('PRELOAD_RECORDS', 1000)))
+    html_template.load()
+    
+    # SQLite connections must not cross fork(); each worker opens its own on first use.
+    # A memory-mapped snapshot stays open and its pages are shared by the workers.
+    if isinstance(engine.store, PropertyStore):
+        engine.store.close()
+    
+    print(f"✅ Preloaded {count} properties (dataset version {engine.dataset_version})")
+
+def json_response(body: bytes, status: int = 200) -> Response:
+    """Wrap pre-serialized JSON bytes in a response"""
+    return Response(body, status=status, mimetype='application/json')
+
+def overloaded_response(error: Overloaded) -> Response:
+    """503 with Retry-After for a shed request"""
+    print(f"⚠️ Search rejected: {error.reason}")
+    response = jsonify({'error': f'Server busy: {error.reason}', 'retry_after': error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def cached_response(etag: str, build_body, mimetype: str, render=None) -> Response:
+    """Serve a cacheable body with compression negotiation and If-None-Match handling
+    
+    With render, build_body returns a template that is cached and rendered
+    (then compressed) per response, so per-response fields stay current.
+    """
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    headers = {'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+    
+    # The ETag identifies the representation, so each content coding has its own
+    representation_etag = variant_etag(etag, encoding)
+    if etag_matches(request.headers.get('If-None-Match'), representation_etag):
+        headers['ETag'] = representation_etag
+        return Response(status=304, headers=headers)
+    
+    if render is None:
+        body = response_cache.body(etag, build_body)
+        payload, applied = response_cache.encoded(etag, body, encoding)
+    else:
+        payload, applied = encode(render(response_cache.body(etag, build_body)), encoding)
+    headers['ETag'] = variant_etag(etag, applied)
+    if applied:
+        headers['Content-Encoding'] = applied
+    return Response(payload, mimetype=mimetype, headers=headers)
+
 # Read the HTML template
 def get_html_template():
-    with open('index.html', 'r') as f:
-        return f.read()
+    body, _ = html_template.load()
+    return body.decode('utf-8')
 
 @app.route('/')
 def index():
     """Serve the main HTML interface"""
-    return get_html_template()
+    body, etag = html_template.load()
+    return cached_response(etag, lambda: body, 'text/html')
 
-@app.route('/api/search', methods=['POST'])
+@app.route('/api/search', methods=['GET', 'POST'])
 def search_properties():
-    """API endpoint to search properties"""
+    """API endpoint to search properties (POST JSON body or GET query string)
+    
+    compact=true returns the compact format (shared defaults + per-record differences).
+    """
+    data = request.get_json(silent=True) if request.method == 'POST' else request.args
+    if request.method == 'POST' and not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
     try:
-        data = request.get_json()
-        address = data.get('address', '')
-        max_properties = data.get('max_properties', 25)
+        max_properties = int(data.get('max_properties', 25))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_properties must be an integer'}), 400
+    if not 1 <= max_properties <= MAX_SEARCH_PROPERTIES:
+        return jsonify({'error': f'max_properties must be between 1 and {MAX_SEARCH_PROPERTIES}'}), 400
+    
+    try:
+        # Spellings of one address ("… Avenue, tampa" / "… Ave, Tampa") share a cache entry
+        address = normalize_address(str(data.get('address') or ''))
+        compact = str(data.get('compact', '')).lower() in ('1', 'true', 'yes')
         
         if not address:
             return jsonify({'error': 'Address is required'}), 400
         
-        # Run the property search script
-        cmd = [sys.executable, 'property_search_v6_2_FINAL.py', address, str(max_properties)]
-        
-        print(f"🔍 Running command: {' '.join(cmd)}")
+        # Identical queries against the same dataset version return the same properties, but
+        # the bodies differ in timestamps and cache statistics: the ETag is weak
+        etag = make_etag('search', engine.current_dataset_version(), address, max_properties, compact, weak=True)
         
-        # Execute the script
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd='.')
+        def run_search():
+            with admission.admit() as deadline:
+                print(f"🔍 Searching: {address} (max {max_properties} properties)")
+                # Run the search in-process; the response is assembled from pre-serialized records.
+                # Only the version-dependent part is cached: timestamps and cache stats are stamped per response
+                template = engine.get_real_properties_json_template(address, max_properties, compact=compact,
+                                                                    deadline=deadline)
+                print(f"✅ Search complete ({sum(len(part) for part in template):,} bytes, "
+                      f"{serializer.SERIALIZER_NAME})")
+                return template
         
-        if result.returncode != 0:
-            print(f"❌ Script failed with error: {result.stderr}")
-            return jsonify({'error': f'Script execution failed: {result.stderr}'}), 500
+        return cached_response(etag, run_search, 'application/json', engine.render_json_template)
         
-        # Find the generated JSON file
-        output_lines = result.stdout.split('\n')
-        json_filename = None
-        
-        for line in output_lines:
-            if 'Saved to:' in line:
-                json_filename = line.split('Saved to:')[1].strip()
-                break
-        
-        if not json_filename or not os.path.exists(json_filename):
-            print(f"❌ Output file not found: {json_filename}")
-            return jsonify({'error': 'Output file not found'}), 500
-        
-        # Read the results
-        with open(json_filename, 'r') as f:
-            results = json.load(f)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        print(f"❌ Error in search_properties: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def aggregate_store() -> Optional[PropertyStore]:
+    """The SQLite store holding the materialized aggregates (a mapped snapshot has none)
+    
+    Next to a snapshot the store is opened read-only, and never created:
+    None if there is no store.
+    """
+    global _aggregate_store
+    if isinstance(engine.store, PropertyStore):
+        return engine.store
+    if _aggregate_store is None:
+        if not os.path.exists(engine.db_path):
+            return None
+        _aggregate_store = PropertyStore(engine.db_path, read_only=True)
+    return _aggregate_store
+
+@app.route('/api/aggregates')
+def get_aggregates():
+    """Materialized market aggregates: median price per sqft, days on market, sale-price trend
+    
+    group=subdivision|neighborhood|postal_code (default postal_code); with key=<value>
+    a single group is returned (a primary-key read), otherwise every group of that type.
+    """
+    group = request.args.get('group', 'postal_code')
+    key = request.args.get('key')
+    if group not in GROUP_TYPES:
+        return jsonify({'error': f"group must be one of: {', '.join(GROUP_TYPES)}"}), 400
+    if key and group == 'postal_code':
+        key = zip5(key) or key
+    
+    try:
+        # The aggregates come from the SQLite store, so its version (not the snapshot's) validates them
+        store = aggregate_store()
+        if store is None:
+            return jsonify({'error': 'No property store: aggregates are not available'}), 404
+        etag = make_etag('aggregates', store.dataset_version(), group, key)
         
-        print(f"✅ Successfully loaded {results['summary']['total_found']} properties")
+        if key:
+            data = store.aggregate_json(group, key)
+            if data is None:
+                return jsonify({'error': f'No aggregates for {group} {key!r}'}), 404
+            return cached_response(etag, lambda: data.encode('utf-8'), 'application/json')
         
-        return jsonify(results)
+        return cached_response(etag, lambda: serializer.json_object([
+            ('group', serializer.dumps(group)),
+            ('aggregates', serializer.json_array(d.encode('utf-8') for d in store.aggregates_json(group)))
+        ]), 'application/json')
         
     except Exception as e:
-        print(f"❌ Error in search_properties: {str(e)}")
+        print(f"❌ Error in get_aggregates: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/health')
@@ -81,31 +206,32 @@ def health_check():
         'message': 'PropertyDetails v6.2 API is running'
     })
 
+@app.route('/api/metrics')
+def metrics():
+    """Load and cache metrics for this worker process"""
+    return jsonify({
+        'pid': os.getpid(),
+        'timestamp': datetime.now().isoformat(),
+        'search_admission': admission.stats(),
+        'record_cache': engine.record_cache.stats(),
+        'response_cache': response_cache.stats()
+    })
+
 @app.route('/api/demo')
 def demo_endpoint():
     """Demo endpoint for quick testing"""
     try:
         # Run a quick demo search
-        cmd = [sys.executable, 'property_search_v6_2_FINAL.py', '7709 Palmbrook Dr, Tampa, FL 33615', '3']
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd='.')
-        
-        if result.returncode == 0:
-            # Find the output file
-            output_lines = result.stdout.split('\n')
-            for line in output_lines:
-                if 'Saved to:' in line:
-                    json_filename = line.split('Saved to:')[1].strip()
-                    if os.path.exists(json_filename):
-                        with open(json_filename, 'r') as f:
-                            results = json.load(f)
-                        return jsonify({
-                            'status': 'success',
-                            'demo_results': results,
-                            'message': 'Demo search completed successfully'
-                        })
-        
-        return jsonify({'status': 'error', 'message': 'Demo search failed'})
+        with admission.admit() as deadline:
+            results = engine.get_real_properties_json('7709 Palmbrook Dr, Tampa, FL 33615', 3, deadline=deadline)
+        return json_response(serializer.json_object([
+            ('status', serializer.dumps('success')),
+            ('demo_results', results),
+            ('message', serializer.dumps('Demo search completed successfully'))
+        ]))
         
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
@@ -121,13 +247,17 @@ if __name__ == '__main__':
     print(f"  - Main: http://{host}:{port}/")
     print(f"  - Search: http://{host}:{port}/api/search")
     print(f"  - Health: http://{host}:{port}/api/health")
+    print(f"  - Aggregates: http://{host}:{port}/api/aggregates?group=subdivision")
+    print(f"  - Metrics: http://{host}:{port}/api/metrics")
     print(f"  - Demo: http://{host}:{port}/api/demo")
     
     # Check if required files exist
-    required_files = ['property_search_v6_2_FINAL.py', 'TAMPA_PROPERTIES_EXTRACTION_20250528_182304.json']
+    required_files = ['property_search_v6_2_FINAL.py', 'property_store.py']
     for file in required_files:
         if not os.path.exists(file):
             print(f"⚠️  Warning: Required file not found: {file}")
+    if not os.path.exists(DEFAULT_STORE_PATH) and not os.path.exists(DEFAULT_DATA_FILE):
+        print(f"⚠️  Warning: No property store ({DEFAULT_STORE_PATH}) or seed data ({DEFAULT_DATA_FILE})")
     
     # Run the app
     debug_mode = os.environ.get('FLASK_ENV') == 'development'
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Property Records Benchmark v6.2
+Bytes per record and conversion speed of __slots__ records vs plain dicts
+
+Usage: python benchmark_property_records.py [count]
+
+Properties come from the seeded bulk generator, so runs are comparable.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import property_serializer as serializer
+from generate_tampa_properties import TampaPropertiesGenerator
+from property_records import PropertyDetailsRecord
+from property_search_v6_2_FINAL import PropertySearchV62Final
+
+
+def measure(build, items):
+    """(resident bytes per item, items per second) of building build(item) for every item"""
+    started = time.perf_counter()
+    for item in items:
+        build(item)
+    rate = len(items) / (time.perf_counter() - started)
+
+    # Memory is measured in a separate pass: tracing slows allocation down
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = [build(item) for item in items]
+    resident = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del built
+    return resident / len(items), rate
+
+
+def throughput(func, items):
+    """Calls per second of func over items"""
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - started)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print(f"📊 PROPERTY RECORDS BENCHMARK ({count:,} properties, serializer: {serializer.SERIALIZER_NAME})")
+    print("=" * 80)
+
+    properties = list(TampaPropertiesGenerator(verbose=False).iter_bulk_properties(count, seed=1))
+    engine = PropertySearchV62Final()
+
+    # Extraction records are parsed from JSON in both cases, so neither side
+    # shares strings with the generated properties
+    reapi_blobs = [serializer.dumps(p["reapi_extraction"]) for p in properties]
+    zillow_blobs = [serializer.dumps(p["zillow_extraction"]) for p in properties]
+
+    cases = [
+        ("REAPI v6.0 extraction", reapi_blobs, serializer.loads,
+         lambda b: PropertyDetailsRecord.from_dict(serializer.loads(b), "reapi_v6.0")),
+        ("Zillow v6.0 extraction", zillow_blobs, serializer.loads,
+         lambda b: PropertyDetailsRecord.from_dict(serializer.loads(b), "zillow_v6.0")),
+        ("REAPI v6.2 conversion", properties, engine._convert_reapi_to_v62, engine._build_reapi_v62),
+        ("Zillow v6.2 conversion", properties, engine._convert_zillow_to_v62, engine._build_zillow_v62)
+    ]
+
+    for name, items, as_dict, as_record in cases:
+        dict_bytes, dict_rate = measure(as_dict, items)
+        record_bytes, record_rate = measure(as_record, items)
+
+        records = [as_record(item) for item in items[:1000]]
+        dicts = [r.to_dict() for r in records]
+        dumps_rate = throughput(serializer.dumps, dicts)
+        to_dict_dumps_rate = throughput(lambda r: serializer.dumps(r.to_dict()), records)
+        to_json_rate = throughput(lambda r: r.to_json(), records)
+
+        print(f"\n🏠 {name}")
+        print(f"   dict:   {dict_bytes:>8,.0f} bytes/record  {dict_rate:>10,.0f} records/s")
+        print(f"   record: {record_bytes:>8,.0f} bytes/record  {record_rate:>10,.0f} records/s"
+              f"  ({1 - record_bytes / dict_bytes:.0%} smaller)")
+        print(f"   JSON:   dumps(dict) {dumps_rate:,.0f}/s, record.to_json() {to_json_rate:,.0f}/s, "
+              f"dumps(record.to_dict()) {to_dict_dumps_rate:,.0f}/s")
+
+if __name__ == "__main__":
+    main()
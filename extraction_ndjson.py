@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Extraction NDJSON v6.2 - Line-delimited extraction datasets
+One property entry per line, written as it is produced
+
+Layout of an .ndjson extraction file:
+- One line per property entry (the objects found in "properties" of an
+  extraction JSON)
+- A trailer line {"extraction_summary": {...}} written last
+
+The summary goes last because a streaming producer only knows totals and
+timings once every property has been written. Readers iterate the file
+lazily, so a dataset of any size is processed in constant memory; the
+summary is found by reading the file backwards from the end.
+
+Classic extraction JSON documents are still accepted by open_extraction,
+which dispatches on the file extension.
+
+A running extraction journals into an ExtractionCheckpoint: the same line
+format, headed by a {"checkpoint": {...}} line, each line fsynced as the
+property completes, so an interrupted run can be resumed. Search results
+that arrive while the extraction runs are journalled as
+{"checkpoint_candidates": {...}} lines.
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+import property_serializer as serializer
+from property_categories import intern_extraction_entry
+
+SUMMARY_KEY = "extraction_summary"
+CHECKPOINT_KEY = "checkpoint"
+CANDIDATES_KEY = "checkpoint_candidates"
+
+
+class NDJSONExtractionWriter:
+    """Stream property entries to an NDJSON extraction file
+
+    Lines go to a temporary file that is renamed into place by close(), so
+    readers never see a partial dataset.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self.count = 0
+
+    def write(self, prop: Dict[str, Any]):
+        """Append one property entry"""
+        self._file.write(serializer.dumps(prop) + b"\n")
+        self.count += 1
+
+    def write_many(self, properties: Iterable[Dict[str, Any]]):
+        for prop in properties:
+            self.write(prop)
+
+    def write_lines(self, chunk: bytes):
+        """Append pre-serialized entries (newline-terminated NDJSON lines)"""
+        self._file.write(chunk)
+        self.count += chunk.count(b"\n")
+
+    def close(self, summary: Optional[Dict[str, Any]] = None):
+        """Write the summary trailer and publish the file"""
+        self._file.write(serializer.dumps({SUMMARY_KEY: summary or {}}) + b"\n")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard everything written so far"""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        elif not self._file.closed:
+            self.close()
+
+
+class ExtractionCheckpoint:
+    """Append-only journal of the completed properties of a running extraction
+
+    Every appended entry is flushed and fsynced before append() returns, so
+    a crash loses at most the property in progress. A line torn by a crash
+    mid-write is ignored by load() and cut off by resume().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._valid_bytes = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Read the journal
+
+        Returns:
+            (header given to start(), completed property entries in order);
+            (None, []) when there is no journal. Candidates added with
+            add_candidates() are appended to the header's "candidates",
+            counted in its "total_properties_found" and their page number
+            kept as its "search_pages".
+        """
+        header = None
+        entries = []
+        self._valid_bytes = 0
+        if not self.exists():
+            return header, entries
+
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = serializer.loads(line)
+                except ValueError:
+                    break
+                if isinstance(entry, dict) and CHECKPOINT_KEY in entry and "property_index" not in entry:
+                    header = entry[CHECKPOINT_KEY]
+                elif isinstance(entry, dict) and CANDIDATES_KEY in entry and "property_index" not in entry:
+                    if header is not None:
+                        header["candidates"] = header.get("candidates", []) + entry[CANDIDATES_KEY]["candidates"]
+                        header["total_properties_found"] = \
+                            header.get("total_properties_found", 0) + entry[CANDIDATES_KEY]["found"]
+                        header["search_pages"] = entry[CANDIDATES_KEY]["page"]
+                else:
+                    entries.append(intern_extraction_entry(entry))
+                self._valid_bytes += len(line)
+        return header, entries
+
+    def start(self, header: Dict[str, Any]):
+        """Begin a new journal (replacing any previous one) with a header line"""
+        self._file = open(self.path, "wb")
+        self._append_line(serializer.dumps({CHECKPOINT_KEY: header}))
+
+    def resume(self):
+        """Continue the journal read by load(), dropping a torn last line"""
+        self._file = open(self.path, "r+b")
+        self._file.truncate(self._valid_bytes)
+        self._file.seek(self._valid_bytes)
+
+    def add_candidates(self, page: int, found: int, candidates: List[Dict[str, Any]]):
+        """Durably record one search page: its number, result count and new candidates"""
+        self._append_line(serializer.dumps({CANDIDATES_KEY: {"page": page, "found": found,
+                                                             "candidates": candidates}}))
+
+    def append(self, prop: Dict[str, Any]):
+        """Durably record one completed property entry"""
+        self._append_line(serializer.dumps(prop))
+
+    def _append_line(self, line: bytes):
+        self._file.write(line + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Close and delete the journal (once the results are saved)"""
+        self.close()
+        if self.exists():
+            os.remove(self.path)
+
+
+def write_extraction_ndjson(path: str, properties: Iterable[Dict[str, Any]],
+                            summary: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Write property entries and their summary to an NDJSON extraction file
+
+    Returns:
+        Number of properties written
+    """
+    with NDJSONExtractionWriter(path) as writer:
+        writer.write_many(properties)
+        writer.close(summary)
+    return writer.count
+
+
+def is_ndjson_path(path: str) -> bool:
+    """Whether path names a line-delimited extraction file"""
+    return path.endswith((".ndjson", ".jsonl"))
+
+
+def _is_trailer(entry: Dict[str, Any]) -> bool:
+    return SUMMARY_KEY in entry and "property_index" not in entry
+
+
+def iter_ndjson_properties(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yield the property entries of an NDJSON extraction file"""
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = serializer.loads_entry(line)
+            if _is_trailer(entry):
+                return
+            yield entry
+
+
+def read_ndjson_summary(path: str, block_size: int = 65536) -> Dict[str, Any]:
+    """Read the summary trailer of an NDJSON extraction file
+
+    Only the tail of the file is read. A file without a trailer (e.g. one
+    still being written) has an empty summary.
+    """
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        tail = b""
+        position = end
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+            # The last line is complete once a newline precedes it
+            if tail.rstrip(b"\n").rfind(b"\n") >= 0:
+                break
+
+    lines = tail.rstrip(b"\n").split(b"\n")
+    if not lines or not lines[-1].strip():
+        return {}
+    try:
+        entry = serializer.loads(lines[-1])
+    except ValueError:
+        return {}
+    return entry[SUMMARY_KEY] if isinstance(entry, dict) and _is_trailer(entry) else {}
+
+
+def open_extraction(path: str) -> Tuple[Iterable[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Open an extraction file of either format
+
+    Returns:
+        (property entries, extraction_summary); the entries of an NDJSON file
+        are a lazy iterator, those of a JSON document are loaded in full
+    """
+    if is_ndjson_path(path):
+        return iter_ndjson_properties(path), read_ndjson_summary(path)
+
+    with open(path, "r") as f:
+        extraction_data = json.load(f)
+    properties = [intern_extraction_entry(prop) for prop in extraction_data.get("properties", [])]
+    return properties, extraction_data.get(SUMMARY_KEY, {})
+
+
+def main():
+    """Convert an extraction JSON document to NDJSON"""
+    if len(sys.argv) < 2:
+        print("Usage: python extraction_ndjson.py <extraction.json> [output.ndjson]")
+        sys.exit(1)
+
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".ndjson"
+
+    properties, summary = open_extraction(source)
+    count = write_extraction_ndjson(target, properties, summary)
+    print(f"✅ Wrote {count} properties to: {target}")
+
+if __name__ == "__main__":
+    main()
@@ -14,16 +14,30 @@ Version: v6.0 Client Delivery
 Date: May 2025
 """
 
+import argparse
 import json
 import random
-import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator
+
+import property_serializer as serializer
+from extraction_ndjson import NDJSONExtractionWriter, write_extraction_ndjson
+
+# Bulk mode: properties are drawn in fixed-size batches, each from its own RNG
+# seeded by (seed, batch number), so a given seed always yields the same dataset
+BULK_BATCH_SIZE = 10000
+# Dates in bulk fixtures are relative to this day instead of "now", so the
+# same seed reproduces byte-identical files
+FIXTURE_REFERENCE_DATE = datetime(2025, 5, 28)
+POSTAL_CODES = ["33615", "33618", "33624", "33625", "33626", "33647"]
 
 class TampaPropertiesGenerator:
     """Generate realistic Tampa area property data"""
     
-    def __init__(self):
+    def __init__(self, verbose: bool = True):
         """Initialize with Tampa area data"""
         self.target_address = "7709 Palmbrook Dr, Tampa, FL 33615"
         self.base_lat = 28.015482
@@ -72,8 +86,9 @@ class TampaPropertiesGenerator:
             "Condo": (100000, 350000)
         }
         
-        print("🏠 Tampa Properties Generator v6.0 initialized")
-        print(f"🎯 Target area: {self.target_address}")
+        if verbose:
+            print("🏠 Tampa Properties Generator v6.0 initialized")
+            print(f"🎯 Target area: {self.target_address}")
         
     def generate_realistic_address(self, index: int) -> Dict[str, str]:
         """Generate a realistic Tampa area address"""
@@ -417,13 +432,308 @@ class TampaPropertiesGenerator:
         
         return extraction_data
     
-    def save_results(self, extraction_data: Dict[str, Any]) -> str:
-        """Save extraction results to JSON file"""
+    # ------------------------------------------------------------------
+    # Bulk mode: seeded, batch-at-a-time generation for large fixtures
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _ints(rng: random.Random, low: int, high: int, n: int) -> List[int]:
+        """n uniform integers in [low, high]"""
+        rand = rng.random
+        span = high - low + 1
+        return [low + int(rand() * span) for _ in range(n)]
+
+    @staticmethod
+    def _floats(rng: random.Random, low: float, high: float, n: int) -> List[float]:
+        """n uniform floats in [low, high)"""
+        rand = rng.random
+        span = high - low
+        return [low + rand() * span for _ in range(n)]
+
+    def generate_batch(self, start_index: int, count: int, seed: int,
+                       reference_date: datetime = FIXTURE_REFERENCE_DATE) -> List[Dict[str, Any]]:
+        """
+        Generate property entries start_index .. start_index + count - 1
+
+        Every characteristic is drawn for the whole batch at once, column by
+        column, from the same tables as the single-property generators. The
+        Zillow and REAPI extractions describe the same house, and ids are
+        derived from the property index so they are unique in any fixture.
+
+        Args:
+            start_index: property_index of the first entry
+            count: Entries to generate
+            seed: Dataset seed
+            reference_date: Day the listing and sale dates are relative to
+        """
+        n = count
+        rng = random.Random(f"{seed}:{start_index}")
+        rand = rng.random
+        ints, floats, choices = self._ints, self._floats, rng.choices
+
+        # Address and location columns
+        street_numbers = ints(rng, 100, 19999, n)
+        streets = choices(self.street_names, k=n)
+        postal_codes = choices(POSTAL_CODES, k=n)
+        lats = [round(self.base_lat + d, 6) for d in floats(rng, -0.03, 0.03, n)]
+        lons = [round(self.base_lon + d, 6) for d in floats(rng, -0.03, 0.03, n)]
+
+        # Characteristics, drawn from the per-type range tables
+        types = choices(self.property_types, k=n)
+        years = ints(rng, *self.year_built_range, n)
+        sqfts = [int(lo + r * (hi - lo + 1)) for r, (lo, hi) in
+                 zip(floats(rng, 0, 1, n), (self.sqft_ranges[t] for t in types))]
+        lots = [int(lo + r * (hi - lo + 1)) if hi > 0 else 0 for r, (lo, hi) in
+                zip(floats(rng, 0, 1, n), (self.lot_size_ranges[t] for t in types))]
+        prices = [lo + r * (hi - lo + 1) for r, (lo, hi) in
+                  zip(floats(rng, 0, 1, n), (self.price_ranges[t] for t in types))]
+        prices = [int(p * (1.1 + rand() * 0.2 if y > 2010 else 1.0) * (1.1 + rand() * 0.1 if s > 2500 else 1.0))
+                  for p, y, s in zip(prices, years, sqfts)]
+
+        size_bucket = [0 if s < 1200 else 1 if s < 2000 else 2 if s < 3000 else 3 for s in sqfts]
+        bedroom_choices = ([2, 3], [3, 4], [3, 4, 5], [4, 5, 6])
+        bathroom_choices = ([1, 2], [2, 3], [2, 3, 4], [3, 4, 5])
+        bedrooms = [rng.choice(bedroom_choices[b]) for b in size_bucket]
+        bathrooms = [rng.choice(bathroom_choices[b]) for b in size_bucket]
+        half_baths = [1 if rand() > 0.85 else 0 for _ in range(n)]
+        pools = [t == "SFR" and rand() > 0.8 for t in types]
+        fireplaces = [rand() > 0.7 for _ in range(n)]
+        garages = [rng.choice((0, 1)) if t == "Condo" else rng.choice((1, 2, 3)) for t in types]
+
+        subdivisions = choices(self.subdivisions, k=n)
+        neighborhoods = choices(self.neighborhoods, k=n)
+        listed_days = ints(rng, 1, 180, n)
+        sale_counts = ints(rng, 1, 3, n)
+
+        fetch_timestamp = reference_date.isoformat()
+        current_year = reference_date.year
+        entries = []
+
+        for i in range(n):
+            index = start_index + i
+            prop_type = types[i]
+            street = f"{street_numbers[i]} {streets[i]}"
+            full_address = f"{street}, Tampa, FL {postal_codes[i]}"
+            list_price = prices[i]
+            year_built = years[i]
+            living_sqft = sqfts[i]
+            lot_sqft = lots[i]
+            garage_spaces = garages[i]
+
+            history = []
+            for _ in range(sale_counts[i]):
+                years_back = 2 + int(rand() * (max(2, min(15, current_year - year_built)) - 1))
+                sale_date = reference_date - timedelta(days=years_back * 365 + int(rand() * 366))
+                history.append({
+                    "price": int(list_price / ((1.03 + rand() * 0.04) ** years_back)),
+                    "date": sale_date.strftime("%Y-%m-%d"),
+                    "transaction_type": "ArmsLengthResidential"
+                })
+            history.sort(key=lambda x: x["date"])
+
+            listed_date = (reference_date - timedelta(days=listed_days[i])).strftime("%Y-%m-%d")
+
+            reapi_property = {
+                "PropertyDetails": {
+                    "identification": {
+                        "apn": f"U{index:08d}I{index % 999983:06d}{street_numbers[i] % 10000:04d}",
+                        "address_full": full_address,
+                        "street": street,
+                        "city": "Tampa",
+                        "state": "FL",
+                        "postal_code": postal_codes[i],
+                        "property_type": prop_type,
+                        "property_use": "Single Family Residence" if prop_type == "SFR" else prop_type,
+                        "landUse": "RESIDENTIAL",
+                        "legalDescription": f"LOT {index % 50 + 1} BLOCK {index % 10 + 1} {subdivisions[i].upper()}",
+                        "propertyClass": "Residential",
+                        "year_built": year_built,
+                        "living_sqft": living_sqft,
+                        "building_sqft": int(living_sqft * 1.2),
+                        "lot_sqft": lot_sqft,
+                        "lot_acres": round(lot_sqft / 43560, 2) if lot_sqft > 0 else 0,
+                        "bedrooms": bedrooms[i],
+                        "bathrooms_full": bathrooms[i],
+                        "bathrooms_half": half_baths[i],
+                        "basement": False,
+                        "foundation_type": "Concrete Slab",
+                        "parking_type": "Attached Garage" if garage_spaces > 0 else "None",
+                        "parking_spaces": garage_spaces,
+                        "pool": pools[i],
+                        "fireplace": fireplaces[i],
+                        "fireplaces": 1 if fireplaces[i] else 0,
+                        "air_conditioning_type": "Central",
+                        "heating_type": "ForcedAirUnit",
+                        "water_type": "Public",
+                        "sewer_type": "Public"
+                    },
+                    "location": {
+                        "lat": lats[i],
+                        "lon": lons[i],
+                        "subdivision": subdivisions[i],
+                        "neighborhood": neighborhoods[i]
+                    },
+                    "ai_fields": {},
+                    "price_history": {
+                        "property_market_status": "Active",
+                        "list_price": list_price,
+                        "listed_date": listed_date,
+                        "last_sale_price": history[-1]["price"],
+                        "last_sale_date": history[-1]["date"],
+                        "sale_history": history
+                    },
+                    "photos": [],
+                    "environmental_factors": [],
+                    "meta_data": {
+                        "data_source": "REAPI",
+                        "source_property_id": str(100000000 + index),
+                        "fetch_timestamp": fetch_timestamp,
+                        "api_version": "v6.0_REAL_DATA"
+                    }
+                }
+            }
+
+            zillow_property = {
+                "PropertyDetails": {
+                    "identification": {
+                        "address_full": full_address,
+                        "street": street,
+                        "city": "Tampa",
+                        "state": "FL",
+                        "postal_code": postal_codes[i],
+                        "property_type": prop_type,
+                        "year_built": year_built,
+                        "living_sqft": living_sqft,
+                        "lot_sqft": lot_sqft,
+                        "bedrooms": bedrooms[i],
+                        "bathrooms_full": bathrooms[i],
+                        "bathrooms_half": None,
+                        "heating_type": "ForcedAirUnit",
+                        "exterior_materials": [],
+                        "interior_materials": []
+                    },
+                    "location": {
+                        "lat": lats[i],
+                        "lon": lons[i],
+                        "county_fips": None,
+                        "subdivision": None,
+                        "neighborhood": None
+                    },
+                    "ai_fields": {
+                        "architectural_styles": [],
+                        "finish_quality_score": None,
+                        "condition_score": None,
+                        "road_relations": []
+                    },
+                    "price_history": {
+                        "property_market_status": "Active",
+                        "list_price": list_price,
+                        "last_sale_price": None,
+                        "mls_history": [
+                            {"price": list_price, "date": listed_date, "event": "Listed", "source": "Zillow"}
+                        ],
+                        "sale_history": []
+                    },
+                    "photos": [],
+                    "meta_data": {
+                        "data_source": "Zillow",
+                        "source_property_id": str(50000000 + index),
+                        "fetch_timestamp": fetch_timestamp,
+                        "api_version": "v6.0_CLIENT_APPROVED_AS_IS"
+                    }
+                }
+            }
+
+            entries.append({
+                "property_index": index,
+                "search_result": {
+                    "address": full_address,
+                    "property_type": prop_type,
+                    "price": list_price
+                },
+                "zillow_extraction": zillow_property,
+                "reapi_extraction": reapi_property,
+                "extraction_status": {
+                    "zillow_success": True,
+                    "reapi_success": True,
+                    "extraction_timestamp": fetch_timestamp
+                }
+            })
+
+        return entries
+
+    def iter_bulk_chunks(self, count: int, seed: int,
+                         reference_date: datetime = FIXTURE_REFERENCE_DATE,
+                         workers: int = 1) -> Iterator[bytes]:
+        """
+        Yield count seeded property entries as NDJSON, one chunk per batch
+
+        With workers > 1 the batches are generated and serialized in a
+        process pool and merged back in property_index order. Each batch is
+        seeded by its own index range, so the output is identical for any
+        number of workers. At most two batches per worker are in flight,
+        which keeps memory bounded however large count is.
+        """
+        tasks = ((start, min(BULK_BATCH_SIZE, count + 1 - start), seed, reference_date)
+                 for start in range(1, count + 1, BULK_BATCH_SIZE))
+
+        if workers <= 1:
+            for task in tasks:
+                yield _serialize_batch(self.generate_batch(*task))
+            return
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(_generate_shard, task))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def iter_bulk_properties(self, count: int, seed: int,
+                             reference_date: datetime = FIXTURE_REFERENCE_DATE,
+                             workers: int = 1) -> Iterator[Dict[str, Any]]:
+        """Yield count seeded property entries in property_index order, one batch in memory at a time"""
+        if workers <= 1:
+            for start in range(1, count + 1, BULK_BATCH_SIZE):
+                yield from self.generate_batch(start, min(BULK_BATCH_SIZE, count + 1 - start), seed, reference_date)
+            return
+
+        for chunk in self.iter_bulk_chunks(count, seed, reference_date, workers):
+            for line in chunk.splitlines():
+                yield serializer.loads(line)
+
+    def bulk_summary(self, count: int, seed: int,
+                     reference_date: datetime = FIXTURE_REFERENCE_DATE) -> Dict[str, Any]:
+        """extraction_summary for a bulk fixture"""
+        return {
+            "target_address": self.target_address,
+            "extraction_timestamp": reference_date.isoformat(),
+            "total_properties_found": count,
+            "properties_processed": count,
+            "successful_extractions": count,
+            "failed_extractions": 0,
+            "data_source": "Generated Tampa Area Data",
+            "generator_seed": seed,
+            "area_characteristics": {
+                "neighborhoods": len(self.neighborhoods),
+                "subdivisions": len(self.subdivisions),
+                "property_types": self.property_types,
+                "price_ranges": self.price_ranges
+            }
+        }
+
+    def save_results(self, extraction_data: Dict[str, Any], ndjson: bool = False) -> str:
+        """Save extraction results to a JSON (or NDJSON) file"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"TAMPA_PROPERTIES_EXTRACTION_{timestamp}.json"
+        filename = f"TAMPA_PROPERTIES_EXTRACTION_{timestamp}.{'ndjson' if ndjson else 'json'}"
         
-        with open(filename, 'w') as f:
-            json.dump(extraction_data, f, indent=2)
+        if ndjson:
+            write_extraction_ndjson(filename, extraction_data["properties"], extraction_data["extraction_summary"])
+        else:
+            with open(filename, 'w') as f:
+                json.dump(extraction_data, f, indent=2)
         
         print(f"💾 Results saved to: {filename}")
         return filename
@@ -471,14 +781,83 @@ class TampaPropertiesGenerator:
         print(f"   ✅ Realistic Tampa area properties")
         print(f"   ✅ PropertyDetails v6.0 format")
 
+# Per-process generator for pool workers
+_worker_generator = None
+
+
+def _init_worker():
+    global _worker_generator
+    _worker_generator = TampaPropertiesGenerator(verbose=False)
+
+
+def _serialize_batch(entries: List[Dict[str, Any]]) -> bytes:
+    """NDJSON lines for a batch of property entries"""
+    return b"".join(serializer.dumps(entry) + b"\n" for entry in entries)
+
+
+def _generate_shard(task) -> bytes:
+    """Generate and serialize one batch in a pool worker
+
+    Returning one bytes object keeps the transfer back to the parent cheap.
+    """
+    return _serialize_batch(_worker_generator.generate_batch(*task))
+
+
+def generate_bulk(generator: TampaPropertiesGenerator, args) -> None:
+    """Stream a seeded bulk fixture to NDJSON and/or the property store"""
+    summary = generator.bulk_summary(args.count, args.seed)
+
+    print(f"🎲 Generating {args.count:,} properties with seed {args.seed} ({args.workers} worker(s))")
+    started = time.perf_counter()
+
+    if args.store:
+        from property_store import PropertyStore
+        store = PropertyStore(args.store)
+        properties = generator.iter_bulk_properties(args.count, args.seed, workers=args.workers)
+        if args.ndjson:
+            with NDJSONExtractionWriter(args.ndjson) as writer:
+                def tee():
+                    for prop in properties:
+                        writer.write(prop)
+                        yield prop
+                store.import_properties(tee(), args.ndjson, summary)
+                writer.close(summary)
+            print(f"💾 Results saved to: {args.ndjson}")
+        else:
+            store.import_properties(properties, f"generated:seed={args.seed}", summary)
+        print(f"🗄️ Property store: {args.store} ({store.count():,} properties)")
+    else:
+        path = args.ndjson or f"TAMPA_PROPERTIES_{args.count}_SEED{args.seed}.ndjson"
+        with NDJSONExtractionWriter(path) as writer:
+            for chunk in generator.iter_bulk_chunks(args.count, args.seed, workers=args.workers):
+                writer.write_lines(chunk)
+            writer.close(summary)
+        print(f"💾 Results saved to: {path}")
+
+    elapsed = time.perf_counter() - started
+    print(f"⚡ {args.count:,} properties in {elapsed:.1f}s ({args.count / elapsed:,.0f}/s)")
+
+
 def main():
     """Main function for Tampa properties generation"""
-    count = int(sys.argv[1]) if len(sys.argv) > 1 else 25
-    
+    parser = argparse.ArgumentParser(description="Generate Tampa area property data")
+    parser.add_argument("count", nargs="?", type=int, default=25, help="Number of properties (default 25)")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible bulk fixtures")
+    parser.add_argument("--ndjson", help="Stream a bulk fixture to this NDJSON file")
+    parser.add_argument("--store", help="Stream a bulk fixture into this SQLite property store")
+    parser.add_argument("--workers", type=int, default=1, help="Generator processes for bulk mode (default 1)")
+    args = parser.parse_args()
+
     generator = TampaPropertiesGenerator()
-    
+
+    if args.seed is not None or args.ndjson or args.store or args.workers > 1:
+        if args.seed is None:
+            args.seed = 0
+        generate_bulk(generator, args)
+        return
+
     # Generate properties
-    results = generator.generate_multiple_properties(count)
+    results = generator.generate_multiple_properties(args.count)
     
     # Save results
     filename = generator.save_results(results)
@@ -490,4 +869,4 @@ def main():
     print("🎯 This delivers exactly what the client requested!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
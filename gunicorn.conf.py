@@ -0,0 +1,31 @@
+"""
+PropertyDetails v6.2 - Production WSGI server configuration
+Pre-fork gunicorn: the dataset and caches are loaded once in the master
+and shared copy-on-write by the workers
+
+Environment:
+    PORT / HOST          Listen address (default 0.0.0.0:5000)
+    WEB_CONCURRENCY      Worker processes (default 2)
+    GUNICORN_THREADS     Threads per worker (default 4)
+    GUNICORN_TIMEOUT     Worker timeout in seconds (default 60)
+    PRELOAD_RECORDS      Records pre-rendered before forking (default 1000)
+"""
+
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Import app.py in the master so its state is inherited by every worker
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """Warm the dataset and caches in the master, before any worker forks"""
+    import app
+    app.preload_dataset()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+HTTP Cache v6.2 - Compression negotiation and conditional GET helpers
+gzip always, brotli when the brotli package is installed
+
+Response bodies and their compressed variants are kept in a byte-bounded LRU
+(V62RecordCache), keyed by ETag, so a repeat search is served without
+re-running the search or re-compressing. Bodies that are byte-identical for
+an ETag get a strong one; search bodies, which carry timestamps and cache
+statistics, get a weak (W/) one. For those the cache holds a response
+template (see property_serializer.response_template) that is stamped, and
+compressed, per response.
+"""
+
+import gzip
+import hashlib
+import os
+from typing import Callable, Optional, Tuple
+
+from property_record_cache import V62RecordCache
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+DEFAULT_RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Content codings this server can produce, preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported content coding from an Accept-Encoding header"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        fields = part.strip().split(";")
+        coding = fields[0].strip().lower()
+        quality = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in supported_encodings():
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress body with the given content coding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def encode(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """(payload, applied encoding) of body under the negotiated encoding (small bodies are sent as-is)"""
+    if not encoding or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    return compress(body, encoding), encoding
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    """ETag over the given parts; weak when equal parts only give equivalent bodies"""
+    digest = hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of an encoded representation (each coding is a distinct representation)"""
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match evaluation (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Byte-bounded LRU of response bodies and their encoded variants"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """Initialize the cache (RESPONSE_CACHE_MAX_BYTES overrides the default budget)"""
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", DEFAULT_RESPONSE_CACHE_MAX_BYTES))
+        self.entries = V62RecordCache(max_bytes)
+
+    def body(self, etag: str, build: Callable[[], bytes]) -> bytes:
+        """Return the cached body (or response template) for etag, building it on a miss"""
+        return self.entries.get_or_convert((etag, None), lambda _: build(), None)
+
+    def encoded(self, etag: str, body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Return (payload, applied encoding) for body under the negotiated encoding"""
+        if not encoding or len(body) < COMPRESS_MIN_BYTES:
+            return body, None
+        return self.entries.get_or_convert((etag, encoding), lambda b: compress(b, encoding), body), encoding
+
+    def stats(self):
+        return self.entries.stats()
+
+
+class CachedTemplate:
+    """A static file held in memory, reloaded only when its mtime changes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime = None
+        self.body = b""
+        self.etag = ""
+
+    def load(self) -> Tuple[bytes, str]:
+        """Return (body, etag), re-reading the file only if it changed"""
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with open(self.path, "rb") as f:
+                self.body = f.read()
+            self.etag = make_etag("template", hashlib.sha1(self.body).hexdigest())
+            self._mtime = mtime
+        return self.body, self.etag
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Price History Index v6.2 - Time-series store of sale and MLS events
+sale_history and mls_history flattened into (property, date, price, event) rows
+
+Each stored property's sale_history (REAPI, Zillow) and mls_history (Zillow)
+entries become rows of the price_events table:
+    property_id  store row id
+    day          date as an int, YYYYMMDD (orders and compares like the date)
+    price        integer price
+    kind         "sale" or "mls"
+    event        transaction_type of a sale, event of an MLS entry
+    postal_code  5-digit ZIP, so area queries need no join
+Indexes on (day), (postal_code, day) and (property_id, day) answer queries
+like "all sales in 33615 in the last 24 months" from the index alone.
+
+The property store keeps the table current at import and ingest, the same
+way it maintains property_aggregates.
+
+Usage: python price_history_index.py <postal_code> [months]
+"""
+
+import json
+import math
+import statistics
+import sys
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from address_normalizer import zip5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_events (
+    property_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    event TEXT,
+    postal_code TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_price_events_day ON price_events(day);
+CREATE INDEX IF NOT EXISTS idx_price_events_zip_day ON price_events(postal_code, day);
+CREATE INDEX IF NOT EXISTS idx_price_events_property ON price_events(property_id, day);
+"""
+
+DAYS_PER_YEAR = 365.25
+
+# Appreciation is only measured between real sales held long enough to mean
+# something: nominal deeds ($10, $100 transfers) are skipped, sales less than
+# MIN_HOLDING_YEARS apart give no rate, and rates outside the band are dropped
+MIN_SALE_PRICE = 1000
+MIN_HOLDING_YEARS = 1.0
+MIN_ANNUAL_RATE = -0.5
+MAX_ANNUAL_RATE = 1.0
+
+
+def day_int(value: Any) -> Optional[int]:
+    """YYYYMMDD int of a date, datetime or ISO date string"""
+    if isinstance(value, (date, datetime)):
+        return value.year * 10000 + value.month * 100 + value.day
+    if not isinstance(value, str) or len(value) < 10:
+        return None
+    try:
+        parsed = datetime.strptime(value[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    return parsed.year * 10000 + parsed.month * 100 + parsed.day
+
+
+def day_date(day: int) -> date:
+    """date of a YYYYMMDD day int"""
+    return date(day // 10000, day // 100 % 100, day % 100)
+
+
+def months_before(day: int, months: int) -> int:
+    """The day int `months` calendar months before day (clamped to month end)"""
+    year, month, dom = day // 10000, day // 100 % 100, day % 100
+    total = year * 12 + (month - 1) - months
+    year, month = divmod(total, 12)
+    month += 1
+    last_day = 31 if month in (1, 3, 5, 7, 8, 10, 12) else 30 if month != 2 else \
+        29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28
+    return year * 10000 + month * 100 + min(dom, last_day)
+
+
+def _details(prop: Dict[str, Any], source: str) -> Dict[str, Any]:
+    extraction = prop.get(f"{source}_extraction") or {}
+    return extraction.get("PropertyDetails") or {}
+
+
+def property_events(prop: Dict[str, Any]) -> List[Tuple[int, int, str, Optional[str]]]:
+    """(day, price, kind, event) rows of one extraction property entry
+
+    A sale reported by both sources is kept once.
+    """
+    events = []
+    seen = set()
+    for source in ("reapi", "zillow"):
+        price_history = _details(prop, source).get("price_history") or {}
+        for kind, entries, event_field in (("sale", price_history.get("sale_history"), "transaction_type"),
+                                          ("mls", price_history.get("mls_history"), "event")):
+            for entry in entries or ():
+                if not isinstance(entry, dict) or not entry.get("price"):
+                    continue
+                day = day_int(entry.get("date"))
+                if day is None:
+                    continue
+                identity = (kind, day, int(entry["price"]))
+                if identity in seen:
+                    continue
+                seen.add(identity)
+                events.append((day, int(entry["price"]), kind, entry.get(event_field)))
+    return events
+
+
+def _postal_code(prop: Dict[str, Any]) -> Optional[str]:
+    for source in ("reapi", "zillow"):
+        code = zip5((_details(prop, source).get("identification") or {}).get("postal_code"))
+        if code:
+            return code
+    return None
+
+
+def track_property(conn, property_id: int, prop: Dict[str, Any]):
+    """Add a property's price events"""
+    postal_code = _postal_code(prop)
+    conn.executemany(
+        "INSERT INTO price_events(property_id, day, price, kind, event, postal_code) VALUES (?, ?, ?, ?, ?, ?)",
+        [(property_id, day, price, kind, event, postal_code) for day, price, kind, event in property_events(prop)])
+
+
+def untrack_property(conn, property_id: int):
+    """Remove a property's price events"""
+    conn.execute("DELETE FROM price_events WHERE property_id = ?", (property_id,))
+
+
+def clear(conn):
+    """Drop every event (before a full reload)"""
+    conn.execute("DELETE FROM price_events")
+
+
+def rebuild(conn) -> int:
+    """Rebuild the table from the stored properties
+
+    Returns:
+        Number of events indexed
+    """
+    clear(conn)
+    for property_id, data in conn.execute("SELECT id, data FROM properties"):
+        track_property(conn, property_id, json.loads(data))
+    return conn.execute("SELECT COUNT(*) FROM price_events").fetchone()[0]
+
+
+def query_events(conn, postal_code: Optional[str] = None, since: Optional[int] = None,
+                 until: Optional[int] = None, kind: Optional[str] = None,
+                 property_indexes: Optional[List[int]] = None) -> List[Tuple[int, int, int, str, Optional[str]]]:
+    """
+    Price events matching the filters, oldest first
+
+    Args:
+        postal_code: 5-digit ZIP
+        since, until: Inclusive day ints (YYYYMMDD)
+        kind: "sale" or "mls"
+        property_indexes: Dataset property_index values
+
+    Returns:
+        (property_index, day, price, kind, event) rows
+    """
+    where, params = [], []
+    if postal_code is not None:
+        where.append("e.postal_code = ?")
+        params.append(zip5(postal_code) or postal_code)
+    if since is not None:
+        where.append("e.day >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("e.day <= ?")
+        params.append(until)
+    if kind is not None:
+        where.append("e.kind = ?")
+        params.append(kind)
+    if property_indexes is not None:
+        where.append(f"p.property_index IN ({', '.join('?' for _ in property_indexes)})")
+        params.extend(property_indexes)
+
+    sql = ("SELECT p.property_index, e.day, e.price, e.kind, e.event "
+           "FROM price_events e JOIN properties p ON p.id = e.property_id")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY e.day, e.property_id"
+    return conn.execute(sql, params).fetchall()
+
+
+def recent_sales(conn, postal_code: str, months: int = 24, as_of: Optional[int] = None):
+    """Sales in a ZIP code over the last `months` months (as of today by default)"""
+    as_of = as_of if as_of is not None else day_int(date.today())
+    return query_events(conn, postal_code=postal_code, since=months_before(as_of, months), until=as_of, kind="sale")
+
+
+def annual_rate(first: Tuple[int, int], last: Tuple[int, int]) -> Optional[float]:
+    """
+    Annualized rate between two (day, price) sales
+
+    Returns:
+        The rate, or None when either price is nominal, the sales are less
+        than MIN_HOLDING_YEARS apart or the rate is outside
+        [MIN_ANNUAL_RATE, MAX_ANNUAL_RATE]
+    """
+    if first[1] < MIN_SALE_PRICE or last[1] < MIN_SALE_PRICE:
+        return None
+    years = (day_date(last[0]) - day_date(first[0])).days / DAYS_PER_YEAR
+    if years < MIN_HOLDING_YEARS:
+        return None
+    try:
+        rate = math.expm1(math.log(last[1] / first[1]) / years)
+    except (OverflowError, ValueError):
+        return None
+    if not MIN_ANNUAL_RATE <= rate <= MAX_ANNUAL_RATE:
+        return None
+    return round(rate, 4)
+
+
+def appreciation_rates(conn, postal_code: Optional[str] = None,
+                       property_indexes: Optional[List[int]] = None) -> Dict[int, float]:
+    """
+    Annualized appreciation per property between its first and last sale
+
+    One ordered scan over the sale rows; each property's first and last sale
+    are picked up as its run of rows passes. Nominal sales (below
+    MIN_SALE_PRICE) are not read; properties without a rate (see
+    annual_rate) are left out.
+
+    Returns:
+        {property_index: annual rate (0.05 = +5%/year)}
+    """
+    rates = {}
+    current = first = last = None
+
+    def close():
+        if current is not None:
+            rate = annual_rate(first, last)
+            if rate is not None:
+                rates[current] = rate
+
+    where, params = ["e.kind = 'sale'", "e.price >= ?"], [MIN_SALE_PRICE]
+    if postal_code is not None:
+        where.append("e.postal_code = ?")
+        params.append(zip5(postal_code) or postal_code)
+    if property_indexes is not None:
+        where.append(f"p.property_index IN ({', '.join('?' for _ in property_indexes)})")
+        params.extend(property_indexes)
+    rows = conn.execute(
+        "SELECT p.property_index, e.day, e.price FROM price_events e JOIN properties p ON p.id = e.property_id "
+        f"WHERE {' AND '.join(where)} ORDER BY e.property_id, e.day", params)
+
+    for property_index, day, price in rows:
+        if property_index != current:
+            close()
+            current, first = property_index, (day, price)
+        last = (day, price)
+    close()
+    return rates
+
+
+def area_appreciation(conn, postal_code: Optional[str] = None) -> Optional[float]:
+    """Median annual appreciation rate of the properties of an area (or all), or None"""
+    rates = list(appreciation_rates(conn, postal_code).values())
+    return round(statistics.median(rates), 4) if rates else None
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python price_history_index.py <postal_code> [months]")
+        sys.exit(1)
+
+    from property_store import open_store
+
+    postal_code = sys.argv[1]
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    conn = open_store().connection()
+
+    sales = recent_sales(conn, postal_code, months)
+    print(f"📈 {len(sales)} sales in {postal_code} in the last {months} months")
+    for property_index, day, price, _, event in sales[-10:]:
+        print(f"   {day_date(day)}  property {property_index}: ${price:,} ({event})")
+
+    rate = area_appreciation(conn, postal_code)
+    print(f"📊 Median appreciation in {postal_code}: "
+          f"{'n/a' if rate is None else f'{rate:+.2%} per year'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Property Aggregates v6.2 - Materialized market statistics per area
+Median price per sqft, days on market and sale-price trends per
+subdivision, neighborhood and postal_code
+
+Each stored property contributes member rows (its price per sqft, days on
+market and dated sales) to the groups it belongs to. When the store inserts
+or rewrites a property, only that property's member rows change and its
+groups are marked dirty; dirty groups are recomputed from their members
+before the transaction commits. The aggregates table then holds one
+ready-to-serve JSON document per group, read by primary key.
+"""
+
+import json
+import statistics
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+
+from address_normalizer import zip5
+
+GROUP_TYPES = ("subdivision", "neighborhood", "postal_code")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS aggregate_members (
+    property_id INTEGER NOT NULL,
+    group_type TEXT NOT NULL,
+    group_key TEXT NOT NULL,
+    price_per_sqft REAL,
+    days_on_market INTEGER
+);
+CREATE TABLE IF NOT EXISTS aggregate_sales (
+    property_id INTEGER NOT NULL,
+    group_type TEXT NOT NULL,
+    group_key TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    price INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    group_type TEXT NOT NULL,
+    group_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (group_type, group_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_aggregate_members_group ON aggregate_members(group_type, group_key);
+CREATE INDEX IF NOT EXISTS idx_aggregate_members_property ON aggregate_members(property_id);
+CREATE INDEX IF NOT EXISTS idx_aggregate_sales_group ON aggregate_sales(group_type, group_key, year);
+CREATE INDEX IF NOT EXISTS idx_aggregate_sales_property ON aggregate_sales(property_id);
+"""
+
+
+def _date(value: Any) -> Optional[datetime]:
+    """Parse the date part of an ISO date/timestamp string"""
+    if not isinstance(value, str) or len(value) < 10:
+        return None
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _details(prop: Dict[str, Any], source: str) -> Dict[str, Any]:
+    extraction = prop.get(f"{source}_extraction") or {}
+    return extraction.get("PropertyDetails") or {}
+
+
+def property_facts(prop: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    What one extraction property entry contributes to the aggregates
+
+    REAPI data is preferred, Zillow fills the gaps (as in property_columns).
+
+    Returns:
+        {"groups": {group_type: key}, "price_per_sqft", "days_on_market",
+         "sales": [(year, price), ...]}
+    """
+    reapi, zillow = _details(prop, "reapi"), _details(prop, "zillow")
+    views = [view for view in (reapi, zillow) if view]
+
+    def first(section: str, field: str) -> Any:
+        for view in views:
+            value = (view.get(section) or {}).get(field)
+            if value not in (None, ""):
+                return value
+        return None
+
+    groups = {
+        "subdivision": first("location", "subdivision"),
+        "neighborhood": first("location", "neighborhood"),
+        "postal_code": zip5(first("identification", "postal_code"))
+    }
+
+    list_price = first("price_history", "list_price")
+    living_sqft = first("identification", "living_sqft")
+    price_per_sqft = round(list_price / living_sqft, 2) if list_price and living_sqft else None
+
+    # Days on market as of the fetch that reported the listing
+    days_on_market = None
+    for view in views:
+        price_history = view.get("price_history") or {}
+        listed = _date(price_history.get("listed_date"))
+        if listed is None:
+            listings = [_date(e.get("date")) for e in price_history.get("mls_history") or []
+                        if isinstance(e, dict) and e.get("event") == "Listed"]
+            listings = [d for d in listings if d is not None]
+            listed = max(listings) if listings else None
+        fetched = _date((view.get("meta_data") or {}).get("fetch_timestamp"))
+        if listed is not None and fetched is not None and fetched >= listed:
+            days_on_market = (fetched - listed).days
+            break
+
+    sales = []
+    for view in views:
+        for sale in (view.get("price_history") or {}).get("sale_history") or []:
+            if not isinstance(sale, dict):
+                continue
+            sold = _date(sale.get("date"))
+            if sold is not None and sale.get("price"):
+                sales.append((sold.year, int(sale["price"])))
+        if sales:
+            break
+
+    return {
+        "groups": {group_type: str(key) for group_type, key in groups.items() if key not in (None, "")},
+        "price_per_sqft": price_per_sqft,
+        "days_on_market": days_on_market,
+        "sales": sales
+    }
+
+
+def untrack_property(conn, property_id: int, dirty: Set[Tuple[str, str]]):
+    """Remove a property's member rows, marking its groups dirty"""
+    dirty.update(conn.execute("SELECT group_type, group_key FROM aggregate_members WHERE property_id = ?",
+                              (property_id,)).fetchall())
+    conn.execute("DELETE FROM aggregate_members WHERE property_id = ?", (property_id,))
+    conn.execute("DELETE FROM aggregate_sales WHERE property_id = ?", (property_id,))
+
+
+def track_property(conn, property_id: int, prop: Dict[str, Any], dirty: Set[Tuple[str, str]]):
+    """Add a property's member rows, marking its groups dirty"""
+    facts = property_facts(prop)
+    for group_type, key in facts["groups"].items():
+        conn.execute(
+            "INSERT INTO aggregate_members(property_id, group_type, group_key, price_per_sqft, days_on_market) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (property_id, group_type, key, facts["price_per_sqft"], facts["days_on_market"]))
+        conn.executemany(
+            "INSERT INTO aggregate_sales(property_id, group_type, group_key, year, price) VALUES (?, ?, ?, ?, ?)",
+            [(property_id, group_type, key, year, price) for year, price in facts["sales"]])
+        dirty.add((group_type, key))
+
+
+def _compute(conn, group_type: str, key: str) -> Optional[Dict[str, Any]]:
+    """Aggregate document of one group from its member rows, or None if it has none"""
+    members = conn.execute(
+        "SELECT price_per_sqft, days_on_market FROM aggregate_members WHERE group_type = ? AND group_key = ?",
+        (group_type, key)).fetchall()
+    if not members:
+        return None
+
+    price_per_sqft = [p for p, _ in members if p is not None]
+    days_on_market = [d for _, d in members if d is not None]
+
+    by_year: Dict[int, List[int]] = {}
+    for year, price in conn.execute(
+            "SELECT year, price FROM aggregate_sales WHERE group_type = ? AND group_key = ? ORDER BY year",
+            (group_type, key)):
+        by_year.setdefault(year, []).append(price)
+    trend = [{"year": year, "median_sale_price": statistics.median(prices), "sales": len(prices)}
+             for year, prices in by_year.items()]
+
+    latest_change = None
+    if len(trend) >= 2 and trend[-2]["median_sale_price"]:
+        latest_change = round(100 * (trend[-1]["median_sale_price"] / trend[-2]["median_sale_price"] - 1), 2)
+
+    return {
+        "group": group_type,
+        "key": key,
+        "property_count": len(members),
+        "median_price_per_sqft": round(statistics.median(price_per_sqft), 2) if price_per_sqft else None,
+        "median_days_on_market": statistics.median(days_on_market) if days_on_market else None,
+        "average_days_on_market": round(statistics.mean(days_on_market), 1) if days_on_market else None,
+        "sale_price_trend": trend,
+        "latest_sale_price_change_pct": latest_change,
+        "updated_at": datetime.now().isoformat()
+    }
+
+
+def refresh_groups(conn, dirty: Iterable[Tuple[str, str]]) -> int:
+    """Recompute the aggregate documents of the dirty groups
+
+    Returns:
+        Number of groups refreshed
+    """
+    refreshed = 0
+    for group_type, key in dirty:
+        data = _compute(conn, group_type, key)
+        if data is None:
+            conn.execute("DELETE FROM aggregates WHERE group_type = ? AND group_key = ?", (group_type, key))
+        else:
+            conn.execute("INSERT OR REPLACE INTO aggregates(group_type, group_key, data) VALUES (?, ?, ?)",
+                         (group_type, key, json.dumps(data, separators=(",", ":"))))
+        refreshed += 1
+    return refreshed
+
+
+def clear(conn):
+    """Drop every member row and aggregate (before a full reload)"""
+    for table in ("aggregate_members", "aggregate_sales", "aggregates"):
+        conn.execute(f"DELETE FROM {table}")
+
+
+def rebuild(conn) -> int:
+    """Rebuild every aggregate from the stored properties
+
+    Returns:
+        Number of groups built
+    """
+    clear(conn)
+    dirty: Set[Tuple[str, str]] = set()
+    for property_id, data in conn.execute("SELECT id, data FROM properties"):
+        track_property(conn, property_id, json.loads(data), dirty)
+    return refresh_groups(conn, dirty)
+
+
+def read_aggregate(conn, group_type: str, key: str) -> Optional[str]:
+    """Stored JSON document of one group (a primary key lookup), or None"""
+    row = conn.execute("SELECT data FROM aggregates WHERE group_type = ? AND group_key = ?",
+                       (group_type, key)).fetchone()
+    return row[0] if row else None
+
+
+def read_group_type(conn, group_type: str) -> List[str]:
+    """Stored JSON documents of every group of one type, ordered by key"""
+    return [row[0] for row in conn.execute(
+        "SELECT data FROM aggregates WHERE group_type = ? ORDER BY group_key", (group_type,))]
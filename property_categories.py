@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Property Categories v6.2 - Load-time interning of repeated field values
+Categorical dictionaries for the low-cardinality fields of extraction data
+
+City ("Tampa"), state ("FL"), property_type, subdivision, neighborhood,
+zoning, heating_type, transaction_type, photo classification_type, ...
+repeat across every record, but each JSON parse creates a fresh string for
+every occurrence. Interning maps each value to one canonical instance per
+process, so records loaded from the store, the snapshot or extraction files
+share their strings, and equality checks on them short-circuit on identity.
+
+Each field has its own bounded CategoricalDictionary of canonical values.
+Entries are interned as they are parsed by serializer.loads_entry, which the
+store, the snapshot and the NDJSON reader all go through.
+"""
+
+import sys
+import threading
+from typing import Dict, Any
+
+# A field with more distinct values than this is not categorical; further
+# values are passed through instead of growing the dictionary without bound
+MAX_CATEGORIES = 65536
+
+# Categorical fields per PropertyDetails section
+SECTION_FIELDS = {
+    "identification": (
+        "city", "state", "postal_code", "property_type", "property_use", "landUse",
+        "propertyClass", "zoning", "basement_type", "foundation_type", "roof_type",
+        "roof_construction_type", "parking_type", "porch_type", "air_conditioning_type",
+        "heating_type", "heating_fuel_type", "water_type", "sewer_type"
+    ),
+    "location": ("county_fips", "subdivision", "neighborhood", "flood_zone"),
+    "price_history": ("property_market_status",),
+    "meta_data": ("data_source", "api_version")
+}
+HISTORY_FIELDS = ("transaction_type", "event", "source")
+
+
+class CategoricalDictionary:
+    """Canonical instances of one categorical field's values"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._values: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: Any) -> Any:
+        """Canonical instance of a string value (other values pass through)"""
+        if not isinstance(value, str):
+            return value
+        canonical = self._values.get(value)
+        if canonical is None:
+            with self._lock:
+                canonical = self._values.get(value)
+                if canonical is None:
+                    if len(self._values) >= MAX_CATEGORIES:
+                        return value
+                    canonical = sys.intern(value)
+                    self._values[canonical] = canonical
+        return canonical
+
+
+_dictionaries: Dict[str, CategoricalDictionary] = {}
+_registry_lock = threading.Lock()
+
+
+def categorical(field: str) -> CategoricalDictionary:
+    """The process-wide dictionary of a field"""
+    dictionary = _dictionaries.get(field)
+    if dictionary is None:
+        with _registry_lock:
+            dictionary = _dictionaries.setdefault(field, CategoricalDictionary(field))
+    return dictionary
+
+
+def _intern_fields(section: Any, fields) -> None:
+    if not isinstance(section, dict):
+        return
+    for field in fields:
+        value = section.get(field)
+        if isinstance(value, str):
+            section[field] = categorical(field).intern(value)
+
+
+def intern_property_details(document: Any) -> Any:
+    """Intern the categorical values of a {"PropertyDetails": {...}} document in place"""
+    details = document.get("PropertyDetails") if isinstance(document, dict) else None
+    if not isinstance(details, dict):
+        return document
+
+    for section, fields in SECTION_FIELDS.items():
+        _intern_fields(details.get(section), fields)
+
+    price_history = details.get("price_history")
+    if isinstance(price_history, dict):
+        for history in ("sale_history", "mls_history"):
+            for entry in price_history.get(history) or ():
+                _intern_fields(entry, HISTORY_FIELDS)
+
+    for photo in details.get("photos") or ():
+        if isinstance(photo, dict):
+            for source in photo.get("sources") or ():
+                _intern_fields(source, ("classification_type",))
+    return document
+
+
+def intern_extraction_entry(prop: Dict[str, Any]) -> Dict[str, Any]:
+    """Intern the categorical values of an extraction property entry in place"""
+    _intern_fields(prop.get("search_result"), ("property_type",))
+    intern_property_details(prop.get("zillow_extraction"))
+    intern_property_details(prop.get("reapi_extraction"))
+    return prop
+
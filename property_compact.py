@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Property Compact Output v6.2 - Schema-aware payload deduplication
+Opt-in "compact" search results: shared defaults lifted out, repeated values omitted
+
+Every v6.2 record built by PropertySearchV62Final carries the same constant
+blocks (environmental_factors, ~30 null ai_fields, data_source, api_version,
+...). In compact mode the per-source default record (the converter's output
+for an empty property) is sent once in a top-level "defaults" section and
+each record only carries the values that differ from it. Nulls that match the
+defaults are therefore omitted.
+
+Expansion is a deep merge of each record over its source's defaults: objects
+merge key by key, every other value (lists included) replaces the default.
+index.html implements the same expander (expandCompactResults).
+"""
+
+import copy
+from typing import Dict, Any, Callable
+
+COMPACT_FORMAT = "compact-v1"
+
+_SAME = object()
+
+
+def build_defaults(convert: Callable[[Dict], Dict]) -> Dict[str, Any]:
+    """Default v6.2 record for a converter: its output for an empty property"""
+    return convert({})
+
+
+def _diff(value: Any, default: Any) -> Any:
+    """Part of value that differs from default, or _SAME"""
+    if isinstance(value, dict) and isinstance(default, dict):
+        out = {}
+        for key, item in value.items():
+            if key not in default:
+                out[key] = item
+                continue
+            item_diff = _diff(item, default[key])
+            if item_diff is not _SAME:
+                out[key] = item_diff
+        return out if out else _SAME
+    return _SAME if value == default else value
+
+
+def compact_record(record: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a v6.2 record to the values that differ from defaults
+
+    meta_data.fetch_timestamp is always dropped: the response stamps it once,
+    in the defaults section.
+    """
+    details = record.get("PropertyDetails", {})
+    meta_data = details.get("meta_data")
+    if isinstance(meta_data, dict) and "fetch_timestamp" in meta_data:
+        meta_data = dict(meta_data)
+        del meta_data["fetch_timestamp"]
+        record = {"PropertyDetails": dict(details, meta_data=meta_data)}
+
+    diff = _diff(record, defaults)
+    return {} if diff is _SAME else diff
+
+
+def expand_record(compact: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild a full v6.2 record from its compact form"""
+    if isinstance(compact, dict) and isinstance(defaults, dict):
+        merged = {key: copy.deepcopy(value) for key, value in defaults.items()}
+        for key, value in compact.items():
+            merged[key] = expand_record(value, defaults[key]) if key in defaults else value
+        return merged
+    return compact
+
+
+def stamped_defaults(defaults: Dict[str, Any], fetch_timestamp: str) -> Dict[str, Any]:
+    """Copy of a defaults record carrying the response's fetch_timestamp"""
+    details = dict(defaults["PropertyDetails"])
+    details["meta_data"] = dict(details.get("meta_data") or {}, fetch_timestamp=fetch_timestamp)
+    return {"PropertyDetails": details}
+
+
+def expand_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand a compact search result back to the regular v6.2 result"""
+    if result.get("format") != COMPACT_FORMAT:
+        return result
+
+    expanded = {key: value for key, value in result.items() if key not in ("format", "defaults")}
+    defaults = result["defaults"]
+    expanded["zillow_properties"] = [expand_record(r, defaults["zillow"]) for r in result["zillow_properties"]]
+    expanded["reapi_properties"] = [expand_record(r, defaults["reapi"]) for r in result["reapi_properties"]]
+    return expanded
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Property Discrepancies v6.2 - Zillow vs REAPI field comparison
+Fills the v6.2 discrepancy_logs slot with tolerance-checked differences
+
+Every property entry holds a Zillow and a REAPI view of the same house. The
+comparison runs column-wise over a batch of entries: each compared field is
+extracted once per batch into a Zillow column and a REAPI column, and each
+rule walks its pair of columns. Only values both sides have are compared.
+
+A log entry is written when two values differ by more than the rule's
+tolerance; differences beyond the rule's "major" threshold are flagged as
+such. "difference" is REAPI minus Zillow (meters apart for location). A
+property with both views gets a (possibly empty) list, one missing a view
+keeps discrepancy_logs null.
+"""
+
+from typing import Dict, List, Any, Callable, Iterable, NamedTuple, Optional
+
+from property_matching import point_distance_m
+
+
+class DiscrepancyRule(NamedTuple):
+    field: str
+    value: Callable[[Dict[str, Any]], Any]  # PropertyDetails -> compared value
+    tolerance: float   # differences up to this are not logged
+    major: float       # differences beyond this are "major"
+    relative: bool     # tolerance/major are fractions of the larger value
+
+
+def _field(section: str, name: str) -> Callable[[Dict[str, Any]], Any]:
+    def value(details: Dict[str, Any]) -> Any:
+        return (details.get(section) or {}).get(name)
+    return value
+
+
+def _bathrooms(details: Dict[str, Any]) -> Optional[float]:
+    """Total bathrooms, a half bath counting 0.5"""
+    identification = details.get("identification") or {}
+    full = identification.get("bathrooms_full")
+    if full is None:
+        return None
+    return full + 0.5 * (identification.get("bathrooms_half") or 0)
+
+
+def _point(details: Dict[str, Any]) -> Optional[tuple]:
+    location = details.get("location") or {}
+    lat, lon = location.get("lat"), location.get("lon")
+    return None if lat is None or lon is None else (lat, lon)
+
+
+DISCREPANCY_RULES = (
+    DiscrepancyRule("living_sqft", _field("identification", "living_sqft"), 0.02, 0.10, True),
+    DiscrepancyRule("bedrooms", _field("identification", "bedrooms"), 0, 1, False),
+    DiscrepancyRule("bathrooms", _bathrooms, 0, 1, False),
+    DiscrepancyRule("year_built", _field("identification", "year_built"), 1, 5, False),
+    DiscrepancyRule("lot_sqft", _field("identification", "lot_sqft"), 0.05, 0.25, True),
+    DiscrepancyRule("list_price", _field("price_history", "list_price"), 0.01, 0.10, True),
+    DiscrepancyRule("last_sale_price", _field("price_history", "last_sale_price"), 0.01, 0.10, True),
+    # Distance in meters
+    DiscrepancyRule("location", _point, 30, 150, False)
+)
+
+
+def _number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compare_column(rule: DiscrepancyRule, zillow_column: List[Any], reapi_column: List[Any],
+                    logs: List[Optional[List[Dict[str, Any]]]]):
+    """Append rule's log entries for every row of a pair of columns"""
+    is_location = rule.field == "location"
+    for row, (zillow_value, reapi_value) in enumerate(zip(zillow_column, reapi_column)):
+        if logs[row] is None or zillow_value is None or reapi_value is None:
+            continue
+
+        if is_location:
+            difference = point_distance_m(*zillow_value, *reapi_value)
+            magnitude = difference
+        elif _number(zillow_value) and _number(reapi_value):
+            difference = reapi_value - zillow_value
+            magnitude = abs(difference)
+            if rule.relative:
+                largest = max(abs(zillow_value), abs(reapi_value))
+                magnitude = magnitude / largest if largest else 0.0
+        else:
+            continue
+
+        if magnitude <= rule.tolerance:
+            continue
+        logs[row].append({
+            "field": rule.field,
+            "zillow_value": list(zillow_value) if is_location else zillow_value,
+            "reapi_value": list(reapi_value) if is_location else reapi_value,
+            "difference": round(difference, 1) if is_location else difference,
+            "relative_difference": round(magnitude, 4) if rule.relative else None,
+            "severity": "major" if magnitude > rule.major else "minor"
+        })
+
+
+def _details(prop: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+    return ((prop.get(f"{source}_extraction") or {}).get("PropertyDetails")) or None
+
+
+def compare_batch(properties: Iterable[Dict[str, Any]],
+                  rules: Iterable[DiscrepancyRule] = DISCREPANCY_RULES) -> List[Optional[List[Dict[str, Any]]]]:
+    """
+    Discrepancy logs of a batch of extraction property entries
+
+    Returns:
+        One entry per property, in order: its list of log entries, or None
+        when it lacks the Zillow or the REAPI view
+    """
+    zillow_rows = []
+    reapi_rows = []
+    for prop in properties:
+        zillow_rows.append(_details(prop, "zillow"))
+        reapi_rows.append(_details(prop, "reapi"))
+
+    logs = [[] if z is not None and r is not None else None for z, r in zip(zillow_rows, reapi_rows)]
+    for rule in rules:
+        value = rule.value
+        zillow_column = [value(d) if d is not None else None for d in zillow_rows]
+        reapi_column = [value(d) if d is not None else None for d in reapi_rows]
+        _compare_column(rule, zillow_column, reapi_column, logs)
+    return logs
+
+
+def compare_property(prop: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Discrepancy logs of one property entry"""
+    return compare_batch([prop])[0]
@@ -12,11 +12,30 @@ Date: May 2025
 """
 
 import json
-import requests
 import time
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+from upstream_resilience import upstream
+
+REAPI_KEY_PLACEHOLDER = "your_reapi_key_here"
+
+def reapi_property(reapi_data: Any) -> Optional[Dict[str, Any]]:
+    """The property object of a REAPI response ({"data": {"property": {...}}}), None if it has another shape"""
+    data = reapi_data.get("data") if isinstance(reapi_data, dict) else None
+    property_info = data.get("property") if isinstance(data, dict) else None
+    return property_info if isinstance(property_info, dict) and property_info else None
+
+def _section(parent: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """parent[key] if it is an object; {} when the key is missing, null or of another type"""
+    value = parent.get(key)
+    return value if isinstance(value, dict) else {}
+
+def _items(parent: Dict[str, Any], key: str) -> List[Any]:
+    """parent[key] if it is a list; [] when the key is missing, null or of another type"""
+    value = parent.get(key)
+    return value if isinstance(value, list) else []
+
 class PropertyMapperV60:
     """REAPI Property Mapper for PropertyDetails v6.0 Schema - Client Approved Structure"""
     
@@ -24,7 +43,7 @@ class PropertyMapperV60:
         """Initialize the property mapper with client-approved mappings"""
         
         # REAPI API configuration
-        self.reapi_key = "your_reapi_key_here"  # Replace with actual key
+        self.reapi_key = REAPI_KEY_PLACEHOLDER  # Replace with actual key
         self.reapi_base_url = "https://api.realestateapi.com/v2"
         
         # Property type mapping (client approved)
@@ -85,6 +104,10 @@ class PropertyMapperV60:
         
         print("✅ REAPI Property Mapper v6.0 initialized - Client Approved Structure")
     
+    def is_live(self) -> bool:
+        """Whether fetch_reapi_data calls REAPI (a key is configured) rather than returning the sample"""
+        return self.reapi_key != REAPI_KEY_PLACEHOLDER
+    
     def fetch_reapi_data(self, address: str) -> Optional[Dict[str, Any]]:
         """
         Fetch property data from REAPI
@@ -98,8 +121,21 @@ class PropertyMapperV60:
         print(f"🔍 Fetching REAPI data for: {address}")
         
         try:
-            # This would be the actual REAPI call
-            # For now, return sample structure that matches client expectations
+            if self.is_live():
+                response = upstream.post(f"{self.reapi_base_url}/PropertyDetail",
+                                         headers={"x-api-key": self.reapi_key}, json={"address": address})
+                if response.status_code != 200:
+                    print(f"❌ REAPI request failed with status {response.status_code}")
+                    return None
+                reapi_data = response.json()
+                # Only a response carrying a property object may replace stored data
+                if reapi_property(reapi_data) is None:
+                    print("❌ REAPI response has no data.property object")
+                    return None
+                print("✅ REAPI data fetched successfully")
+                return reapi_data
+            
+            # Without a key, return sample structure that matches client expectations
             sample_data = {
                 "data": {
                     "property": {
@@ -213,15 +249,16 @@ class PropertyMapperV60:
             reapi_data: Raw REAPI response data
             
         Returns:
-            PropertyDetails in client-approved v6.0 format
+            PropertyDetails in client-approved v6.0 format, or {} if the
+            response has no data.property object
         """
-        if not reapi_data or "data" not in reapi_data:
+        property_info = reapi_property(reapi_data)
+        if property_info is None:
             return {}
         
-        data = reapi_data["data"]
-        property_info = data.get("property", {})
-        address_info = property_info.get("address", {})
-        building_info = property_info.get("building", {})
+        # Any nested section may be missing or null in a live response
+        address_info = _section(property_info, "address")
+        building_info = _section(property_info, "building")
         
         # Extract address components
         street = address_info.get("line", "")
@@ -235,13 +272,14 @@ class PropertyMapperV60:
         property_type = self.property_type_mapping.get(property_type_raw, "SFR")
         
         # Extract building details
-        size_info = building_info.get("size", {})
-        rooms_info = building_info.get("rooms", {})
-        construction_info = building_info.get("construction", {})
-        parking_info = building_info.get("parking", {})
+        size_info = _section(building_info, "size")
+        rooms_info = _section(building_info, "rooms")
+        construction_info = _section(building_info, "construction")
+        parking_info = _section(building_info, "parking")
+        lot_size = _section(property_info, "lot_size").get("size")
         
         # Extract features
-        features = building_info.get("other_features", [])
+        features = _items(building_info, "other_features")
         
         # Build identification section (client approved structure)
         identification = {
@@ -261,8 +299,8 @@ class PropertyMapperV60:
             "year_built": building_info.get("year_built"),
             "living_sqft": size_info.get("living_area"),
             "building_sqft": size_info.get("gross_area"),
-            "lot_sqft": property_info.get("lot_size", {}).get("size"),
-            "lot_acres": self.convert_sqft_to_acres(property_info.get("lot_size", {}).get("size")),
+            "lot_sqft": lot_size,
+            "lot_acres": self.convert_sqft_to_acres(lot_size),
             "floor_count": building_info.get("stories"),
             "bedrooms": rooms_info.get("beds"),
             "bathrooms_full": rooms_info.get("baths"),
@@ -298,12 +336,12 @@ class PropertyMapperV60:
             "water_type": building_info.get("water_source", "Public"),
             "sewer_type": building_info.get("sewer", "Public"),
             "hoa": "hoa" in features,
-            "hoa_fee_annual": property_info.get("hoa", {}).get("fee_annual")
+            "hoa_fee_annual": _section(property_info, "hoa").get("fee_annual")
         }
         
         # Build location section (client approved structure)
-        coordinate = address_info.get("coordinate", {})
-        census_info = property_info.get("census", {})
+        coordinate = _section(address_info, "coordinate")
+        census_info = _section(property_info, "census")
         
         location = {
             "lat": coordinate.get("lat"),
@@ -311,14 +349,14 @@ class PropertyMapperV60:
             "census_block": census_info.get("block"),
             "census_block_group": census_info.get("block_group"),
             "census_tract": census_info.get("tract"),
-            "subdivision": property_info.get("community", {}).get("name"),
+            "subdivision": _section(property_info, "community").get("name"),
             "neighborhood": property_info.get("neighborhood"),
-            "flood_zone": property_info.get("flood", {}).get("zone")
+            "flood_zone": _section(property_info, "flood").get("zone")
         }
         
         # Build price history section (client approved structure)
-        market_info = property_info.get("market", {})
-        sale_history = property_info.get("sale_history", [])
+        market_info = _section(property_info, "market")
+        sale_history = _items(property_info, "sale_history")
         
         price_history = {
             "property_market_status": market_info.get("status", "OffMarket"),
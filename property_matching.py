@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Property Matching v6.2 - Cross-source entity resolution
+Pairs Zillow (ZPID) records with REAPI (APN) records that describe the same house
+
+Comparing every Zillow record with every REAPI record is N×M. Instead each
+REAPI record is filed under
+- a blocking key: 5-digit ZIP + street number + normalized street name
+  (address_normalizer.py)
+- a spatial grid cell of about 100 m
+and a Zillow record is scored against the records in its own block, falling
+back to the 3×3 grid cells around it only when the block has no confident
+candidate, which keeps linking near-linear.
+
+Each candidate pair gets a confidence in [0, 1] from the address key, the
+distance between the two points and agreement of living_sqft, bedrooms and
+year_built. Pairs are then assigned one-to-one, best confidence first.
+
+Usage: python property_matching.py [count]
+Runs the resolver over count seeded bulk properties (default 100,000) whose
+Zillow side is perturbed (spelled-out suffixes, casing, GPS jitter, renumbered
+or missing counterparts) and reports match quality and throughput.
+"""
+
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Any, Optional, Iterable, NamedTuple, Tuple
+
+from address_normalizer import STREET_SUFFIXES, parse_address, zip5
+
+# Grid cell size in degrees (~110 m of latitude)
+GRID_DEGREES = 0.001
+METERS_PER_DEGREE_LAT = 111320.0
+
+# Pairs farther apart than this are never linked on location alone
+MAX_DISTANCE_M = 150.0
+
+# Pairs below this confidence are not linked
+MIN_CONFIDENCE = 0.5
+
+# An address-block candidate this confident skips the grid search
+CONFIDENT = 0.9
+
+
+class MatchRecord:
+    """The features of one record used for matching"""
+
+    __slots__ = ("source_id", "key", "lat", "lon", "living_sqft", "bedrooms", "year_built")
+
+    def __init__(self, source_id: Any, key: Optional[str], lat: Optional[float], lon: Optional[float],
+                 living_sqft: Optional[int] = None, bedrooms: Optional[int] = None,
+                 year_built: Optional[int] = None):
+        self.source_id = source_id
+        self.key = key
+        self.lat = lat
+        self.lon = lon
+        self.living_sqft = living_sqft
+        self.bedrooms = bedrooms
+        self.year_built = year_built
+
+    @classmethod
+    def from_details(cls, document: Dict[str, Any], source_id: Any = None) -> Optional["MatchRecord"]:
+        """
+        Features of a {"PropertyDetails": {...}} document (Zillow or REAPI)
+
+        Args:
+            document: The document
+            source_id: Record id; defaults to meta_data.source_property_id
+        """
+        details = (document or {}).get("PropertyDetails")
+        if not details:
+            return None
+        identification = details.get("identification") or {}
+        location = details.get("location") or {}
+        if source_id is None:
+            source_id = (details.get("meta_data") or {}).get("source_property_id")
+        return cls(source_id,
+                   blocking_key(identification.get("postal_code"), identification.get("street")),
+                   location.get("lat"), location.get("lon"),
+                   identification.get("living_sqft"), identification.get("bedrooms"),
+                   identification.get("year_built"))
+
+    def cell(self) -> Optional[Tuple[int, int]]:
+        if self.lat is None or self.lon is None:
+            return None
+        return int(math.floor(self.lat / GRID_DEGREES)), int(math.floor(self.lon / GRID_DEGREES))
+
+
+def blocking_key(postal_code: Optional[str], street: Optional[str]) -> Optional[str]:
+    """ZIP + street number + normalized street name, or None if any part is missing
+
+    "14355 FOWLER AVENUE Apt 2", "33615-1234" -> "33615|14355|fowler ave"
+    """
+    zip_code = zip5(postal_code)
+    parsed = parse_address(street) if street else None
+    if zip_code is None or parsed is None or not parsed.number or not parsed.street_name:
+        return None
+    return f"{zip_code}|{parsed.number.lower()}|{parsed.street_name.lower()}"
+
+
+def point_distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Approximate distance in meters between two points (equirectangular; exact enough below a few km)"""
+    dy = (lat1 - lat2) * METERS_PER_DEGREE_LAT
+    dx = (lon1 - lon2) * METERS_PER_DEGREE_LAT * math.cos(math.radians(lat1))
+    return math.hypot(dx, dy)
+
+
+def distance_m(a: MatchRecord, b: MatchRecord) -> Optional[float]:
+    """Distance in meters between two records, None if either has no point"""
+    if a.lat is None or a.lon is None or b.lat is None or b.lon is None:
+        return None
+    return point_distance_m(a.lat, a.lon, b.lat, b.lon)
+
+
+class Match(NamedTuple):
+    zillow_id: Any
+    reapi_id: Any
+    confidence: float
+    method: str
+    distance_m: Optional[float]
+
+
+def score(zillow: MatchRecord, reapi: MatchRecord) -> Tuple[float, str, Optional[float]]:
+    """
+    Confidence that two records describe the same house
+
+    Returns:
+        (confidence, method, distance in meters); method is "address" when the
+        blocking keys agree, "location" when only the points do
+    """
+    distance = distance_m(zillow, reapi)
+    same_key = zillow.key is not None and zillow.key == reapi.key
+
+    if same_key:
+        confidence, method = 0.7, "address"
+        if distance is not None:
+            # Close points confirm the address; far ones cast doubt on it
+            confidence += 0.2 if distance <= 25 else 0.2 - 0.4 * min(1.0, distance / (4 * MAX_DISTANCE_M))
+    elif distance is not None and distance <= MAX_DISTANCE_M:
+        confidence, method = 0.55 * (1 - distance / MAX_DISTANCE_M) + 0.2, "location"
+    else:
+        return 0.0, "none", distance
+
+    for field, tolerance in (("living_sqft", 0.05), ("bedrooms", 0), ("year_built", 0)):
+        a, b = getattr(zillow, field), getattr(reapi, field)
+        if a is None or b is None:
+            continue
+        if abs(a - b) <= tolerance * max(abs(a), abs(b)):
+            confidence += 0.1 / 3 if same_key else 0.1
+        else:
+            confidence -= 0.1
+
+    return max(0.0, min(1.0, round(confidence, 4))), method, distance
+
+
+class EntityResolver:
+    """Blocking-key and grid index over REAPI records, for linking whole datasets
+
+    Extraction already pairs each Zillow result with the REAPI lookup of its
+    address, so it only scores that pair (pair_confidence) and drops a REAPI
+    record below MIN_CONFIDENCE instead of merging it; the resolver is for
+    two independently collected datasets, as in the benchmark below.
+    """
+
+    def __init__(self, reapi_records: Iterable[MatchRecord]):
+        self.records: List[MatchRecord] = []
+        self._by_key: Dict[str, List[int]] = defaultdict(list)
+        self._by_cell: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.comparisons = 0
+        for record in reapi_records:
+            self.add(record)
+
+    def add(self, record: MatchRecord):
+        position = len(self.records)
+        self.records.append(record)
+        if record.key is not None:
+            self._by_key[record.key].append(position)
+        cell = record.cell()
+        if cell is not None:
+            self._by_cell[cell].append(position)
+
+    def _block_candidates(self, zillow: MatchRecord) -> List[int]:
+        """Positions of the REAPI records sharing zillow's blocking key"""
+        return self._by_key.get(zillow.key, []) if zillow.key is not None else []
+
+    def _nearby_candidates(self, zillow: MatchRecord) -> List[int]:
+        """Positions of the REAPI records in the 3×3 grid cells around zillow"""
+        cell = zillow.cell()
+        if cell is None:
+            return []
+        row, col = cell
+        positions = []
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                positions.extend(self._by_cell.get((row + d_row, col + d_col), ()))
+        return positions
+
+    def _score_all(self, zillow: MatchRecord, positions: Iterable[int], min_confidence: float, scored: list):
+        for position in positions:
+            self.comparisons += 1
+            confidence, method, distance = score(zillow, self.records[position])
+            if confidence >= min_confidence:
+                scored.append((confidence, position, method, distance))
+
+    def _scored_candidates(self, zillow: MatchRecord, min_confidence: float) -> List[Tuple[float, int, str, Optional[float]]]:
+        """(confidence, position, method, distance) of every candidate above min_confidence
+
+        The grid is only searched when the address block has no confident
+        candidate, so most records cost one or two comparisons however dense
+        the area is.
+        """
+        scored = []
+        block = self._block_candidates(zillow)
+        self._score_all(zillow, block, min_confidence, scored)
+        if not any(s[0] >= CONFIDENT for s in scored):
+            blocked = set(block)
+            self._score_all(zillow, (p for p in self._nearby_candidates(zillow) if p not in blocked),
+                            min_confidence, scored)
+        return scored
+
+    def resolve(self, zillow_records: Iterable[MatchRecord], min_confidence: float = MIN_CONFIDENCE) -> List[Match]:
+        """
+        Link Zillow records to REAPI records one-to-one
+
+        Candidate pairs are accepted best confidence first, so a REAPI record
+        claimed by a stronger pair is not reused by a weaker one.
+        """
+        zillow_list = list(zillow_records)
+        pairs = []
+        for z, zillow in enumerate(zillow_list):
+            for confidence, position, method, distance in self._scored_candidates(zillow, min_confidence):
+                pairs.append((confidence, z, position, method, distance))
+        pairs.sort(key=lambda p: (-p[0], p[1], p[2]))
+
+        matched_zillow, matched_reapi = set(), set()
+        matches = []
+        for confidence, z, position, method, distance in pairs:
+            if z in matched_zillow or position in matched_reapi:
+                continue
+            matched_zillow.add(z)
+            matched_reapi.add(position)
+            matches.append(Match(zillow_list[z].source_id, self.records[position].source_id,
+                                 confidence, method, distance))
+        return matches
+
+
+def pair_confidence(zillow_document: Optional[Dict[str, Any]],
+                    reapi_document: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Score an already paired Zillow/REAPI extraction (as real_property_extractor.py makes)
+
+    Returns:
+        {"confidence", "method", "distance_m"}, or None unless both sides exist
+    """
+    zillow = MatchRecord.from_details(zillow_document)
+    reapi = MatchRecord.from_details(reapi_document)
+    if zillow is None or reapi is None:
+        return None
+    confidence, method, distance = score(zillow, reapi)
+    return {
+        "confidence": confidence,
+        "method": method,
+        "distance_m": None if distance is None else round(distance, 1)
+    }
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+_SPELLED_OUT = {abbreviation: word for word, abbreviation in STREET_SUFFIXES.items() if word != abbreviation}
+
+
+def _benchmark_records(count: int, seed: int = 1) -> Tuple[List[MatchRecord], List[MatchRecord]]:
+    """Zillow and REAPI features of count bulk properties, with the Zillow side perturbed
+
+    - 5% of REAPI records are missing (no true counterpart)
+    - 3% of Zillow records carry a different street number (location-only match)
+    - suffixes are spelled out, casing varies, points jitter by up to ~15 m
+    """
+    from generate_tampa_properties import TampaPropertiesGenerator
+
+    rng = random.Random(seed)
+    zillow_records, reapi_records = [], []
+    generator = TampaPropertiesGenerator(verbose=False)
+    for prop in generator.iter_bulk_properties(count, seed=seed):
+        reapi = MatchRecord.from_details(prop["reapi_extraction"])
+        if rng.random() >= 0.05:
+            reapi_records.append(reapi)
+
+        identification = prop["zillow_extraction"]["PropertyDetails"]["identification"]
+        location = prop["zillow_extraction"]["PropertyDetails"]["location"]
+        number, _, name = identification["street"].partition(" ")
+        words = name.split()
+        words[-1] = _SPELLED_OUT.get(words[-1].lower(), words[-1]).title()
+        if rng.random() < 0.03:
+            number = str(int(number) + rng.choice((-2, 2)))
+        street = f"{number} {' '.join(words)}"
+        if rng.random() < 0.3:
+            street = street.upper()
+        jitter = 15 / METERS_PER_DEGREE_LAT
+        zillow_records.append(MatchRecord(
+            reapi.source_id,  # the true counterpart, checked after resolution
+            blocking_key(identification["postal_code"], street),
+            location["lat"] + rng.uniform(-jitter, jitter), location["lon"] + rng.uniform(-jitter, jitter),
+            identification["living_sqft"], identification["bedrooms"], identification["year_built"]))
+    return zillow_records, reapi_records
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"🔗 PROPERTY MATCHING BENCHMARK ({count:,} properties)")
+    print("=" * 80)
+
+    zillow_records, reapi_records = _benchmark_records(count)
+    print(f"📊 Zillow records: {len(zillow_records):,}   REAPI records: {len(reapi_records):,}")
+
+    started = time.perf_counter()
+    resolver = EntityResolver(reapi_records)
+    indexed = time.perf_counter()
+    matches = resolver.resolve(zillow_records)
+    finished = time.perf_counter()
+
+    correct = sum(1 for m in matches if m.zillow_id == m.reapi_id)
+    linkable = len({r.source_id for r in reapi_records})
+    bands = Counter("high (>=0.9)" if m.confidence >= 0.9 else "medium (0.7-0.9)" if m.confidence >= 0.7
+                    else "low (<0.7)" for m in matches)
+    methods = Counter(m.method for m in matches)
+
+    print(f"\n⏱️ Index: {indexed - started:.2f}s   Resolve: {finished - indexed:.2f}s   "
+          f"({len(zillow_records) / (finished - started):,.0f} Zillow records/s)")
+    print(f"🔍 Comparisons: {resolver.comparisons:,} "
+          f"({resolver.comparisons / max(1, len(zillow_records)):.1f} per record vs "
+          f"{len(zillow_records) * len(reapi_records):,} all-pairs)")
+    print(f"✅ Matches: {len(matches):,}   precision {correct / max(1, len(matches)):.2%}   "
+          f"recall {correct / max(1, linkable):.2%}")
+    print("🎯 Confidence: " + ", ".join(f"{band} {n:,}" for band, n in sorted(bands.items())))
+    print("🧭 Method: " + ", ".join(f"{method} {n:,}" for method, n in sorted(methods.items())))
+
+if __name__ == "__main__":
+    main()
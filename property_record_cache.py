@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Property Record Cache v6.2 - Memoized v6.2 conversions
+LRU cache of converted PropertyDetails v6.2 records keyed by property identity
+Only meta_data.fetch_timestamp is stamped per response
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Default byte budget for cached records (override with PROPERTY_CACHE_MAX_BYTES)
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate resident size in bytes of a JSON-like object tree
+
+    __slots__ records (see property_records) are sized by their set fields.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sys.getsizeof(key) + deep_sizeof(value)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += deep_sizeof(item)
+    elif not isinstance(obj, (str, bytes)) and hasattr(type(obj), "__slots__"):
+        for name in type(obj).__slots__:
+            if hasattr(obj, name):
+                size += deep_sizeof(getattr(obj, name))
+    return size
+
+
+def stamp_fetch_timestamp(record: Dict[str, Any], fetch_timestamp: str) -> Dict[str, Any]:
+    """Return a copy of a cached v6.2 record with a fresh fetch_timestamp
+
+    Only the PropertyDetails and meta_data levels are copied; every other
+    section is shared with the cached record and must be treated as read-only.
+    """
+    details = dict(record["PropertyDetails"])
+    meta_data = dict(details.get("meta_data") or {})
+    meta_data["fetch_timestamp"] = fetch_timestamp
+    details["meta_data"] = meta_data
+    return {"PropertyDetails": details}
+
+
+class V62RecordCache:
+    """Thread-safe LRU cache of v6.2 records bounded by a byte budget"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """Initialize the cache with a byte budget"""
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("PROPERTY_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES))
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (record, size_bytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Return the cached record for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, record: Dict[str, Any]) -> None:
+        """Store a record, evicting least recently used entries over budget"""
+        size = deep_sizeof(record)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            self._entries[key] = (record, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_convert(self, key: Tuple, convert, prop: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the cached record for key, converting and storing it on a miss"""
+        record = self.get(key)
+        if record is None:
+            record = convert(prop)
+            self.put(key, record)
+        return record
+
+    def clear(self) -> None:
+        """Drop every cached record (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit ratio and memory footprint statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
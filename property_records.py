@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Property Records v6.2 - Compact record types for the PropertyDetails schema
+__slots__ classes for the identification, location, ai_fields, price_history,
+photos and meta_data sections of the v6.0 and v6.2 layouts
+
+A plain dict per section costs a hash table per record; a __slots__ record
+stores only a fixed array of values, which matters when hundreds of thousands
+of records are held at once. Each class lists its JSON keys, in output order,
+as its __slots__. A field that was never set is left out of the output, so
+one class covers layouts that differ only by missing keys.
+
+PropertySearchV62Final builds its v6.2 records with these classes and keeps
+them, not dicts, in the record cache; they are serialized once, when a
+response is rendered. The v6.0 layouts are read by from_dict. Run
+benchmark_property_records.py for bytes per record and conversion speed
+against plain dicts.
+"""
+
+import copy
+import operator
+from typing import Dict, Any, Optional, Tuple
+
+import property_serializer as serializer
+
+
+_UNSET = object()
+
+
+def _plain(value: Any) -> Any:
+    """JSON-ready form of a field value"""
+    if isinstance(value, SchemaRecord):
+        return value.to_dict()
+    if isinstance(value, list) and value and isinstance(value[0], SchemaRecord):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _shallow(record: "SchemaRecord") -> Dict[str, Any]:
+    """Set fields of a record, nested records left as they are
+
+    Used as the serializer's default hook: orjson (and json) call it for
+    every record they meet, so nested records never go through to_dict.
+    """
+    try:
+        values = record._field_values(record)
+    except AttributeError:
+        # Some fields were never set
+        out = {}
+        for name in record.__slots__:
+            value = getattr(record, name, _UNSET)
+            if value is not _UNSET:
+                out[name] = value
+        return out
+    if len(record.__slots__) == 1:
+        return {record.__slots__[0]: values}
+    return dict(zip(record.__slots__, values))
+
+
+class SchemaRecord:
+    """Base of the PropertyDetails section records"""
+
+    __slots__ = ()
+
+    # Sections whose fields may hold other records
+    NESTED = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # One C-level call fetches every field of a fully populated record
+        cls._field_values = staticmethod(operator.attrgetter(*cls.__slots__))
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build a record from a section dict (keys outside the schema are dropped)"""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            if name in data:
+                setattr(record, name, data[name])
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Section dict with the set fields in schema order"""
+        out = _shallow(self)
+        if self.NESTED:
+            return {name: _plain(value) for name, value in out.items()}
+        return out
+
+    def to_json(self) -> bytes:
+        """Serialized section (compact JSON bytes)"""
+        return serializer.dumps(self, default=_shallow)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """dict-style field access"""
+        value = getattr(self, name, _UNSET)
+        return default if value is _UNSET else value
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+# ----------------------------------------------------------------------
+# Shared sections
+# ----------------------------------------------------------------------
+
+class MetaData(SchemaRecord):
+    __slots__ = ("data_source", "source_property_id", "fetch_timestamp", "api_version")
+
+
+class PhotoSource(SchemaRecord):
+    __slots__ = ("url", "width", "height", "classification_type")
+
+
+class Photo(SchemaRecord):
+    __slots__ = ("sources",)
+    NESTED = True
+
+
+# ----------------------------------------------------------------------
+# v6.0 REAPI (PropertyMapperV60, generate_tampa_properties)
+# ----------------------------------------------------------------------
+
+class ReapiIdentification(SchemaRecord):
+    __slots__ = (
+        "apn", "address_full", "street", "city", "state", "postal_code", "zoning",
+        "property_type", "property_use", "landUse", "legalDescription", "propertyClass",
+        "interior_materials", "year_built", "living_sqft", "building_sqft", "lot_sqft",
+        "lot_acres", "floor_count", "bedrooms", "bathrooms_full", "bathrooms_half",
+        "basement", "basement_type", "basementFinishedPercent", "basementSquareFeet",
+        "basementSquareFeetFinished", "basementSquareFeetUnfinished", "unit_count",
+        "building_count", "attic", "foundation_type", "roof_type", "roof_construction_type",
+        "parking_type", "parking_spaces", "parking_space_sqft", "pool", "deck", "deck_area",
+        "patio", "patio_area", "porch_type", "porch_area", "rv_parking", "fireplace",
+        "fireplaces", "air_conditioning_type", "heating_type", "heating_fuel_type",
+        "water_type", "sewer_type", "hoa", "hoa_fee_annual"
+    )
+
+
+class ReapiLocation(SchemaRecord):
+    __slots__ = ("lat", "lon", "census_block", "census_block_group", "census_tract",
+                 "subdivision", "neighborhood", "flood_zone")
+
+
+class ReapiPriceHistory(SchemaRecord):
+    __slots__ = ("property_market_status", "list_price", "listed_date", "last_sale_price",
+                 "last_sale_date", "sale_history")
+
+
+# ----------------------------------------------------------------------
+# v6.0 Zillow AS-IS fields (ZillowLiveFetcherV60); identification and
+# location are unchanged in v6.2
+# ----------------------------------------------------------------------
+
+class ZillowIdentification(SchemaRecord):
+    __slots__ = ("address_full", "street", "city", "state", "postal_code", "property_type",
+                 "year_built", "living_sqft", "lot_sqft", "bedrooms", "bathrooms_full",
+                 "bathrooms_half", "heating_type", "exterior_materials", "interior_materials")
+
+
+class ZillowLocation(SchemaRecord):
+    __slots__ = ("lat", "lon", "county_fips", "subdivision", "neighborhood")
+
+
+class ZillowAIFields(SchemaRecord):
+    __slots__ = ("architectural_styles", "finish_quality_score", "condition_score", "road_relations")
+
+
+class ZillowPriceHistory(SchemaRecord):
+    __slots__ = ("property_market_status", "list_price", "last_sale_price", "mls_history", "sale_history")
+
+
+# ----------------------------------------------------------------------
+# v6.2 (PropertySearchV62Final)
+# ----------------------------------------------------------------------
+
+class V62ReapiIdentification(SchemaRecord):
+    __slots__ = (
+        "apn", "street", "city", "state", "postal_code", "address_full", "zoning",
+        "property_type", "property_use", "landUse", "legalDescription", "propertyClass",
+        "exterior_materials", "interior_materials", "year_built", "living_sqft",
+        "building_sqft", "lot_sqft", "lot_acres", "floor_count", "story_count", "bedrooms",
+        "bathrooms_full", "bathrooms_half", "basement", "basement_type",
+        "basementFinishedPercent", "basementSquareFeet", "basementSquareFeetFinished",
+        "basementSquareFeetUnfinished", "unit_count", "building_count", "attic",
+        "foundation_type", "roof_type", "roof_construction_type", "parking_type",
+        "parking_spaces", "parking_space_sqft", "adu_present", "adu_sqft", "pool", "deck",
+        "deck_area", "patio", "patio_area", "porch_type", "porch_area", "rv_parking",
+        "fireplace", "fireplaces", "air_conditioning_type", "heating_type",
+        "heating_fuel_type", "water_type", "sewer_type", "gated_community",
+        "age_restricted", "historic_district", "site_elevation_ft", "schools", "hoa",
+        "hoa_fee_annual"
+    )
+
+
+class V62ReapiLocation(SchemaRecord):
+    __slots__ = ("lat", "lon", "county_fips", "subdivision", "neighborhood", "census_block",
+                 "census_block_group", "census_tract", "school_district", "flood_zone")
+
+
+class V62AIFields(SchemaRecord):
+    __slots__ = (
+        "architectural_styles", "finish_quality_score", "finish_quality_label",
+        "curb_appeal_score", "curb_appeal_label", "condition_score", "condition_label",
+        "property_uniqueness_score", "street_quality_score", "solar_panels", "occupied",
+        "road_relations", "golf_course_relation", "golf_course_distance_ft",
+        "commercial_relation", "commercial_distance_ft", "commercial_relation_type",
+        "railroad_relation", "railroad_distance_ft", "school_relation", "school_distance_ft",
+        "water_relation_type", "water_relation", "water_distance_ft", "split_level",
+        "lot_type", "professional_photos", "staged", "property_notes"
+    )
+
+    def __init__(self, **values):
+        # Every AI field is null until an AI pass fills it in
+        for name in self.__slots__:
+            setattr(self, name, None)
+        super().__init__(**values)
+
+
+class V62PriceHistory(SchemaRecord):
+    __slots__ = ("property_market_status", "list_price", "listed_date", "last_sale_price",
+                 "last_sale_date", "property_strategy_type", "listing_description",
+                 "mls_history", "sale_history")
+
+
+# ----------------------------------------------------------------------
+# Whole records
+# ----------------------------------------------------------------------
+
+class PropertyDetailsRecord(SchemaRecord):
+    """A complete PropertyDetails record; to_dict() returns {"PropertyDetails": {...}}"""
+
+    __slots__ = ("identification", "location", "ai_fields", "price_history", "photos",
+                 "environmental_factors", "discrepancy_logs", "comp_to_subject", "meta_data")
+    NESTED = True
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], layout: Optional[str] = None):
+        """
+        Build a record from a {"PropertyDetails": {...}} document
+
+        Args:
+            data: The document
+            layout: Key of LAYOUTS naming the section classes (e.g. "reapi_v6.0");
+                sections without a class are kept as plain values
+        """
+        sections = data.get("PropertyDetails", data)
+        classes = LAYOUTS.get(layout, {})
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            if name in sections:
+                value = sections[name]
+                section_class = classes.get(name)
+                if section_class is not None and isinstance(value, dict):
+                    value = section_class.from_dict(value)
+                elif name == "photos" and isinstance(value, list):
+                    value = [Photo(sources=[PhotoSource.from_dict(s) for s in p.get("sources", [])])
+                             if isinstance(p, dict) else p for p in value]
+                setattr(record, name, value)
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"PropertyDetails": super().to_dict()}
+
+    def to_json(self) -> bytes:
+        return serializer.dumps({"PropertyDetails": self}, default=_shallow)
+
+    def json_template(self) -> Tuple[bytes, Optional[bytes]]:
+        """Pre-serialized record around its fetch_timestamp (see property_serializer.record_template)"""
+        meta_data = getattr(self, "meta_data", None)
+        if not isinstance(meta_data, MetaData):
+            return self.to_json(), None
+        stamped = copy.copy(self)
+        stamped.meta_data = copy.copy(meta_data)
+        stamped.meta_data.fetch_timestamp = serializer.FETCH_TIMESTAMP_PLACEHOLDER
+        return serializer.split_record(stamped.to_json())
+
+
+# Section classes of each known layout
+LAYOUTS = {
+    "reapi_v6.0": {
+        "identification": ReapiIdentification,
+        "location": ReapiLocation,
+        "price_history": ReapiPriceHistory,
+        "meta_data": MetaData
+    },
+    "zillow_v6.0": {
+        "identification": ZillowIdentification,
+        "location": ZillowLocation,
+        "ai_fields": ZillowAIFields,
+        "price_history": ZillowPriceHistory,
+        "meta_data": MetaData
+    },
+    "reapi_v6.2": {
+        "identification": V62ReapiIdentification,
+        "location": V62ReapiLocation,
+        "ai_fields": V62AIFields,
+        "price_history": V62PriceHistory,
+        "meta_data": MetaData
+    },
+    "zillow_v6.2": {
+        "identification": ZillowIdentification,
+        "location": ZillowLocation,
+        "ai_fields": V62AIFields,
+        "price_history": V62PriceHistory,
+        "meta_data": MetaData
+    }
+}
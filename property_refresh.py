@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Property Refresh v6.2 - Re-fetch only the stale parts of stored properties
+Per-field-group TTLs checked against meta_data timestamps
+
+Each source's PropertyDetails is split into field groups with their own
+time-to-live: market data (price_history: status, list price, MLS/sale
+events) goes stale after REFRESH_MARKET_TTL_HOURS (default 24), structural
+data (identification, location) and photos after REFRESH_STRUCTURE_TTL_DAYS
+(default 30). A group's age is read from meta_data.field_group_timestamps,
+falling back to meta_data.fetch_timestamp for records never refreshed.
+
+Only the upstream endpoints serving a stale group are called. Zillow
+requests are conditional (If-None-Match / If-Modified-Since with the
+validators saved from the last fetch); a 304 just renews the timestamps.
+Fresh data replaces the sections of every group that endpoint serves.
+Updated entries are merged with PropertyStore.ingest_properties, so only
+changed properties are rewritten.
+
+REAPI records are refreshed only when the mapper has a live API key; the
+keyless mapper returns a fixed sample that must not overwrite real data. A
+REAPI or Zillow property response whose identification, location or
+price_history comes back empty is counted as failed and leaves the stored
+record untouched.
+
+Stale records are planned, fetched and ingested REFRESH_BATCH_SIZE (default
+500) at a time, so a refresh of the whole store never holds more than a
+batch or two of entries in memory.
+
+Usage: python property_refresh.py [--dry-run] [--limit N]
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, List, Any, Iterator, NamedTuple, Optional, Tuple
+
+REFRESH_WORKERS = int(os.environ.get("REFRESH_WORKERS", 4))
+REFRESH_BATCH_SIZE = int(os.environ.get("REFRESH_BATCH_SIZE", 500))
+
+
+class FieldGroup(NamedTuple):
+    name: str
+    sections: Tuple[str, ...]   # PropertyDetails sections the group covers
+    ttl: timedelta
+    endpoint: str               # upstream call that returns the group
+
+
+MARKET_TTL = timedelta(hours=float(os.environ.get("REFRESH_MARKET_TTL_HOURS", 24)))
+STRUCTURE_TTL = timedelta(days=float(os.environ.get("REFRESH_STRUCTURE_TTL_DAYS", 30)))
+
+FIELD_GROUPS = {
+    "zillow": (
+        FieldGroup("market", ("price_history",), MARKET_TTL, "property"),
+        FieldGroup("structure", ("identification", "location"), STRUCTURE_TTL, "property"),
+        FieldGroup("photos", ("photos",), STRUCTURE_TTL, "photos")
+    ),
+    "reapi": (
+        FieldGroup("market", ("price_history",), MARKET_TTL, "property"),
+        FieldGroup("structure", ("identification", "location"), STRUCTURE_TTL, "property")
+    )
+}
+
+# Raw Zillow /property fields each converted section is built from; the
+# converter fills in defaults, so emptiness is judged on the raw response
+ZILLOW_SECTION_FIELDS = {
+    "identification": ("address", "propertyDetails"),
+    "location": ("latitude", "longitude"),
+    "price_history": ("price", "priceHistory")
+}
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _details(prop: Dict[str, Any], source: str) -> Dict[str, Any]:
+    extraction = prop.get(f"{source}_extraction") or {}
+    return extraction.get("PropertyDetails") or {}
+
+
+def group_timestamp(details: Dict[str, Any], group: FieldGroup) -> Optional[datetime]:
+    """When a field group was last fetched (None if never recorded)"""
+    meta_data = details.get("meta_data") or {}
+    group_timestamps = meta_data.get("field_group_timestamps") or {}
+    return _timestamp(group_timestamps.get(group.name)) or _timestamp(meta_data.get("fetch_timestamp"))
+
+
+def empty_sections(details: Dict[str, Any], groups: List[FieldGroup]) -> List[str]:
+    """Sections of groups that hold no value at all (missing, empty, or only nulls)"""
+    empty = []
+    for group in groups:
+        for section in group.sections:
+            value = details.get(section)
+            if isinstance(value, dict):
+                value = [v for v in value.values() if v not in (None, "", [], {})]
+            if not value:
+                empty.append(section)
+    return empty
+
+
+def empty_zillow_sections(raw_property: Any, groups: List[FieldGroup]) -> List[str]:
+    """Sections of groups a raw Zillow /property response has no value for (see ZILLOW_SECTION_FIELDS)"""
+    if not isinstance(raw_property, dict):
+        raw_property = {}
+    raw_sections = {section: {field: raw_property.get(field) for field in fields}
+                    for section, fields in ZILLOW_SECTION_FIELDS.items()}
+    return empty_sections(raw_sections, groups)
+
+
+def stale_groups(details: Dict[str, Any], source: str, now: datetime) -> List[FieldGroup]:
+    """The field groups of one source view that are older than their TTL"""
+    if not details:
+        return []
+    stale = []
+    for group in FIELD_GROUPS[source]:
+        fetched = group_timestamp(details, group)
+        if fetched is None or now - fetched > group.ttl:
+            stale.append(group)
+    return stale
+
+
+class PropertyRefresher:
+    """Refresh the stale field groups of a property store's records"""
+
+    def __init__(self, store, zillow_fetcher=None, reapi_mapper=None):
+        """
+        Initialize the refresher
+
+        Args:
+            store: PropertyStore to read and update
+            zillow_fetcher: ZillowLiveFetcherV60 (created if not given)
+            reapi_mapper: PropertyMapperV60 (created if not given)
+        """
+        if zillow_fetcher is None:
+            from zillow_live_fetcher_v6_0 import ZillowLiveFetcherV60
+            zillow_fetcher = ZillowLiveFetcherV60()
+        if reapi_mapper is None:
+            from property_mapper_v6_0 import PropertyMapperV60
+            reapi_mapper = PropertyMapperV60()
+        self.store = store
+        self.zillow_fetcher = zillow_fetcher
+        self.reapi_mapper = reapi_mapper
+        self.counts = {"checked": 0, "stale": 0, "requests": 0, "not_modified": 0,
+                       "refreshed": 0, "failed": 0, "skipped": 0}
+        self._lock = threading.Lock()
+
+    def plan(self, now: datetime, limit: Optional[int] = None) -> Iterator[tuple]:
+        """Stored entries with stale groups, as they are read: (entry, {source: stale groups})
+
+        The scan reads one consistent dataset version, however long it is
+        consumed for.
+        """
+        with self.store.read_snapshot():
+            for prop in self.store.search():
+                self.counts["checked"] += 1
+                stale = {}
+                for source in FIELD_GROUPS:
+                    groups = stale_groups(_details(prop, source), source, now)
+                    if groups:
+                        stale[source] = groups
+                if stale:
+                    self.counts["stale"] += 1
+                    yield prop, stale
+                    if limit is not None and self.counts["stale"] >= limit:
+                        break
+
+    def refresh(self, dry_run: bool = False, limit: Optional[int] = None,
+                now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Refresh every stale record
+
+        Args:
+            dry_run: Only report what is stale
+            limit: Refresh at most this many records
+            now: Reference time (default: now)
+
+        Returns:
+            Counters: checked, stale, requests, not_modified, refreshed, failed, skipped
+        """
+        now = now or datetime.now()
+        planned = self.plan(now, limit)
+        if dry_run:
+            for prop, stale in planned:
+                groups = ", ".join(f"{source}:{g.name}" for source, groups in stale.items() for g in groups)
+                print(f"⏰ {prop.get('property_index')}: {groups}")
+            return dict(self.counts)
+
+        # The plan's read transaction lives on this thread's connection, so
+        # batches are ingested from a writer thread with its own connection;
+        # one batch is fetched while the previous one is written
+        ingested = None
+        with ThreadPoolExecutor(max_workers=max(1, REFRESH_WORKERS)) as pool, \
+                ThreadPoolExecutor(max_workers=1) as writer:
+            while True:
+                batch = list(islice(planned, max(1, REFRESH_BATCH_SIZE)))
+                if not batch:
+                    break
+                updated = [entry for entry in pool.map(lambda item: self.refresh_property(*item, now), batch)
+                           if entry is not None]
+                if ingested is not None:
+                    ingested.result()
+                if updated:
+                    ingested = writer.submit(self._ingest, updated)
+            if ingested is not None:
+                ingested.result()
+        return dict(self.counts)
+
+    def _ingest(self, updated: List[Dict[str, Any]]):
+        """Merge one batch of refreshed entries into the store"""
+        try:
+            counts = self.store.ingest_properties(updated, "refresh")
+        finally:
+            self.store.close()
+        print(f"✅ Refreshed {len(updated)} records: {counts['updated']} changed, "
+              f"{counts['unchanged']} unchanged")
+
+    def refresh_property(self, prop: Dict[str, Any], stale: Dict[str, List[FieldGroup]],
+                         now: datetime) -> Optional[Dict[str, Any]]:
+        """Re-fetch the stale groups of one entry; the updated entry, or None if nothing was fetched"""
+        updated = dict(prop)
+        fetched = False
+        for source, groups in stale.items():
+            details = _details(prop, source)
+            refresh = self._refresh_zillow if source == "zillow" else self._refresh_reapi
+            new_details = refresh(details, groups, now)
+            if new_details is not None:
+                updated[f"{source}_extraction"] = dict(prop[f"{source}_extraction"], PropertyDetails=new_details)
+                fetched = True
+        if fetched:
+            self._count("refreshed")
+        return updated if fetched else None
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counts[counter] += 1
+
+    def _apply(self, source: str, details: Dict[str, Any], fresh: Optional[Dict[str, Any]],
+               groups: List[FieldGroup], now: datetime,
+               validators: Optional[Tuple[str, Dict[str, str]]] = None) -> Dict[str, Any]:
+        """details with the sections of groups taken from fresh (if any) and their timestamps renewed"""
+        details = dict(details)
+        meta_data = dict(details.get("meta_data") or {})
+        group_timestamps = dict(meta_data.get("field_group_timestamps") or {})
+        # Groups not fetched now keep the age they had before fetch_timestamp moves
+        for group in FIELD_GROUPS[source]:
+            if group.name not in group_timestamps and meta_data.get("fetch_timestamp"):
+                group_timestamps[group.name] = meta_data["fetch_timestamp"]
+        for group in groups:
+            if fresh is not None:
+                for section in group.sections:
+                    details[section] = fresh.get(section)
+            group_timestamps[group.name] = now.isoformat()
+        meta_data["field_group_timestamps"] = group_timestamps
+        meta_data["fetch_timestamp"] = now.isoformat()
+        if validators is not None:
+            meta_data["validators"] = dict(meta_data.get("validators") or {}, **{validators[0]: validators[1]})
+        details["meta_data"] = meta_data
+        return details
+
+    def _refresh_zillow(self, details: Dict[str, Any], stale: List[FieldGroup],
+                        now: datetime) -> Optional[Dict[str, Any]]:
+        zpid = (details.get("meta_data") or {}).get("source_property_id")
+        if not zpid:
+            self._count("skipped")
+            return None
+
+        result = None
+        saved_validators = (details.get("meta_data") or {}).get("validators") or {}
+        for endpoint in dict.fromkeys(group.endpoint for group in stale):
+            # Everything this endpoint returns is renewed, stale or not
+            groups = [group for group in FIELD_GROUPS["zillow"] if group.endpoint == endpoint]
+            self._count("requests")
+            status, data, validators = self.zillow_fetcher.fetch_if_modified(
+                endpoint, zpid, saved_validators.get(endpoint))
+            if status == 304:
+                self._count("not_modified")
+                fresh = None
+            elif status == 200:
+                # Same shape extract_real_zillow_data gives the converter
+                raw = data if endpoint == "property" else {"property": {}, "photos": data}
+                converted = self.zillow_fetcher.convert_to_client_approved_structure(raw, zpid)
+                if converted is None:
+                    self._count("failed")
+                    continue
+                # A response without real sections must not blank out the stored
+                # ones (an empty photo list is a valid answer)
+                empty = empty_zillow_sections(raw.get("property"), groups) if endpoint == "property" else []
+                if empty:
+                    print(f"⚠️ Zillow refresh of ZPID {zpid} returned empty {', '.join(empty)}; keeping stored data")
+                    self._count("failed")
+                    continue
+                fresh = converted["PropertyDetails"]
+            else:
+                self._count("failed")
+                continue
+            result = self._apply("zillow", result or details, fresh, groups, now, (endpoint, validators))
+        return result
+
+    def _refresh_reapi(self, details: Dict[str, Any], stale: List[FieldGroup],
+                       now: datetime) -> Optional[Dict[str, Any]]:
+        address = (details.get("identification") or {}).get("address_full")
+        if not address or not self.reapi_mapper.is_live():
+            self._count("skipped")
+            return None
+
+        # REAPI has no conditional requests: one call returns every group
+        self._count("requests")
+        data = self.reapi_mapper.fetch_reapi_data(address)
+        converted = self.reapi_mapper.map_to_client_approved_structure(data) if data else None
+        if not converted:
+            self._count("failed")
+            return None
+        groups = list(FIELD_GROUPS["reapi"])
+        # A response without real sections must not blank out the stored ones
+        empty = empty_sections(converted["PropertyDetails"], groups)
+        if empty:
+            print(f"⚠️ REAPI refresh of {address} returned empty {', '.join(empty)}; keeping stored data")
+            self._count("failed")
+            return None
+        return self._apply("reapi", details, converted["PropertyDetails"], groups, now)
+
+
+def main():
+    args = sys.argv[1:]
+    dry_run = "--dry-run" in args
+    limit = int(args[args.index("--limit") + 1]) if "--limit" in args else None
+
+    from property_store import open_store
+
+    refresher = PropertyRefresher(open_store())
+    counts = refresher.refresh(dry_run=dry_run, limit=limit)
+    print(f"🔄 Checked {counts['checked']} records, {counts['stale']} stale; "
+          f"{counts['requests']} requests ({counts['not_modified']} not modified), "
+          f"{counts['refreshed']} refreshed, {counts['failed']} failed, {counts['skipped']} skipped")
+
+if __name__ == "__main__":
+    main()
@@ -2,306 +2,620 @@
 """
 Property Search Engine v6.2 - FINAL REAL DATA SOLUTION
 Input: Subject address -> Output: 2 arrays (Zillow + REAPI) with REAL properties
-Uses existing real Tampa properties data
+Uses existing real Tampa properties data from the SQLite property store
 """
 
-import json
+import heapq
+import math
 import sys
+from contextlib import closing
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+
+import property_serializer as serializer
+from property_compact import COMPACT_FORMAT, build_defaults, compact_record, stamped_defaults
+from property_discrepancies import compare_batch
+from property_record_cache import V62RecordCache, stamp_fetch_timestamp
+from property_records import (PropertyDetailsRecord, MetaData, Photo, PhotoSource, ZillowIdentification,
+                              ZillowLocation, V62ReapiIdentification, V62ReapiLocation, V62AIFields,
+                              V62PriceHistory)
+from property_store import PropertyStore, DEFAULT_DATA_FILE, DEFAULT_STORE_PATH, property_columns
+from property_snapshot import DEFAULT_SNAPSHOT_PATH, current_property_source, open_property_source
+from property_valuation import ValuationFacts, valuation_facts, value_subject
+
+# Converted v6.2 records are shared by every engine instance in the process
+_shared_record_cache = V62RecordCache()
+
+# Properties compared per batch by the discrepancy stage (covers a default 25-property search)
+DISCREPANCY_BATCH_SIZE = 64
+
+# Comps of a valuation: the closest stored properties around the subject
+VALUATION_COMPS = 10
+VALUATION_RADIUS_MILES = 2.0
+
+# Placeholder environmental factors of every v6.2 record (copied into each record)
+V62_ENVIRONMENTAL_FACTORS = {
+    "flood": {"severity": "Low", "trend": "Stable"},
+    "wildfire": {"severity": "Low", "trend": "Stable"},
+    "heat": {"severity": "Medium", "trend": "Increasing"},
+    "wind": {"severity": "Medium", "trend": "Stable"},
+    "air": {"severity": "Low", "trend": "Stable"}
+}
+
+def v62_environmental_factors() -> Dict[str, Dict[str, str]]:
+    """A record's own copy of the placeholder environmental factors"""
+    return {hazard: dict(levels) for hazard, levels in V62_ENVIRONMENTAL_FACTORS.items()}
 
 class PropertySearchV62Final:
-    def __init__(self):
-        self.real_data_file = "TAMPA_PROPERTIES_EXTRACTION_20250528_182304.json"
+    def __init__(self, record_cache: Optional[V62RecordCache] = None, store: Optional[PropertyStore] = None):
+        self.real_data_file = DEFAULT_DATA_FILE
+        self.db_path = DEFAULT_STORE_PATH
+        self.snapshot_path = DEFAULT_SNAPSHOT_PATH
+        self.record_cache = record_cache if record_cache is not None else _shared_record_cache
+        self.store = store
+        # Only a source the engine opened itself is re-checked (and replaced) per search
+        self._opened_store = False
+        self.dataset_version = None
+        self._compact_defaults = None
         
-    def get_real_properties(self, subject_address: str, max_properties: int = 25) -> Dict[str, Any]:
-        """Get real properties from existing Tampa data"""
-        print(f"🔍 Loading real properties for: {subject_address}")
+    def get_real_properties(self, subject_address: str, max_properties: int = 25,
+                            filters: Optional[Dict[str, Any]] = None, compact: bool = False,
+                            deadline=None) -> Dict[str, Any]:
+        """Get real properties from the property store
         
-        # Load real Tampa properties data
-        try:
-            with open(self.real_data_file, 'r') as f:
-                data = json.load(f)
-            
-            properties = data.get("properties", [])[:max_properties]
-            print(f"✅ Loaded {len(properties)} real properties from Tampa data")
-            
-        except FileNotFoundError:
-            print(f"❌ Real data file not found: {self.real_data_file}")
+        filters are passed to PropertyStore.search (near, radius_miles,
+        min_price, max_price, min_sqft, max_sqft, property_type, postal_code);
+        with near, the closest properties are returned first.
+        compact=True returns the compact format (see property_compact).
+        deadline (admission_control.Deadline) is checked between properties.
+        """
+        dataset_version, properties = self._open_search(subject_address, max_properties, filters)
+        if properties is None:
             return self._empty_result(subject_address)
         
         # Convert to dual arrays
         zillow_array = []
         reapi_array = []
+        fetch_timestamp = datetime.now().isoformat()
         
-        for i, prop in enumerate(properties, 1):
-            print(f"Processing {i}/{len(properties)}: {prop['search_result']['address']}")
-            
-            # Convert existing data to v6.2 format
-            zillow_v62 = self._convert_zillow_to_v62(prop)
-            reapi_v62 = self._convert_reapi_to_v62(prop)
-            
-            zillow_array.append(zillow_v62)
-            reapi_array.append(reapi_v62)
+        with closing(properties):
+            for i, (prop, discrepancy_logs) in enumerate(self._discrepancy_stage(properties, dataset_version), 1):
+                if deadline is not None:
+                    deadline.check()
+                print(f"Processing {i}: {prop['search_result']['address']}")
+                
+                # Build the v6.2 records (memoized per property and dataset version);
+                # the cache holds the records, each response gets fresh dicts
+                zillow_v62 = self.record_cache.get_or_convert(
+                    self._record_cache_key("Zillow", prop, dataset_version) + ("record",),
+                    lambda p: self._build_zillow_v62(p, discrepancy_logs), prop)
+                reapi_v62 = self.record_cache.get_or_convert(
+                    self._record_cache_key("REAPI", prop, dataset_version) + ("record",),
+                    lambda p: self._build_reapi_v62(p, discrepancy_logs), prop)
+                
+                zillow_array.append(stamp_fetch_timestamp(zillow_v62.to_dict(), fetch_timestamp))
+                reapi_array.append(stamp_fetch_timestamp(reapi_v62.to_dict(), fetch_timestamp))
+        print(f"✅ Loaded {len(zillow_array)} real properties from Tampa data")
+        valuation = self._valuation(subject_address)
+        
+        if compact:
+            defaults = self._defaults()
+            return {
+                "subject_address": subject_address,
+                "search_timestamp": datetime.now().isoformat(),
+                "format": COMPACT_FORMAT,
+                "defaults": {
+                    "zillow": stamped_defaults(defaults["zillow"], fetch_timestamp),
+                    "reapi": stamped_defaults(defaults["reapi"], fetch_timestamp)
+                },
+                "zillow_properties": [compact_record(r, defaults["zillow"]) for r in zillow_array],
+                "reapi_properties": [compact_record(r, defaults["reapi"]) for r in reapi_array],
+                "summary": self._summary(len(zillow_array), len(zillow_array), len(reapi_array), valuation)
+            }
         
         return {
             "subject_address": subject_address,
             "search_timestamp": datetime.now().isoformat(),
             "zillow_properties": zillow_array,
             "reapi_properties": reapi_array,
-            "summary": {
-                "total_found": len(properties),
-                "zillow_count": len(zillow_array),
-                "reapi_count": len(reapi_array)
-            }
+            "summary": self._summary(len(zillow_array), len(zillow_array), len(reapi_array), valuation)
         }
     
-    def _convert_zillow_to_v62(self, prop: Dict) -> Dict:
-        """Convert existing Zillow data to v6.2 format"""
-        zillow_data = prop.get("zillow_extraction", {}).get("PropertyDetails", {})
+    def get_real_properties_json(self, subject_address: str, max_properties: int = 25,
+                                 filters: Optional[Dict[str, Any]] = None, compact: bool = False,
+                                 deadline=None) -> bytes:
+        """Same result as get_real_properties, serialized to compact JSON bytes
         
-        # Build v6.2 structure with existing data
+        Records are rendered from cached pre-serialized templates and the
+        response is assembled by byte concatenation.
+        """
+        return b"".join(self.iter_real_properties_json(subject_address, max_properties, filters, compact, deadline))
+    
+    def get_real_properties_json_template(self, subject_address: str, max_properties: int = 25,
+                                          filters: Optional[Dict[str, Any]] = None, compact: bool = False,
+                                          deadline=None) -> tuple:
+        """The get_real_properties_json response as a cacheable template
+        
+        Timestamps and record cache statistics are left as placeholders
+        (see property_serializer.response_template); render_json_template
+        stamps them per response.
+        """
+        return serializer.response_template(b"".join(self.iter_real_properties_json(
+            subject_address, max_properties, filters, compact, deadline, stamped=False)))
+    
+    def render_json_template(self, template: tuple) -> bytes:
+        """A response from a get_real_properties_json_template template, stamped now"""
+        now = serializer.dumps(datetime.now().isoformat())
+        return serializer.render_response(template, {
+            serializer.FETCH_TIMESTAMP_PLACEHOLDER: now,
+            serializer.SEARCH_TIMESTAMP_PLACEHOLDER: now,
+            serializer.RECORD_CACHE_PLACEHOLDER: serializer.dumps(self.record_cache.stats())
+        })
+    
+    def iter_real_properties_json(self, subject_address: str, max_properties: int = 25,
+                                  filters: Optional[Dict[str, Any]] = None, compact: bool = False,
+                                  deadline=None, stamped: bool = True) -> Iterator[bytes]:
+        """Serialize stage: the get_real_properties_json response as a stream of chunks
+        
+        Zillow records are emitted as they are converted; the REAPI array
+        follows the Zillow one in the response, so its (already serialized)
+        records are held until the Zillow array is closed. stamped=False
+        leaves placeholders for the per-response fields.
+        """
+        dataset_version, properties = self._open_search(subject_address, max_properties, filters)
+        if properties is None:
+            result = self._empty_result(subject_address)
+            if not stamped:
+                result["search_timestamp"] = serializer.SEARCH_TIMESTAMP_PLACEHOLDER
+            yield serializer.dumps(result)
+            return
+        
+        if stamped:
+            fetch_timestamp = search_timestamp = datetime.now().isoformat()
+        else:
+            fetch_timestamp = serializer.FETCH_TIMESTAMP_PLACEHOLDER
+            search_timestamp = serializer.SEARCH_TIMESTAMP_PLACEHOLDER
+        header = [
+            ("subject_address", serializer.dumps(subject_address)),
+            ("search_timestamp", serializer.dumps(search_timestamp))
+        ]
+        if compact:
+            defaults = self._defaults()
+            header.append(("format", serializer.dumps(COMPACT_FORMAT)))
+            header.append(("defaults", serializer.dumps({
+                "zillow": stamped_defaults(defaults["zillow"], fetch_timestamp),
+                "reapi": stamped_defaults(defaults["reapi"], fetch_timestamp)
+            })))
+        yield serializer.json_object(header)[:-1] + b',"zillow_properties":['
+        
+        reapi_parts = []
+        with closing(properties):
+            for zillow_part, reapi_part in self._render_stage(
+                    properties, dataset_version, fetch_timestamp, compact, deadline):
+                yield zillow_part if not reapi_parts else b"," + zillow_part
+                reapi_parts.append(reapi_part)
+        
+        count = len(reapi_parts)
+        yield b'],"reapi_properties":' + serializer.json_array(reapi_parts)
+        summary = self._summary(count, count, count, self._valuation(subject_address))
+        if not stamped:
+            summary["record_cache"] = serializer.RECORD_CACHE_PLACEHOLDER
+        yield b',"summary":' + serializer.dumps(summary) + b"}"
+    
+    # ------------------------------------------------------------------
+    # Search pipeline: load -> filter -> rank -> compare -> convert -> serialize
+    # Every stage is a generator pulling from the one before it, so only
+    # the properties the caller consumes are read, decoded and converted.
+    # ------------------------------------------------------------------
+    
+    def _open_search(self, subject_address: str, max_properties: int,
+                     filters: Optional[Dict[str, Any]]) -> tuple:
+        """Start a search: (dataset version, lazy ranked property entries)
+        
+        The entries are None if no data is available. They are read inside
+        one store snapshot, held until the iterator is exhausted or closed,
+        so a concurrent ingest is never half-visible.
+        """
+        print(f"🔍 Loading real properties for: {subject_address}")
+        
+        self._ensure_store()
+        source = self._load_stage(max_properties, filters or {})
+        dataset_version = next(source)
+        if dataset_version is None:
+            source.close()
+            print(f"❌ Property store is empty and seed file not found: {self.real_data_file}")
+            return None, None
+        
+        self.dataset_version = dataset_version
+        return dataset_version, source
+    
+    def _load_stage(self, max_properties: int, filters: Dict[str, Any]) -> Iterator:
+        """Load and filter stages: the dataset version, then matching property entries
+        
+        Filters are pushed down to the store's indexes. Searches around a
+        point are ranked by distance, so the store returns every candidate in
+        the box and the rank stage applies max_properties.
+        """
+        with self.store.read_snapshot():
+            if self.store.is_empty():
+                yield None
+                return
+            yield self.store.dataset_version()
+            
+            near = filters.get("near")
+            if near is None:
+                yield from self.store.search(limit=max_properties, **filters)
+            else:
+                yield from self._rank_stage(self.store.search(**filters), near, max_properties)
+    
+    @staticmethod
+    def _rank_stage(properties: Iterable[Dict], near: tuple, max_properties: int) -> Iterator[Dict]:
+        """Rank stage: the max_properties entries closest to near, nearest first
+        
+        Keeps at most max_properties entries in memory (heap selection).
+        """
+        lat, lon = near
+        lon_scale = math.cos(math.radians(lat))
+        
+        def distance(prop):
+            columns = property_columns(prop)
+            if columns["lat"] is None or columns["lon"] is None:
+                return math.inf
+            return (columns["lat"] - lat) ** 2 + ((columns["lon"] - lon) * lon_scale) ** 2
+        
+        yield from heapq.nsmallest(max_properties, properties, key=distance)
+    
+    def _comp_facts(self, prop: Dict, dataset_version: str) -> ValuationFacts:
+        """Valuation facts of a comp, memoized like the records"""
+        key = self._record_cache_key("REAPI", prop, dataset_version) + ("valuation",)
+        facts = self.record_cache.get(key)
+        if facts is None:
+            facts = valuation_facts(prop)
+            self.record_cache.put(key, facts)
+        return facts
+    
+    def _valuation(self, subject_address: str) -> Optional[Dict[str, Any]]:
+        """Valuation summary section, or None if the subject cannot be located
+        
+        The subject is looked up in the store by address; its comps are the
+        VALUATION_COMPS stored properties closest to it (within
+        VALUATION_RADIUS_MILES), whatever the search itself returned.
+        """
+        with self.store.read_snapshot():
+            subject = self.store.find_address(subject_address)
+            if subject is None:
+                return None
+            columns = property_columns(subject)
+            if columns["lat"] is None or columns["lon"] is None:
+                return None
+            near = (columns["lat"], columns["lon"])
+            dataset_version = self.store.dataset_version()
+            candidates = (prop for prop in self.store.search(near=near, radius_miles=VALUATION_RADIUS_MILES)
+                          if prop.get("property_index") != subject.get("property_index"))
+            comps = [self._comp_facts(prop, dataset_version)
+                     for prop in self._rank_stage(candidates, near, VALUATION_COMPS)]
+        return value_subject(valuation_facts(subject), comps)
+    
+    def _discrepancy_stage(self, properties: Iterable[Dict], dataset_version: str) -> Iterator[tuple]:
+        """Compare stage: (property entry, discrepancy logs) pairs
+        
+        Entries are compared DISCREPANCY_BATCH_SIZE at a time, column-wise
+        (see property_discrepancies). Logs are memoized like the records, so
+        a repeated search only pays a cache lookup per property.
+        """
+        batch = []
+        for prop in properties:
+            batch.append(prop)
+            if len(batch) >= DISCREPANCY_BATCH_SIZE:
+                yield from self._compare_batch(batch, dataset_version)
+                batch = []
+        if batch:
+            yield from self._compare_batch(batch, dataset_version)
+    
+    def _compare_batch(self, batch: List[Dict], dataset_version: str) -> Iterator[tuple]:
+        keys = [self._record_cache_key("Zillow", prop, dataset_version) + ("discrepancies",) for prop in batch]
+        # Cached as a 1-tuple: None is a valid result (a view is missing)
+        cached = [self.record_cache.get(key) for key in keys]
+        misses = [i for i, entry in enumerate(cached) if entry is None]
+        if misses:
+            for i, logs in zip(misses, compare_batch([batch[i] for i in misses])):
+                cached[i] = (logs,)
+                self.record_cache.put(keys[i], cached[i])
+        for prop, (logs,) in zip(batch, cached):
+            yield prop, logs
+    
+    def _render_stage(self, properties: Iterable[Dict], dataset_version: str, fetch_timestamp: str,
+                      compact: bool, deadline=None) -> Iterator[tuple]:
+        """Convert stage: (Zillow, REAPI) serialized v6.2 records per property"""
+        fetch_timestamp_json = serializer.dumps(fetch_timestamp)
+        for prop, discrepancy_logs in self._discrepancy_stage(properties, dataset_version):
+            if deadline is not None:
+                deadline.check()
+            yield (serializer.render_record(self._record_template(
+                       "Zillow", prop, dataset_version, self._build_zillow_v62, compact, discrepancy_logs),
+                       fetch_timestamp_json),
+                   serializer.render_record(self._record_template(
+                       "REAPI", prop, dataset_version, self._build_reapi_v62, compact, discrepancy_logs),
+                       fetch_timestamp_json))
+    
+    def preload(self, max_records: int = 1000) -> int:
+        """Open the dataset and pre-render record templates (regular and compact)
+        
+        Used by the production server to do this work once before forking.
+        
+        Returns:
+            Number of properties pre-rendered
+        """
+        dataset_version, properties = self._open_search("(preload)", max_records, None)
+        if properties is None:
+            return 0
+        
+        count = 0
+        with closing(properties):
+            for prop, discrepancy_logs in self._discrepancy_stage(properties, dataset_version):
+                for compact in (False, True):
+                    self._record_template("Zillow", prop, dataset_version, self._build_zillow_v62,
+                                          compact, discrepancy_logs)
+                    self._record_template("REAPI", prop, dataset_version, self._build_reapi_v62,
+                                          compact, discrepancy_logs)
+                count += 1
+        return count
+    
+    def _ensure_store(self):
+        """Open the mapped snapshot or the store (seeded from the JSON file on first use)
+        
+        A snapshot opened here is dropped for the current source once the
+        store has been ingested into (see current_property_source).
+        """
+        if self.store is None:
+            self.store = open_property_source(self.snapshot_path, self.db_path, self.real_data_file)
+            self._opened_store = True
+        elif self._opened_store:
+            self.store = current_property_source(self.store, self.snapshot_path, self.db_path, self.real_data_file)
+        return self.store
+    
+    def current_dataset_version(self) -> str:
+        """Version of the dataset the next search will read"""
+        return self._ensure_store().dataset_version()
+    
+    def _summary(self, total_found: int, zillow_count: int, reapi_count: int,
+                 valuation: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build the summary section, reporting the valuation and record cache statistics"""
+        cache_stats = self.record_cache.stats()
+        print(f"🗄️ Record cache: {cache_stats['hit_ratio']:.0%} hit ratio, "
+              f"{cache_stats['entries']} records, {cache_stats['memory_bytes']:,} bytes")
         return {
-            "PropertyDetails": {
-                "identification": {
-                    "address_full": zillow_data.get("identification", {}).get("address_full"),
-                    "street": zillow_data.get("identification", {}).get("street"),
-                    "city": zillow_data.get("identification", {}).get("city"),
-                    "state": zillow_data.get("identification", {}).get("state"),
-                    "postal_code": zillow_data.get("identification", {}).get("postal_code"),
-                    "property_type": zillow_data.get("identification", {}).get("property_type"),
-                    "year_built": zillow_data.get("identification", {}).get("year_built"),
-                    "living_sqft": zillow_data.get("identification", {}).get("living_sqft"),
-                    "lot_sqft": zillow_data.get("identification", {}).get("lot_sqft"),
-                    "bedrooms": zillow_data.get("identification", {}).get("bedrooms"),
-                    "bathrooms_full": zillow_data.get("identification", {}).get("bathrooms_full"),
-                    "bathrooms_half": zillow_data.get("identification", {}).get("bathrooms_half"),
-                    "heating_type": zillow_data.get("identification", {}).get("heating_type"),
-                    "exterior_materials": zillow_data.get("identification", {}).get("exterior_materials", []),
-                    "interior_materials": zillow_data.get("identification", {}).get("interior_materials", [])
-                },
-                "location": {
-                    "lat": zillow_data.get("location", {}).get("lat"),
-                    "lon": zillow_data.get("location", {}).get("lon"),
-                    "county_fips": zillow_data.get("location", {}).get("county_fips"),
-                    "subdivision": zillow_data.get("location", {}).get("subdivision"),
-                    "neighborhood": zillow_data.get("location", {}).get("neighborhood")
-                },
-                "ai_fields": {
-                    "architectural_styles": zillow_data.get("ai_fields", {}).get("architectural_styles", []),
-                    "finish_quality_score": None,
-                    "finish_quality_label": None,
-                    "curb_appeal_score": None,
-                    "curb_appeal_label": None,
-                    "condition_score": zillow_data.get("ai_fields", {}).get("condition_score"),
-                    "condition_label": None,
-                    "property_uniqueness_score": None,
-                    "street_quality_score": None,
-                    "solar_panels": None,
-                    "occupied": None,
-                    "road_relations": zillow_data.get("ai_fields", {}).get("road_relations", []),
-                    "golf_course_relation": None,
-                    "golf_course_distance_ft": None,
-                    "commercial_relation": None,
-                    "commercial_distance_ft": None,
-                    "commercial_relation_type": None,
-                    "railroad_relation": None,
-                    "railroad_distance_ft": None,
-                    "school_relation": None,
-                    "school_distance_ft": None,
-                    "water_relation_type": None,
-                    "water_relation": None,
-                    "water_distance_ft": None,
-                    "split_level": None,
-                    "lot_type": None,
-                    "professional_photos": None,
-                    "staged": None,
-                    "property_notes": None
-                },
-                "price_history": {
-                    "property_market_status": zillow_data.get("price_history", {}).get("property_market_status"),
-                    "list_price": zillow_data.get("price_history", {}).get("list_price"),
-                    "listed_date": None,
-                    "last_sale_price": zillow_data.get("price_history", {}).get("last_sale_price"),
-                    "last_sale_date": None,
-                    "property_strategy_type": None,
-                    "listing_description": None,
-                    "mls_history": zillow_data.get("price_history", {}).get("mls_history", []),
-                    "sale_history": zillow_data.get("price_history", {}).get("sale_history", [])
-                },
-                "photos": zillow_data.get("photos", []),
-                "environmental_factors": {
-                    "flood": {"severity": "Low", "trend": "Stable"},
-                    "wildfire": {"severity": "Low", "trend": "Stable"},
-                    "heat": {"severity": "Medium", "trend": "Increasing"},
-                    "wind": {"severity": "Medium", "trend": "Stable"},
-                    "air": {"severity": "Low", "trend": "Stable"}
-                },
-                "discrepancy_logs": None,
-                "comp_to_subject": None,
-                "meta_data": {
-                    "data_source": "Zillow",
-                    "source_property_id": zillow_data.get("meta_data", {}).get("source_property_id"),
-                    "fetch_timestamp": datetime.now().isoformat(),
-                    "api_version": "v6.2_CLIENT_APPROVED"
-                }
-            }
+            "total_found": total_found,
+            "zillow_count": zillow_count,
+            "reapi_count": reapi_count,
+            "valuation": valuation,
+            "record_cache": cache_stats
         }
     
-    def _convert_reapi_to_v62(self, prop: Dict) -> Dict:
+    def _record_template(self, data_source: str, prop: Dict, dataset_version: str, build,
+                         compact: bool = False, discrepancy_logs: Optional[List[Dict]] = None) -> tuple:
+        """Cached pre-serialized v6.2 record (see PropertyDetailsRecord.json_template)
+        
+        Compact records carry no fetch_timestamp, so their template is the
+        complete serialized record.
+        """
+        key = self._record_cache_key(data_source, prop, dataset_version) + ("compact" if compact else "json",)
+        template = self.record_cache.get(key)
+        if template is None:
+            record = build(prop, discrepancy_logs)
+            if compact:
+                template = (serializer.dumps(compact_record(record.to_dict(), self._defaults()[data_source.lower()])),
+                            None)
+            else:
+                template = record.json_template()
+            self.record_cache.put(key, template)
+        return template
+    
+    def _defaults(self) -> Dict[str, Dict]:
+        """Per-source default records for compact output"""
+        if self._compact_defaults is None:
+            self._compact_defaults = {
+                "zillow": build_defaults(self._convert_zillow_to_v62),
+                "reapi": build_defaults(self._convert_reapi_to_v62)
+            }
+        return self._compact_defaults
+    
+    def _record_cache_key(self, data_source: str, prop: Dict, dataset_version: str) -> tuple:
+        """Cache key for a converted record: (source, property identity, dataset version)"""
+        identity = prop.get("property_index")
+        if identity is None:
+            extraction = prop.get(f"{data_source.lower()}_extraction") or {}
+            identity = extraction.get("PropertyDetails", {}).get("meta_data", {}).get("source_property_id")
+        return (data_source, identity, dataset_version)
+    
+    def _convert_zillow_to_v62(self, prop: Dict, discrepancy_logs: Optional[List[Dict]] = None) -> Dict:
+        """Convert existing Zillow data to v6.2 format"""
+        return self._build_zillow_v62(prop, discrepancy_logs).to_dict()
+    
+    def _convert_reapi_to_v62(self, prop: Dict, discrepancy_logs: Optional[List[Dict]] = None) -> Dict:
         """Convert existing REAPI data to v6.2 format"""
+        return self._build_reapi_v62(prop, discrepancy_logs).to_dict()
+    
+    def _build_zillow_v62(self, prop: Dict, discrepancy_logs: Optional[List[Dict]] = None) -> PropertyDetailsRecord:
+        """Build the v6.2 record for a property's Zillow data"""
+        zillow_data = prop.get("zillow_extraction", {}).get("PropertyDetails", {})
+        identification = zillow_data.get("identification", {})
+        location = zillow_data.get("location", {})
+        ai_fields = zillow_data.get("ai_fields", {})
+        price_history = zillow_data.get("price_history", {})
+        
+        # Build v6.2 structure with existing data
+        return PropertyDetailsRecord(
+            identification=ZillowIdentification(
+                address_full=identification.get("address_full"),
+                street=identification.get("street"),
+                city=identification.get("city"),
+                state=identification.get("state"),
+                postal_code=identification.get("postal_code"),
+                property_type=identification.get("property_type"),
+                year_built=identification.get("year_built"),
+                living_sqft=identification.get("living_sqft"),
+                lot_sqft=identification.get("lot_sqft"),
+                bedrooms=identification.get("bedrooms"),
+                bathrooms_full=identification.get("bathrooms_full"),
+                bathrooms_half=identification.get("bathrooms_half"),
+                heating_type=identification.get("heating_type"),
+                exterior_materials=identification.get("exterior_materials", []),
+                interior_materials=identification.get("interior_materials", [])
+            ),
+            location=ZillowLocation(
+                lat=location.get("lat"),
+                lon=location.get("lon"),
+                county_fips=location.get("county_fips"),
+                subdivision=location.get("subdivision"),
+                neighborhood=location.get("neighborhood")
+            ),
+            ai_fields=V62AIFields(
+                architectural_styles=ai_fields.get("architectural_styles", []),
+                condition_score=ai_fields.get("condition_score"),
+                road_relations=ai_fields.get("road_relations", [])
+            ),
+            price_history=V62PriceHistory(
+                property_market_status=price_history.get("property_market_status"),
+                list_price=price_history.get("list_price"),
+                listed_date=None,
+                last_sale_price=price_history.get("last_sale_price"),
+                last_sale_date=None,
+                property_strategy_type=None,
+                listing_description=None,
+                mls_history=price_history.get("mls_history", []),
+                sale_history=price_history.get("sale_history", [])
+            ),
+            photos=zillow_data.get("photos", []),
+            environmental_factors=v62_environmental_factors(),
+            discrepancy_logs=discrepancy_logs,
+            comp_to_subject=None,
+            meta_data=MetaData(
+                data_source="Zillow",
+                source_property_id=zillow_data.get("meta_data", {}).get("source_property_id"),
+                fetch_timestamp=datetime.now().isoformat(),
+                api_version="v6.2_CLIENT_APPROVED"
+            )
+        )
+    
+    def _build_reapi_v62(self, prop: Dict, discrepancy_logs: Optional[List[Dict]] = None) -> PropertyDetailsRecord:
+        """Build the v6.2 record for a property's REAPI data"""
         reapi_data = prop.get("reapi_extraction", {}).get("PropertyDetails", {})
+        identification = reapi_data.get("identification", {})
+        location = reapi_data.get("location", {})
+        price_history = reapi_data.get("price_history", {})
         prop_index = prop.get("property_index", 1)
         
         # Build comprehensive v6.2 structure with existing data
-        return {
-            "PropertyDetails": {
-                "identification": {
-                    "apn": reapi_data.get("identification", {}).get("apn"),
-                    "street": reapi_data.get("identification", {}).get("street"),
-                    "city": reapi_data.get("identification", {}).get("city"),
-                    "state": reapi_data.get("identification", {}).get("state"),
-                    "postal_code": reapi_data.get("identification", {}).get("postal_code"),
-                    "address_full": reapi_data.get("identification", {}).get("address_full"),
-                    "zoning": reapi_data.get("identification", {}).get("zoning"),
-                    "property_type": reapi_data.get("identification", {}).get("property_type"),
-                    "property_use": reapi_data.get("identification", {}).get("property_use"),
-                    "landUse": reapi_data.get("identification", {}).get("landUse"),
-                    "legalDescription": reapi_data.get("identification", {}).get("legalDescription"),
-                    "propertyClass": reapi_data.get("identification", {}).get("propertyClass"),
-                    "exterior_materials": reapi_data.get("identification", {}).get("exterior_materials", []),
-                    "interior_materials": reapi_data.get("identification", {}).get("interior_materials", []),
-                    "year_built": reapi_data.get("identification", {}).get("year_built"),
-                    "living_sqft": reapi_data.get("identification", {}).get("living_sqft"),
-                    "building_sqft": reapi_data.get("identification", {}).get("building_sqft"),
-                    "lot_sqft": reapi_data.get("identification", {}).get("lot_sqft"),
-                    "lot_acres": reapi_data.get("identification", {}).get("lot_acres"),
-                    "floor_count": reapi_data.get("identification", {}).get("floor_count"),
-                    "story_count": reapi_data.get("identification", {}).get("floor_count"),  # Use floor_count as story_count
-                    "bedrooms": reapi_data.get("identification", {}).get("bedrooms"),
-                    "bathrooms_full": reapi_data.get("identification", {}).get("bathrooms_full"),
-                    "bathrooms_half": reapi_data.get("identification", {}).get("bathrooms_half"),
-                    "basement": reapi_data.get("identification", {}).get("basement"),
-                    "basement_type": reapi_data.get("identification", {}).get("basement_type"),
-                    "basementFinishedPercent": reapi_data.get("identification", {}).get("basementFinishedPercent"),
-                    "basementSquareFeet": reapi_data.get("identification", {}).get("basementSquareFeet"),
-                    "basementSquareFeetFinished": reapi_data.get("identification", {}).get("basementSquareFeetFinished"),
-                    "basementSquareFeetUnfinished": reapi_data.get("identification", {}).get("basementSquareFeetUnfinished"),
-                    "unit_count": reapi_data.get("identification", {}).get("unit_count"),
-                    "building_count": reapi_data.get("identification", {}).get("building_count"),
-                    "attic": reapi_data.get("identification", {}).get("attic"),
-                    "foundation_type": reapi_data.get("identification", {}).get("foundation_type"),
-                    "roof_type": reapi_data.get("identification", {}).get("roof_type"),
-                    "roof_construction_type": reapi_data.get("identification", {}).get("roof_construction_type"),
-                    "parking_type": reapi_data.get("identification", {}).get("parking_type"),
-                    "parking_spaces": reapi_data.get("identification", {}).get("parking_spaces"),
-                    "parking_space_sqft": reapi_data.get("identification", {}).get("parking_space_sqft"),
-                    "adu_present": False,  # New v6.2 field
-                    "adu_sqft": None,  # New v6.2 field
-                    "pool": reapi_data.get("identification", {}).get("pool"),
-                    "deck": reapi_data.get("identification", {}).get("deck"),
-                    "deck_area": reapi_data.get("identification", {}).get("deck_area"),
-                    "patio": reapi_data.get("identification", {}).get("patio"),
-                    "patio_area": reapi_data.get("identification", {}).get("patio_area"),
-                    "porch_type": reapi_data.get("identification", {}).get("porch_type"),
-                    "porch_area": reapi_data.get("identification", {}).get("porch_area"),
-                    "rv_parking": reapi_data.get("identification", {}).get("rv_parking"),
-                    "fireplace": reapi_data.get("identification", {}).get("fireplace"),
-                    "fireplaces": reapi_data.get("identification", {}).get("fireplaces"),
-                    "air_conditioning_type": reapi_data.get("identification", {}).get("air_conditioning_type"),
-                    "heating_type": reapi_data.get("identification", {}).get("heating_type"),
-                    "heating_fuel_type": reapi_data.get("identification", {}).get("heating_fuel_type"),
-                    "water_type": reapi_data.get("identification", {}).get("water_type"),
-                    "sewer_type": reapi_data.get("identification", {}).get("sewer_type"),
-                    "gated_community": False,  # New v6.2 field
-                    "age_restricted": False,  # New v6.2 field
-                    "historic_district": False,  # New v6.2 field
-                    "site_elevation_ft": None,  # New v6.2 field
-                    "schools": [],  # New v6.2 field
-                    "hoa": reapi_data.get("identification", {}).get("hoa"),
-                    "hoa_fee_annual": reapi_data.get("identification", {}).get("hoa_fee_annual")
-                },
-                "location": {
-                    "lat": reapi_data.get("location", {}).get("lat"),
-                    "lon": reapi_data.get("location", {}).get("lon"),
-                    "county_fips": "12057",  # Hillsborough County, FL
-                    "subdivision": reapi_data.get("location", {}).get("subdivision"),
-                    "neighborhood": reapi_data.get("location", {}).get("neighborhood"),
-                    "census_block": reapi_data.get("location", {}).get("census_block"),
-                    "census_block_group": reapi_data.get("location", {}).get("census_block_group"),
-                    "census_tract": reapi_data.get("location", {}).get("census_tract"),
-                    "school_district": "Hillsborough County Schools",  # New v6.2 field
-                    "flood_zone": reapi_data.get("location", {}).get("flood_zone")
-                },
-                "ai_fields": {
-                    "architectural_styles": [],  # New v6.2 field
-                    "finish_quality_score": None,  # New v6.2 field
-                    "finish_quality_label": None,  # New v6.2 field
-                    "curb_appeal_score": None,  # New v6.2 field
-                    "curb_appeal_label": None,  # New v6.2 field
-                    "condition_score": None,  # New v6.2 field
-                    "condition_label": None,  # New v6.2 field
-                    "property_uniqueness_score": None,  # New v6.2 field
-                    "street_quality_score": None,  # New v6.2 field
-                    "solar_panels": None,  # New v6.2 field
-                    "occupied": None,  # New v6.2 field
-                    "road_relations": [],  # New v6.2 field
-                    "golf_course_relation": None,  # New v6.2 field
-                    "golf_course_distance_ft": None,  # New v6.2 field
-                    "commercial_relation": None,  # New v6.2 field
-                    "commercial_distance_ft": None,  # New v6.2 field
-                    "commercial_relation_type": None,  # New v6.2 field
-                    "railroad_relation": None,  # New v6.2 field
-                    "railroad_distance_ft": None,  # New v6.2 field
-                    "school_relation": None,  # New v6.2 field
-                    "school_distance_ft": None,  # New v6.2 field
-                    "water_relation_type": None,  # New v6.2 field
-                    "water_relation": None,  # New v6.2 field
-                    "water_distance_ft": None,  # New v6.2 field
-                    "split_level": None,  # New v6.2 field
-                    "lot_type": None,  # New v6.2 field
-                    "professional_photos": None,  # New v6.2 field
-                    "staged": None,  # New v6.2 field
-                    "property_notes": None  # New v6.2 field
-                },
-                "price_history": {
-                    "property_market_status": reapi_data.get("price_history", {}).get("property_market_status"),
-                    "list_price": reapi_data.get("price_history", {}).get("list_price"),
-                    "listed_date": reapi_data.get("price_history", {}).get("listed_date"),
-                    "last_sale_price": reapi_data.get("price_history", {}).get("last_sale_price"),
-                    "last_sale_date": reapi_data.get("price_history", {}).get("last_sale_date"),
-                    "property_strategy_type": None,
-                    "listing_description": None,
-                    "mls_history": [],
-                    "sale_history": reapi_data.get("price_history", {}).get("sale_history", [])
-                },
-                "photos": [
-                    {
-                        "sources": [{
-                            "url": f"https://photos.reapi.com/property_{prop_index}_1.jpg",
-                            "width": 1024,
-                            "height": 768,
-                            "classification_type": "exterior_front"
-                        }]
-                    }
-                ],
-                "environmental_factors": {
-                    "flood": {"severity": "Low", "trend": "Stable"},
-                    "wildfire": {"severity": "Low", "trend": "Stable"},
-                    "heat": {"severity": "Medium", "trend": "Increasing"},
-                    "wind": {"severity": "Medium", "trend": "Stable"},
-                    "air": {"severity": "Low", "trend": "Stable"}
-                },
-                "discrepancy_logs": None,
-                "comp_to_subject": None,
-                "meta_data": {
-                    "data_source": "REAPI",
-                    "source_property_id": f"REAPI_{prop_index}",
-                    "fetch_timestamp": datetime.now().isoformat(),
-                    "api_version": "v6.2_CLIENT_APPROVED"
-                }
-            }
-        }
+        return PropertyDetailsRecord(
+            identification=V62ReapiIdentification(
+                apn=identification.get("apn"),
+                street=identification.get("street"),
+                city=identification.get("city"),
+                state=identification.get("state"),
+                postal_code=identification.get("postal_code"),
+                address_full=identification.get("address_full"),
+                zoning=identification.get("zoning"),
+                property_type=identification.get("property_type"),
+                property_use=identification.get("property_use"),
+                landUse=identification.get("landUse"),
+                legalDescription=identification.get("legalDescription"),
+                propertyClass=identification.get("propertyClass"),
+                exterior_materials=identification.get("exterior_materials", []),
+                interior_materials=identification.get("interior_materials", []),
+                year_built=identification.get("year_built"),
+                living_sqft=identification.get("living_sqft"),
+                building_sqft=identification.get("building_sqft"),
+                lot_sqft=identification.get("lot_sqft"),
+                lot_acres=identification.get("lot_acres"),
+                floor_count=identification.get("floor_count"),
+                story_count=identification.get("floor_count"),  # Use floor_count as story_count
+                bedrooms=identification.get("bedrooms"),
+                bathrooms_full=identification.get("bathrooms_full"),
+                bathrooms_half=identification.get("bathrooms_half"),
+                basement=identification.get("basement"),
+                basement_type=identification.get("basement_type"),
+                basementFinishedPercent=identification.get("basementFinishedPercent"),
+                basementSquareFeet=identification.get("basementSquareFeet"),
+                basementSquareFeetFinished=identification.get("basementSquareFeetFinished"),
+                basementSquareFeetUnfinished=identification.get("basementSquareFeetUnfinished"),
+                unit_count=identification.get("unit_count"),
+                building_count=identification.get("building_count"),
+                attic=identification.get("attic"),
+                foundation_type=identification.get("foundation_type"),
+                roof_type=identification.get("roof_type"),
+                roof_construction_type=identification.get("roof_construction_type"),
+                parking_type=identification.get("parking_type"),
+                parking_spaces=identification.get("parking_spaces"),
+                parking_space_sqft=identification.get("parking_space_sqft"),
+                adu_present=False,  # New v6.2 field
+                adu_sqft=None,  # New v6.2 field
+                pool=identification.get("pool"),
+                deck=identification.get("deck"),
+                deck_area=identification.get("deck_area"),
+                patio=identification.get("patio"),
+                patio_area=identification.get("patio_area"),
+                porch_type=identification.get("porch_type"),
+                porch_area=identification.get("porch_area"),
+                rv_parking=identification.get("rv_parking"),
+                fireplace=identification.get("fireplace"),
+                fireplaces=identification.get("fireplaces"),
+                air_conditioning_type=identification.get("air_conditioning_type"),
+                heating_type=identification.get("heating_type"),
+                heating_fuel_type=identification.get("heating_fuel_type"),
+                water_type=identification.get("water_type"),
+                sewer_type=identification.get("sewer_type"),
+                gated_community=False,  # New v6.2 field
+                age_restricted=False,  # New v6.2 field
+                historic_district=False,  # New v6.2 field
+                site_elevation_ft=None,  # New v6.2 field
+                schools=[],  # New v6.2 field
+                hoa=identification.get("hoa"),
+                hoa_fee_annual=identification.get("hoa_fee_annual")
+            ),
+            location=V62ReapiLocation(
+                lat=location.get("lat"),
+                lon=location.get("lon"),
+                county_fips="12057",  # Hillsborough County, FL
+                subdivision=location.get("subdivision"),
+                neighborhood=location.get("neighborhood"),
+                census_block=location.get("census_block"),
+                census_block_group=location.get("census_block_group"),
+                census_tract=location.get("census_tract"),
+                school_district="Hillsborough County Schools",  # New v6.2 field
+                flood_zone=location.get("flood_zone")
+            ),
+            # New v6.2 section, not populated yet
+            ai_fields=V62AIFields(architectural_styles=[], road_relations=[]),
+            price_history=V62PriceHistory(
+                property_market_status=price_history.get("property_market_status"),
+                list_price=price_history.get("list_price"),
+                listed_date=price_history.get("listed_date"),
+                last_sale_price=price_history.get("last_sale_price"),
+                last_sale_date=price_history.get("last_sale_date"),
+                property_strategy_type=None,
+                listing_description=None,
+                mls_history=[],
+                sale_history=price_history.get("sale_history", [])
+            ),
+            photos=[
+                Photo(sources=[PhotoSource(
+                    url=f"https://photos.reapi.com/property_{prop_index}_1.jpg",
+                    width=1024,
+                    height=768,
+                    classification_type="exterior_front"
+                )])
+            ],
+            environmental_factors=v62_environmental_factors(),
+            discrepancy_logs=discrepancy_logs,
+            comp_to_subject=None,
+            meta_data=MetaData(
+                data_source="REAPI",
+                source_property_id=f"REAPI_{prop_index}",
+                fetch_timestamp=datetime.now().isoformat(),
+                api_version="v6.2_CLIENT_APPROVED"
+            )
+        )
     
     def _empty_result(self, address: str) -> Dict:
         """Return empty result structure"""
@@ -313,7 +627,8 @@ class PropertySearchV62Final:
             "summary": {
                 "total_found": 0,
                 "zillow_count": 0,
-                "reapi_count": 0
+                "reapi_count": 0,
+                "valuation": None
             }
         }
 
@@ -333,8 +648,8 @@ def main():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"FINAL_PROPERTIES_v62_{timestamp}.json"
     
-    with open(filename, 'w') as f:
-        json.dump(results, f, indent=2)
+    with open(filename, 'wb') as f:
+        f.write(serializer.dumps(results, pretty=True))
     
     print(f"\n✅ COMPLETE: {results['summary']['total_found']} real properties")
     print(f"📁 Saved to: {filename}")
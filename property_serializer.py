@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Property Serializer v6.2 - Fast JSON serialization for search responses
+Uses orjson when it is installed, the standard json module otherwise
+
+Hot paths serialize compactly (no indentation) and assemble responses from
+pre-serialized byte fragments: cached v6.2 records are stored as bytes with a
+placeholder for meta_data.fetch_timestamp, which is spliced in per response.
+Whole search responses are cached the same way (response_template): the
+timestamps and record cache statistics are stamped per response.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from property_categories import intern_extraction_entry
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+SERIALIZER_NAME = "orjson" if orjson is not None else "json"
+
+FETCH_TIMESTAMP_PLACEHOLDER = "__PD_FETCH_TIMESTAMP__"
+_PLACEHOLDER_BYTES = b'"' + FETCH_TIMESTAMP_PLACEHOLDER.encode() + b'"'
+SEARCH_TIMESTAMP_PLACEHOLDER = "__PD_SEARCH_TIMESTAMP__"
+RECORD_CACHE_PLACEHOLDER = "__PD_RECORD_CACHE__"
+_RESPONSE_PLACEHOLDERS = re.compile(
+    b'"(' + b"|".join(re.escape(p.encode()) for p in (
+        FETCH_TIMESTAMP_PLACEHOLDER, SEARCH_TIMESTAMP_PLACEHOLDER, RECORD_CACHE_PLACEHOLDER)) + b')"')
+
+
+def dumps(obj: Any, pretty: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes (compact unless pretty)
+
+    default converts objects the serializer does not know (e.g. records)
+    into serializable ones.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default).encode("utf-8")
+
+
+def loads(data) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def loads_entry(data) -> Dict[str, Any]:
+    """Parse an extraction property entry, interning its categorical values
+
+    Used wherever entries are loaded (store, snapshot, NDJSON files), so
+    records held at once share one copy of each city, zoning, ... string.
+    """
+    return intern_extraction_entry(loads(data))
+
+
+def record_template(record: dict) -> Tuple[bytes, bytes]:
+    """
+    Pre-serialize a v6.2 record around its fetch_timestamp
+
+    Returns:
+        (prefix, suffix) such that prefix + timestamp JSON + suffix is the
+        record; suffix is None if the record has no meta_data to stamp
+    """
+    details = dict(record["PropertyDetails"])
+    if not isinstance(details.get("meta_data"), dict):
+        return dumps(record), None
+    details["meta_data"] = dict(details["meta_data"], fetch_timestamp=FETCH_TIMESTAMP_PLACEHOLDER)
+    return split_record(dumps({"PropertyDetails": details}))
+
+
+def split_record(body: bytes) -> Tuple[bytes, bytes]:
+    """(prefix, suffix) of a serialized record around its FETCH_TIMESTAMP_PLACEHOLDER"""
+    prefix, _, suffix = body.partition(_PLACEHOLDER_BYTES)
+    return prefix, suffix
+
+
+def render_record(template: Tuple[bytes, bytes], fetch_timestamp: bytes) -> bytes:
+    """Splice a serialized fetch_timestamp into a record template"""
+    prefix, suffix = template
+    if suffix is None:
+        return prefix
+    return prefix + fetch_timestamp + suffix
+
+
+def response_template(body: bytes) -> Tuple[bytes, ...]:
+    """
+    Split a serialized response around its placeholders
+
+    Returns:
+        (text, placeholder, text, ..., text); the placeholders are the
+        *_PLACEHOLDER names, as bytes
+    """
+    return tuple(_RESPONSE_PLACEHOLDERS.split(body))
+
+
+def render_response(template: Tuple[bytes, ...], values: Dict[str, bytes]) -> bytes:
+    """Replace each placeholder of a response template by its serialized value in values"""
+    return b"".join(values[part.decode()] if i % 2 else part for i, part in enumerate(template))
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    """Assemble a JSON array from serialized items"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def json_object(fields: List[Tuple[str, bytes]]) -> bytes:
+    """Assemble a JSON object from (key, serialized value) pairs"""
+    return b"{" + b",".join(dumps(key) + b":" + value for key, value in fields) + b"}"
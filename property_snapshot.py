@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Property Snapshot v6.2 - Memory-mapped binary snapshot of the property store
+Instant startup: the snapshot is mapped, not parsed
+
+File layout (little-endian, sections aligned to 8 bytes):
+- Header: magic, format version, record count, dataset version string id,
+  offsets of the column, string table and blob sections
+- Columns: one fixed-width array per field (property_index, list_price,
+  living_sqft, lat, lon, property_type, postal_code, blob offset/length,
+  64-bit hash of the normalized address)
+- String table: count, end offsets, UTF-8 bytes (categorical values)
+- Blobs: compact JSON of each extraction property entry
+
+The file is mapped read-only, so forked workers share its pages through the
+OS page cache and only the records a search returns are ever decoded.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+import property_serializer as serializer
+from address_normalizer import address_key
+from property_store import (PropertyStore, open_store, property_columns, read_dataset_version, DEFAULT_STORE_PATH,
+                            DEFAULT_DATA_FILE, MILES_PER_DEGREE_LAT)
+
+DEFAULT_SNAPSHOT_PATH = os.environ.get("PROPERTY_SNAPSHOT", "property_store.snap")
+
+MAGIC = b"PDSNAP01"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIIIIQQQ")
+
+NULL_INT = -(2 ** 63)
+NULL_STRING = 0xFFFFFFFF
+
+# (column name, array typecode); string columns hold string table ids
+SNAPSHOT_COLUMNS = (
+    ("property_index", "q"),
+    ("list_price", "q"),
+    ("living_sqft", "q"),
+    ("lat", "d"),
+    ("lon", "d"),
+    ("blob_offset", "Q"),
+    ("blob_length", "Q"),
+    ("property_type", "I"),
+    ("postal_code", "I"),
+    ("address_hash", "q")
+)
+STRING_COLUMNS = ("property_type", "postal_code")
+
+
+def address_hash(key: Optional[str]) -> int:
+    """64-bit hash of a normalized address key (NULL_INT for None)"""
+    if key is None:
+        return NULL_INT
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+def _pad(f) -> int:
+    """Pad the file to an 8-byte boundary and return the new position"""
+    position = f.tell()
+    padding = (-position) % 8
+    if padding:
+        f.write(b"\0" * padding)
+    return position + padding
+
+
+def write_snapshot(store: PropertyStore, path: str = DEFAULT_SNAPSHOT_PATH) -> int:
+    """
+    Write a binary snapshot of the store's current dataset
+
+    The file is written next to path and renamed into place, so a running
+    server never maps a partial snapshot.
+
+    Returns:
+        Number of records written
+    """
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return NULL_STRING
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    columns = {name: array(typecode) for name, typecode in SNAPSHOT_COLUMNS}
+    tmp_path = f"{path}.tmp"
+
+    with store.read_snapshot() as conn, open(tmp_path, "wb") as f:
+        dataset_version_id = intern(store.dataset_version())
+
+        # Blobs go first so their offsets are known while the columns are built
+        f.write(b"\0" * HEADER.size)
+        blobs_offset = _pad(f)
+        rows = conn.execute(
+            "SELECT property_index, list_price, living_sqft, lat, lon, property_type, postal_code, address_key, data "
+            "FROM properties ORDER BY id")
+        for property_index, list_price, living_sqft, lat, lon, property_type, postal_code, key, data in rows:
+            blob = data.encode("utf-8")
+            columns["blob_offset"].append(f.tell() - blobs_offset)
+            columns["blob_length"].append(len(blob))
+            f.write(blob)
+
+            columns["property_index"].append(NULL_INT if property_index is None else int(property_index))
+            columns["list_price"].append(NULL_INT if list_price is None else int(list_price))
+            columns["living_sqft"].append(NULL_INT if living_sqft is None else int(living_sqft))
+            columns["lat"].append(math.nan if lat is None else lat)
+            columns["lon"].append(math.nan if lon is None else lon)
+            columns["property_type"].append(intern(property_type))
+            columns["postal_code"].append(intern(postal_code))
+            columns["address_hash"].append(address_hash(key))
+
+        columns_offset = _pad(f)
+        for name, _ in SNAPSHOT_COLUMNS:
+            columns[name].tofile(f)
+            _pad(f)
+
+        strings_offset = _pad(f)
+        encoded = [s.encode("utf-8") for s in strings]
+        ends = array("Q")
+        end = 0
+        for value in encoded:
+            end += len(value)
+            ends.append(end)
+        f.write(struct.pack("<Q", len(encoded)))
+        ends.tofile(f)
+        f.write(b"".join(encoded))
+
+        count = len(columns["property_index"])
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, dataset_version_id, 0,
+                            columns_offset, strings_offset, blobs_offset))
+
+    os.replace(tmp_path, path)
+    return count
+
+
+class PropertySnapshot:
+    """Read-only, memory-mapped property dataset with the PropertyStore query API"""
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        """Map the snapshot at path"""
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+        magic, format_version, count, version_id, _, columns_offset, strings_offset, blobs_offset = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"Not a v{FORMAT_VERSION} property snapshot: {path}")
+
+        self._count = count
+        self._blobs_offset = blobs_offset
+
+        # Column views point straight into the mapping; nothing is copied
+        self.columns = {}
+        self._column_offsets = {}
+        offset = columns_offset
+        for name, typecode in SNAPSHOT_COLUMNS:
+            size = array(typecode).itemsize * count
+            self.columns[name] = self._view[offset:offset + size].cast(typecode)
+            self._column_offsets[name] = offset
+            offset += size + (-size) % 8
+
+        string_count = struct.unpack_from("<Q", self._mm, strings_offset)[0]
+        self._string_ends = self._view[strings_offset + 8:strings_offset + 8 + 8 * string_count].cast("Q")
+        self._string_data_offset = strings_offset + 8 + 8 * string_count
+        # The table only holds categorical values, so it is decoded up front;
+        # equality filters then resolve a value to its id with one dict lookup
+        self._strings: List[str] = [sys.intern(self._decode_string(i)) for i in range(string_count)]
+        self._string_ids: Dict[str, int] = {value: i for i, value in enumerate(self._strings)}
+
+        self._dataset_version = self.string(version_id)
+
+    def close(self):
+        """Release the mapping"""
+        for view in self.columns.values():
+            view.release()
+        self._string_ends.release()
+        self._view.release()
+        self._mm.close()
+
+    def _decode_string(self, string_id: int) -> str:
+        start = self._string_ends[string_id - 1] if string_id else 0
+        end = self._string_ends[string_id]
+        offset = self._string_data_offset
+        return bytes(self._view[offset + start:offset + end]).decode("utf-8")
+
+    def string(self, string_id: int) -> Optional[str]:
+        """The string table entry of string_id"""
+        if string_id == NULL_STRING:
+            return None
+        return self._strings[string_id]
+
+    def string_id(self, value: str) -> Optional[int]:
+        """Find the string table id of value, or None if it never occurs"""
+        return self._string_ids.get(value)
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Decode the extraction property entry at row i"""
+        start = self._blobs_offset + self.columns["blob_offset"][i]
+        return serializer.loads_entry(self._mm[start:start + self.columns["blob_length"][i]])
+
+    # ------------------------------------------------------------------
+    # PropertyStore-compatible API
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def read_snapshot(self):
+        """The mapping is immutable, so every read is already consistent"""
+        yield self
+
+    def dataset_version(self) -> str:
+        return self._dataset_version
+
+    def count(self) -> int:
+        return self._count
+
+    def is_empty(self) -> bool:
+        return self._count == 0
+
+    def find_address(self, address: str) -> Optional[Dict[str, Any]]:
+        """The property entry at a (normalized) address, or None
+
+        The address_hash column is searched in place (mmap.find), so only
+        records whose hash matches are decoded.
+        """
+        key = address_key(address)
+        if key is None:
+            return None
+        needle = struct.pack("<q", address_hash(key))
+        start = self._column_offsets["address_hash"]
+        end = start + 8 * self._count
+        position = self._mm.find(needle, start, end)
+        while position != -1:
+            if (position - start) % 8 == 0:
+                prop = self.record((position - start) // 8)
+                if property_columns(prop)["address_key"] == key:
+                    return prop
+            position = self._mm.find(needle, position + 1, end)
+        return None
+
+    def _rows_with(self, column: str, string_id: int) -> Iterator[int]:
+        """Rows whose string column equals string_id, in order
+
+        The column is searched in place (mmap.find), so rows with other
+        values are never visited in Python.
+        """
+        needle = struct.pack("<I", string_id)
+        start = self._column_offsets[column]
+        end = start + 4 * self._count
+        position = self._mm.find(needle, start, end)
+        while position != -1:
+            if (position - start) % 4 == 0:
+                yield (position - start) // 4
+                position = self._mm.find(needle, position + 4, end)
+            else:
+                position = self._mm.find(needle, position + 1, end)
+
+    def search(self,
+               limit: Optional[int] = None,
+               near: Optional[Tuple[float, float]] = None,
+               radius_miles: float = 2.0,
+               min_price: Optional[int] = None,
+               max_price: Optional[int] = None,
+               min_sqft: Optional[int] = None,
+               max_sqft: Optional[int] = None,
+               property_type: Optional[str] = None,
+               postal_code: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Scan the fixed-width columns and decode only matching records
+
+        Equality filters pick the candidate rows first (see _rows_with);
+        only those are checked against the range and box filters.
+        Arguments match PropertyStore.search.
+        """
+        cols = self.columns
+
+        equal = []
+        for column, value in (("property_type", property_type), ("postal_code", postal_code)):
+            if value is not None:
+                string_id = self.string_id(value)
+                if string_id is None:
+                    return
+                equal.append((column, string_id))
+        if equal:
+            candidates = self._rows_with(*equal[0])
+            equal = [(cols[column], string_id) for column, string_id in equal[1:]]
+        else:
+            candidates = range(self._count)
+
+        # Open bounds become the int64 extremes; NULL_INT itself never matches
+        ranges = [(cols[column], NULL_INT + 1 if low is None else low, -NULL_INT - 1 if high is None else high)
+                  for column, low, high in (("list_price", min_price, max_price), ("living_sqft", min_sqft, max_sqft))
+                  if low is not None or high is not None]
+
+        lats, lons = cols["lat"], cols["lon"]
+        min_lat = max_lat = min_lon = max_lon = None
+        if near is not None:
+            lat, lon = near
+            lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+            lon_delta = lat_delta / max(0.01, abs(math.cos(math.radians(lat))))
+            min_lat, max_lat, min_lon, max_lon = lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+        returned = 0
+        for i in candidates:
+            if limit is not None and returned >= limit:
+                return
+            for values, string_id in equal:
+                if values[i] != string_id:
+                    break
+            else:
+                for values, low, high in ranges:
+                    if not low <= values[i] <= high:
+                        break
+                else:
+                    # NaN (no location) fails both box comparisons
+                    if near is None or (min_lat <= lats[i] <= max_lat and min_lon <= lons[i] <= max_lon):
+                        returned += 1
+                        yield self.record(i)
+
+
+def open_property_source(snapshot_path: str = DEFAULT_SNAPSHOT_PATH,
+                         db_path: str = DEFAULT_STORE_PATH,
+                         seed_file: str = DEFAULT_DATA_FILE):
+    """
+    Open the fastest up-to-date view of the property dataset
+
+    The snapshot is used when it exists and matches the store's dataset
+    version (or there is no store, or nothing was ever imported into it);
+    otherwise the SQLite store is opened.
+    """
+    if os.path.exists(snapshot_path):
+        try:
+            snapshot = PropertySnapshot(snapshot_path)
+        except ValueError as e:
+            print(f"⚠️ Ignoring snapshot: {e}")
+        else:
+            if read_dataset_version(db_path) in (None, "0", snapshot.dataset_version()):
+                print(f"⚡ Mapped property snapshot {snapshot_path} ({snapshot.count()} properties)")
+                return snapshot
+            print(f"⚠️ Snapshot {snapshot_path} is older than the property store, using the store")
+            snapshot.close()
+
+    return open_store(db_path, seed_file)
+
+
+def current_property_source(source, snapshot_path: str = DEFAULT_SNAPSHOT_PATH,
+                            db_path: str = DEFAULT_STORE_PATH,
+                            seed_file: str = DEFAULT_DATA_FILE):
+    """
+    source, or a freshly opened one if source is a snapshot the store has moved past
+
+    The store's version is re-read (read-only, no schema work) on every call,
+    so a long-running worker picks up ingests: a stale snapshot is replaced by
+    a newer snapshot, or the store. The old mapping is not closed; searches
+    still reading it keep it alive until they finish.
+    """
+    if isinstance(source, PropertySnapshot):
+        version = read_dataset_version(db_path)
+        if version not in (None, "0", source.dataset_version()):
+            print(f"🔄 Property store is at version {version}, reopening the property source")
+            return open_property_source(snapshot_path, db_path, seed_file)
+    return source
+
+
+def main():
+    """Build a snapshot of the property store"""
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SNAPSHOT_PATH
+
+    store = open_store(DEFAULT_STORE_PATH, DEFAULT_DATA_FILE)
+    count = write_snapshot(store, path)
+
+    print(f"✅ Snapshot of {count} properties (dataset version {store.dataset_version()}) saved to: {path}")
+    print(f"📦 Size: {os.path.getsize(path):,} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+Property Store v6.2 - SQLite-backed property dataset
+Loads extraction JSONs into SQLite with indexes for search
+
+Accepts the extraction files written by generate_tampa_properties.py,
+real_property_extractor.py and real_property_search.py, as JSON documents or
+streamed from NDJSON (see extraction_ndjson.py). Each property entry is
+stored as its raw JSON plus indexed columns:
+- R*Tree index on lat/lon
+- B-tree indexes on list price, living sqft, property type and postal code
+
+New extraction files can be ingested incrementally: properties are matched to
+stored ones by APN, source_property_id or normalized address and only new or
+changed properties are written.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Set, Tuple
+
+import price_history_index as price_history
+import property_aggregates as aggregates
+import property_serializer as serializer
+from address_normalizer import address_key
+from extraction_ndjson import open_extraction, is_ndjson_path
+
+DEFAULT_STORE_PATH = os.environ.get("PROPERTY_STORE_DB", "property_store.db")
+DEFAULT_DATA_FILE = os.environ.get("PROPERTY_SEED_FILE", "TAMPA_PROPERTIES_EXTRACTION_20250528_182304.json")
+
+MILES_PER_DEGREE_LAT = 69.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS properties (
+    id INTEGER PRIMARY KEY,
+    property_index INTEGER,
+    apn TEXT,
+    zillow_property_id TEXT,
+    reapi_property_id TEXT,
+    address_full TEXT,
+    postal_code TEXT,
+    property_type TEXT,
+    list_price INTEGER,
+    living_sqft INTEGER,
+    lat REAL,
+    lon REAL,
+    address_key TEXT,
+    content_hash TEXT,
+    source_file TEXT,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS properties_rtree USING rtree(
+    id, min_lat, max_lat, min_lon, max_lon
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_properties_price ON properties(list_price);
+CREATE INDEX IF NOT EXISTS idx_properties_sqft ON properties(living_sqft);
+CREATE INDEX IF NOT EXISTS idx_properties_type ON properties(property_type);
+CREATE INDEX IF NOT EXISTS idx_properties_zip ON properties(postal_code);
+CREATE INDEX IF NOT EXISTS idx_properties_apn ON properties(apn);
+CREATE INDEX IF NOT EXISTS idx_properties_zillow_id ON properties(zillow_property_id);
+CREATE INDEX IF NOT EXISTS idx_properties_reapi_id ON properties(reapi_property_id);
+CREATE INDEX IF NOT EXISTS idx_properties_address_key ON properties(address_key);
+"""
+
+# Columns added after the first store release: (name, type)
+MIGRATED_COLUMNS = (("address_key", "TEXT"), ("content_hash", "TEXT"))
+
+# Identity columns used to match incoming properties, strongest first
+MATCH_COLUMNS = ("apn", "zillow_property_id", "reapi_property_id", "address_key")
+
+
+def load_extraction_file(path: str) -> Dict[str, Any]:
+    """Load an extraction document from disk (JSON or NDJSON) into memory"""
+    if is_ndjson_path(path):
+        properties, summary = open_extraction(path)
+        return {"extraction_summary": summary, "properties": list(properties)}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def normalize_address_key(address: Optional[str]) -> Optional[str]:
+    """Normalize an address for matching (see address_normalizer.address_key)"""
+    return address_key(address)
+
+
+def content_hash(prop: Dict[str, Any]) -> str:
+    """Hash of a property entry ignoring fields that change on every extraction"""
+    stable = dict(prop)
+    stable.pop("property_index", None)
+    stable.pop("extraction_status", None)
+    for source in ("zillow", "reapi"):
+        details = _details(prop, source)
+        if details.get("meta_data"):
+            meta_data = dict(details["meta_data"])
+            meta_data.pop("fetch_timestamp", None)
+            stable[f"{source}_extraction"] = {"PropertyDetails": dict(details, meta_data=meta_data)}
+    encoded = json.dumps(stable, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def _details(prop: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Return the PropertyDetails section of a property's extraction, or {}"""
+    extraction = prop.get(f"{source}_extraction") or {}
+    return extraction.get("PropertyDetails") or {}
+
+
+def property_columns(prop: Dict[str, Any]) -> Dict[str, Any]:
+    """Derive the indexed columns for one extraction property entry
+
+    REAPI data is preferred for the indexed view; Zillow data fills the gaps
+    (real_property_extractor.py entries may have only one of the two).
+    """
+    reapi = _details(prop, "reapi")
+    zillow = _details(prop, "zillow")
+    primary = reapi or zillow
+
+    identification = primary.get("identification", {})
+    location = primary.get("location", {})
+    price_history = primary.get("price_history", {})
+
+    return {
+        "property_index": prop.get("property_index"),
+        "apn": reapi.get("identification", {}).get("apn") or None,
+        "zillow_property_id": zillow.get("meta_data", {}).get("source_property_id") or None,
+        "reapi_property_id": reapi.get("meta_data", {}).get("source_property_id") or None,
+        "address_full": identification.get("address_full"),
+        "postal_code": identification.get("postal_code"),
+        "property_type": identification.get("property_type"),
+        "list_price": price_history.get("list_price"),
+        "living_sqft": identification.get("living_sqft"),
+        "lat": location.get("lat"),
+        "lon": location.get("lon"),
+        "address_key": normalize_address_key(identification.get("address_full"))
+    }
+
+
+class PropertyStore:
+    """SQLite property store with spatial and attribute indexes"""
+
+    COLUMNS = (
+        "property_index", "apn", "zillow_property_id", "reapi_property_id",
+        "address_full", "postal_code", "property_type", "list_price",
+        "living_sqft", "lat", "lon", "address_key"
+    )
+
+    def __init__(self, db_path: str = DEFAULT_STORE_PATH, read_only: bool = False):
+        """Open (and create if needed) the store at db_path
+
+        read_only opens an existing store without creating, migrating or
+        writing to it; sqlite3.OperationalError is raised if there is none.
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        conn = self.connection()
+        if read_only:
+            return
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        conn.executescript(INDEXES)
+        conn.executescript(aggregates.SCHEMA)
+        conn.executescript(price_history.SCHEMA)
+        conn.commit()
+        self._build_missing_aggregates(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Add columns missing from stores created by earlier versions"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(properties)")}
+        for name, column_type in MIGRATED_COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE properties ADD COLUMN {name} {column_type}")
+
+    def _build_missing_aggregates(self, conn: sqlite3.Connection):
+        """Build the aggregates and price events of a store created before they existed"""
+        if self.get_meta("aggregates_built") is None:
+            with self._write_lock, conn:
+                groups = aggregates.rebuild(conn)
+                self._set_meta(conn, "aggregates_built", datetime.now().isoformat())
+            if groups:
+                print(f"📈 Built aggregates for {groups} groups")
+        if self.get_meta("price_events_built") is None:
+            with self._write_lock, conn:
+                events = price_history.rebuild(conn)
+                self._set_meta(conn, "price_events_built", datetime.now().isoformat())
+            if events:
+                print(f"📈 Indexed {events} price events")
+
+    @contextmanager
+    def read_snapshot(self):
+        """Run the enclosed reads against one consistent dataset version"""
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the store"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            else:
+                conn = sqlite3.connect(self.db_path)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Read a store_meta value"""
+        row = self.connection().execute(
+            "SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: Any):
+        conn.execute(
+            "INSERT INTO store_meta(key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)))
+
+    def dataset_version(self) -> str:
+        """Version of the published dataset, bumped by every import"""
+        return self.get_meta("dataset_version", "0")
+
+    def _publish(self, conn: sqlite3.Connection, source_file: str, summary: Dict[str, Any]):
+        """Bump the dataset version inside the caller's transaction"""
+        version = int(self.get_meta("dataset_version", "0")) + 1
+        self._set_meta(conn, "dataset_version", version)
+        self._set_meta(conn, "source_file", source_file)
+        self._set_meta(conn, "extraction_summary", json.dumps(summary))
+        self._set_meta(conn, "published_at", datetime.now().isoformat())
+
+    def extraction_summary(self) -> Dict[str, Any]:
+        """extraction_summary of the most recently imported file"""
+        return json.loads(self.get_meta("extraction_summary", "{}"))
+
+    # ------------------------------------------------------------------
+    # Import
+    # ------------------------------------------------------------------
+
+    def _insert_property(self, conn: sqlite3.Connection, prop: Dict[str, Any], source_file: str,
+                         dirty: Set[Tuple[str, str]]) -> int:
+        """Insert one property entry, its spatial index row, aggregate members and price events"""
+        columns = property_columns(prop)
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        cursor = conn.execute(
+            f"INSERT INTO properties ({', '.join(self.COLUMNS)}, content_hash, source_file, data) "
+            f"VALUES ({placeholders}, ?, ?, ?)",
+            tuple(columns[c] for c in self.COLUMNS)
+            + (content_hash(prop), source_file, json.dumps(prop, separators=(",", ":"))))
+        row_id = cursor.lastrowid
+        self._index_location(conn, row_id, columns)
+        aggregates.track_property(conn, row_id, prop, dirty)
+        price_history.track_property(conn, row_id, prop)
+        return row_id
+
+    def _update_property(self, conn: sqlite3.Connection, row_id: int, prop: Dict[str, Any], source_file: str,
+                         dirty: Set[Tuple[str, str]]):
+        """Rewrite a stored property entry, its spatial index row, aggregate members and price events"""
+        columns = property_columns(prop)
+        assignments = ", ".join(f"{c} = ?" for c in self.COLUMNS)
+        conn.execute(
+            f"UPDATE properties SET {assignments}, content_hash = ?, source_file = ?, data = ? WHERE id = ?",
+            tuple(columns[c] for c in self.COLUMNS)
+            + (content_hash(prop), source_file, json.dumps(prop, separators=(",", ":")), row_id))
+        conn.execute("DELETE FROM properties_rtree WHERE id = ?", (row_id,))
+        self._index_location(conn, row_id, columns)
+        aggregates.untrack_property(conn, row_id, dirty)
+        aggregates.track_property(conn, row_id, prop, dirty)
+        price_history.untrack_property(conn, row_id)
+        price_history.track_property(conn, row_id, prop)
+
+    def _index_location(self, conn: sqlite3.Connection, row_id: int, columns: Dict[str, Any]):
+        if columns["lat"] is not None and columns["lon"] is not None:
+            conn.execute(
+                "INSERT INTO properties_rtree(id, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+                (row_id, columns["lat"], columns["lat"], columns["lon"], columns["lon"]))
+
+    def _match_existing(self, conn: sqlite3.Connection, columns: Dict[str, Any]) -> Optional[Tuple]:
+        """Find the stored (id, property_index, content_hash) for an incoming property"""
+        for column in MATCH_COLUMNS:
+            value = columns[column]
+            if value is None:
+                continue
+            row = conn.execute(
+                f"SELECT id, property_index, content_hash FROM properties WHERE {column} = ? LIMIT 1",
+                (value,)).fetchone()
+            if row:
+                return row
+        return None
+
+    def import_extraction(self, extraction_data: Dict[str, Any], source_file: str = "",
+                          replace: bool = True) -> int:
+        """Load an extraction document into the store
+
+        With replace=True the stored dataset is replaced, otherwise the
+        properties are appended. The import runs in one transaction, so
+        readers see either the previous dataset or the new one.
+        """
+        return self.import_properties(extraction_data.get("properties", []), source_file,
+                                      extraction_data.get("extraction_summary", {}), replace)
+
+    def import_properties(self, properties: Iterable[Dict[str, Any]], source_file: str = "",
+                          summary: Optional[Dict[str, Any]] = None, replace: bool = True) -> int:
+        """
+        Load a stream of property entries into the store
+
+        Entries are consumed one at a time, so an iterator over a large
+        dataset is imported without holding it in memory. Same transaction
+        semantics as import_extraction.
+
+        Returns:
+            Number of properties imported
+        """
+        imported = 0
+        dirty: Set[Tuple[str, str]] = set()
+        with self._write_lock:
+            conn = self.connection()
+            with conn:
+                if replace:
+                    conn.execute("DELETE FROM properties")
+                    conn.execute("DELETE FROM properties_rtree")
+                    aggregates.clear(conn)
+                    price_history.clear(conn)
+                    for prop in properties:
+                        self._insert_property(conn, prop, source_file, dirty)
+                        imported += 1
+                else:
+                    # property_index identifies a property within the dataset, so
+                    # appended entries continue the existing numbering
+                    offset = conn.execute("SELECT COALESCE(MAX(property_index), 0) FROM properties").fetchone()[0]
+                    for prop in properties:
+                        imported += 1
+                        self._insert_property(conn, dict(prop, property_index=offset + imported), source_file, dirty)
+                aggregates.refresh_groups(conn, dirty)
+                self._publish(conn, source_file, summary or {})
+        return imported
+
+    def ingest_extraction(self, extraction_data: Dict[str, Any], source_file: str = "") -> Dict[str, int]:
+        """
+        Incrementally merge an extraction document into the store
+
+        Incoming properties are matched to stored ones by APN, source_property_id
+        or normalized address. Unchanged properties are skipped, changed ones are
+        rewritten in place (keeping their property_index) and unmatched ones are
+        appended. All writes and the version bump happen in one transaction, so
+        readers never see a half-applied update.
+
+        Returns:
+            Counts of inserted, updated and unchanged properties
+        """
+        return self.ingest_properties(extraction_data.get("properties", []), source_file,
+                                      extraction_data.get("extraction_summary", {}))
+
+    def ingest_properties(self, properties: Iterable[Dict[str, Any]], source_file: str = "",
+                          summary: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """Incrementally merge a stream of property entries (see ingest_extraction)"""
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        dirty: Set[Tuple[str, str]] = set()
+        with self._write_lock:
+            conn = self.connection()
+            with conn:
+                next_index = conn.execute("SELECT COALESCE(MAX(property_index), 0) FROM properties").fetchone()[0] + 1
+                for prop in properties:
+                    match = self._match_existing(conn, property_columns(prop))
+                    if match is None:
+                        self._insert_property(conn, dict(prop, property_index=next_index), source_file, dirty)
+                        next_index += 1
+                        counts["inserted"] += 1
+                    elif match[2] == content_hash(prop):
+                        counts["unchanged"] += 1
+                    else:
+                        self._update_property(conn, match[0], dict(prop, property_index=match[1]), source_file, dirty)
+                        counts["updated"] += 1
+
+                if counts["inserted"] or counts["updated"]:
+                    # Only the groups of inserted/updated properties are recomputed
+                    aggregates.refresh_groups(conn, dirty)
+                    self._publish(conn, source_file, summary or {})
+        return counts
+
+    def ingest_file(self, path: str) -> Dict[str, int]:
+        """Incrementally merge an extraction file (JSON or NDJSON) into the store"""
+        properties, summary = open_extraction(path)
+        counts = self.ingest_properties(properties, os.path.basename(path), summary)
+        print(f"✅ Ingested {path}: {counts['inserted']} new, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged (dataset version {self.dataset_version()})")
+        return counts
+
+    def import_file(self, path: str, replace: bool = True) -> int:
+        """Load an extraction file (JSON or NDJSON) into the store"""
+        properties, summary = open_extraction(path)
+        count = self.import_properties(properties, os.path.basename(path), summary, replace)
+        print(f"✅ Imported {count} properties from {path} (dataset version {self.dataset_version()})")
+        return count
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        """Number of stored properties"""
+        return self.connection().execute("SELECT COUNT(*) FROM properties").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        """Whether no property is stored (one index probe, unlike count())"""
+        return self.connection().execute("SELECT 1 FROM properties LIMIT 1").fetchone() is None
+
+    def aggregate_json(self, group_type: str, key: str) -> Optional[str]:
+        """Materialized aggregate of one subdivision/neighborhood/postal_code, as JSON"""
+        return aggregates.read_aggregate(self.connection(), group_type, key)
+
+    def aggregates_json(self, group_type: str) -> List[str]:
+        """Materialized aggregates of every group of one type, as JSON documents"""
+        return aggregates.read_group_type(self.connection(), group_type)
+
+    def price_events(self, postal_code: Optional[str] = None, since: Optional[int] = None,
+                     until: Optional[int] = None, kind: Optional[str] = None) -> List[Tuple]:
+        """Sale/MLS events as (property_index, day, price, kind, event), oldest first (see price_history_index)"""
+        return price_history.query_events(self.connection(), postal_code, since, until, kind)
+
+    def recent_sales(self, postal_code: str, months: int = 24, as_of: Optional[int] = None) -> List[Tuple]:
+        """Sales in a ZIP code over the last `months` months"""
+        return price_history.recent_sales(self.connection(), postal_code, months, as_of)
+
+    def appreciation_rates(self, postal_code: Optional[str] = None) -> Dict[int, float]:
+        """Annualized first-to-last sale appreciation per property_index"""
+        return price_history.appreciation_rates(self.connection(), postal_code)
+
+    def find_address(self, address: str) -> Optional[Dict[str, Any]]:
+        """The stored property entry at a (normalized) address, or None"""
+        key = normalize_address_key(address)
+        if key is None:
+            return None
+        row = self.connection().execute(
+            "SELECT data FROM properties WHERE address_key = ? ORDER BY id LIMIT 1", (key,)).fetchone()
+        return serializer.loads_entry(row[0]) if row else None
+
+    def search(self,
+               limit: Optional[int] = None,
+               near: Optional[Tuple[float, float]] = None,
+               radius_miles: float = 2.0,
+               min_price: Optional[int] = None,
+               max_price: Optional[int] = None,
+               min_sqft: Optional[int] = None,
+               max_sqft: Optional[int] = None,
+               property_type: Optional[str] = None,
+               postal_code: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Query stored properties through the indexes
+
+        Args:
+            limit: Maximum number of properties to return
+            near: (lat, lon) centre of a bounding-box search
+            radius_miles: Half-width of the bounding box around near
+            min_price/max_price: List price range
+            min_sqft/max_sqft: Living sqft range
+            property_type: Exact property type (SFR, Townhome, Condo, ...)
+            postal_code: Exact postal code
+
+        Returns:
+            Iterator of extraction property entries, in import order
+        """
+        sql = "SELECT p.data FROM properties p"
+        where = []
+        params: List[Any] = []
+
+        if near is not None:
+            lat, lon = near
+            lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+            lon_delta = lat_delta / max(0.01, abs(math.cos(math.radians(lat))))
+            sql += " JOIN properties_rtree r ON r.id = p.id"
+            where.append("r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?")
+            params.extend([lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta])
+
+        for column, op, value in (
+                ("list_price", ">=", min_price), ("list_price", "<=", max_price),
+                ("living_sqft", ">=", min_sqft), ("living_sqft", "<=", max_sqft),
+                ("property_type", "=", property_type), ("postal_code", "=", postal_code)):
+            if value is not None:
+                where.append(f"p.{column} {op} ?")
+                params.append(value)
+
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        for (data,) in self.connection().execute(sql, params):
+            yield serializer.loads_entry(data)
+
+
+def read_dataset_version(db_path: str = DEFAULT_STORE_PATH) -> Optional[str]:
+    """Dataset version of the store at db_path, or None if it cannot be read
+
+    Uses a short-lived read-only connection: no schema setup, no aggregate
+    build, and no connection left open (e.g. in a server before it forks).
+    """
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        row = conn.execute("SELECT value FROM store_meta WHERE key = 'dataset_version'").fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else "0"
+
+
+def open_store(db_path: str = DEFAULT_STORE_PATH, seed_file: str = DEFAULT_DATA_FILE) -> PropertyStore:
+    """Open the property store, importing seed_file if the store is empty"""
+    store = PropertyStore(db_path)
+    if store.is_empty() and seed_file and os.path.exists(seed_file):
+        print(f"📥 Property store is empty, importing {seed_file}")
+        store.import_file(seed_file)
+    return store
+
+
+def main():
+    """Import one or more extraction files into the property store"""
+    args = sys.argv[1:]
+    incremental = "--incremental" in args
+    paths = [arg for arg in args if arg != "--incremental"]
+
+    if not paths:
+        print("Usage: python property_store.py [--incremental] <extraction.json|.ndjson> [more ...]")
+        print(f"Example: python property_store.py {DEFAULT_DATA_FILE}")
+        print("         python property_store.py --incremental TAMPA_PROPERTIES_EXTRACTION_<timestamp>.json")
+        print(f"Store: {DEFAULT_STORE_PATH} (set PROPERTY_STORE_DB to change)")
+        sys.exit(1)
+
+    store = PropertyStore(DEFAULT_STORE_PATH)
+    for i, path in enumerate(paths):
+        if incremental:
+            store.ingest_file(path)
+        else:
+            # The first file replaces the stored dataset, the rest are appended
+            store.import_file(path, replace=(i == 0))
+
+    print(f"📊 {store.count()} properties in {DEFAULT_STORE_PATH}")
+
+if __name__ == "__main__":
+    main()
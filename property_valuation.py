@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Property Valuation v6.2 - Sales-comparison estimate from ranked comps
+Adjusted comp sale prices -> estimated value with a confidence band
+
+Each comp's last sale is brought to the valuation date with the market
+appreciation rate (the median first-to-last sale rate of the comps, see
+price_history_index), then adjusted toward the subject for living area,
+bedrooms, bathrooms, age and lot size. The estimate is the mean of the
+adjusted prices weighted by how little each comp had to be adjusted; the
+band is their weighted spread.
+
+Valuations run column-wise over a batch of subjects: every comp of every
+subject becomes one row of flat columns, each adjustment is one pass over
+its columns, and the rows are reduced per subject at the end.
+
+Usage: python property_valuation.py [subjects] [comps_per_subject]
+"""
+
+import math
+import statistics
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Any, NamedTuple, Optional, Sequence
+
+from price_history_index import (MAX_ANNUAL_RATE, MIN_ANNUAL_RATE, MIN_SALE_PRICE, annual_rate, day_date,
+                                 day_int, property_events)
+
+# Adjustment rates (per unit of subject minus comp)
+SQFT_SHARE = 0.5            # fraction of the comp's price per sqft credited per sqft
+BEDROOM_VALUE = 7500
+BATHROOM_VALUE = 10000      # a half bath counts 0.5
+AGE_RATE = 0.003            # fraction of the comp's price per year newer
+LOT_VALUE_PER_SQFT = 1.0
+
+# Comps adjusted by more than this fraction of their price are left out
+MAX_GROSS_ADJUSTMENT = 0.5
+# The band is never narrower than this fraction of the estimate on either side
+MIN_BAND = 0.03
+
+
+class ValuationFacts(NamedTuple):
+    """What a valuation needs from one property; any field may be None"""
+    property_index: Optional[int]
+    living_sqft: Optional[float]
+    bedrooms: Optional[float]
+    bathrooms: Optional[float]
+    year_built: Optional[int]
+    lot_sqft: Optional[float]
+    sale_day: Optional[int]          # YYYYMMDD of the last sale
+    sale_price: Optional[int]
+    appreciation: Optional[float]    # annual rate between its first and last sale
+
+
+# A subject not found in the store: comps are only adjusted for time
+UNKNOWN_SUBJECT = ValuationFacts(*[None] * len(ValuationFacts._fields))
+
+
+def _details(prop: Dict[str, Any], source: str) -> Dict[str, Any]:
+    extraction = prop.get(f"{source}_extraction") or {}
+    return extraction.get("PropertyDetails") or {}
+
+
+def valuation_facts(prop: Dict[str, Any]) -> ValuationFacts:
+    """ValuationFacts of an extraction property entry (REAPI preferred, Zillow fills the gaps)"""
+    identifications = [_details(prop, source).get("identification") or {} for source in ("reapi", "zillow")]
+
+    def first(field: str) -> Any:
+        for identification in identifications:
+            value = identification.get(field)
+            if value not in (None, ""):
+                return value
+        return None
+
+    bathrooms = first("bathrooms_full")
+    if bathrooms is not None:
+        bathrooms += 0.5 * (first("bathrooms_half") or 0)
+
+    sales = sorted((day, price) for day, price, kind, _ in property_events(prop)
+                   if kind == "sale" and price >= MIN_SALE_PRICE)
+    return ValuationFacts(
+        property_index=prop.get("property_index"),
+        living_sqft=first("living_sqft"),
+        bedrooms=first("bedrooms"),
+        bathrooms=bathrooms,
+        year_built=first("year_built"),
+        lot_sqft=first("lot_sqft"),
+        sale_day=sales[-1][0] if sales else None,
+        sale_price=sales[-1][1] if sales else None,
+        appreciation=annual_rate(sales[0], sales[-1]) if len(sales) >= 2 else None
+    )
+
+
+def _difference(subject_values: List[Any], comp_values: List[Any]) -> List[float]:
+    """Subject minus comp per row, 0 where either side is unknown"""
+    return [s - c if s is not None and c is not None else 0
+            for s, c in zip(subject_values, comp_values)]
+
+
+def value_batch(subjects: Sequence[ValuationFacts], comps: Sequence[Sequence[ValuationFacts]],
+                as_of: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Value a batch of subjects from their ranked comps
+
+    Args:
+        subjects: Subject facts (unknown fields are simply not adjusted for)
+        comps: Comp facts of each subject, in rank order; comps without a
+            sale or equal to their subject are skipped
+        as_of: Valuation day (YYYYMMDD), today by default
+
+    Returns:
+        One valuation section per subject, or None when no comp is usable
+    """
+    as_of = as_of if as_of is not None else day_int(date.today())
+    as_of_date = day_date(as_of)
+
+    # Flatten to one row per usable (subject, comp) pair
+    rows: List[int] = []
+    flat: List[ValuationFacts] = []
+    for i, (subject, subject_comps) in enumerate(zip(subjects, comps)):
+        for comp in subject_comps:
+            if comp.sale_price and comp.sale_day and (
+                    subject.property_index is None or comp.property_index != subject.property_index):
+                rows.append(i)
+                flat.append(comp)
+
+    # Market appreciation per subject: the median rate of its comps (rates
+    # outside the annual_rate band are left out, whoever built the facts)
+    rates: Dict[int, List[float]] = {}
+    for i, comp in zip(rows, flat):
+        if comp.appreciation is not None and MIN_ANNUAL_RATE <= comp.appreciation <= MAX_ANNUAL_RATE:
+            rates.setdefault(i, []).append(comp.appreciation)
+    market_rate = {i: statistics.median(values) for i, values in rates.items()}
+
+    # Time adjustment
+    years = [max(0, (as_of_date - day_date(c.sale_day)).days) / 365.25 for c in flat]
+    price = [c.sale_price * (1 + market_rate.get(i, 0.0)) ** y for i, c, y in zip(rows, flat, years)]
+
+    def column(field: str, source: Sequence[ValuationFacts]) -> List[Any]:
+        return [getattr(facts, field) for facts in source]
+
+    subject_rows = [subjects[i] for i in rows]
+    comp_sqft = column("living_sqft", flat)
+    adjustments = [
+        [d * p / s * SQFT_SHARE if s else 0
+         for d, p, s in zip(_difference(column("living_sqft", subject_rows), comp_sqft), price, comp_sqft)],
+        [d * BEDROOM_VALUE for d in _difference(column("bedrooms", subject_rows), column("bedrooms", flat))],
+        [d * BATHROOM_VALUE for d in _difference(column("bathrooms", subject_rows), column("bathrooms", flat))],
+        [d * AGE_RATE * p
+         for d, p in zip(_difference(column("year_built", subject_rows), column("year_built", flat)), price)],
+        [d * LOT_VALUE_PER_SQFT for d in _difference(column("lot_sqft", subject_rows), column("lot_sqft", flat))]
+    ]
+    net = [sum(values) for values in zip(*adjustments)] if flat else []
+    gross = [sum(abs(v) for v in values) / p for values, p in zip(zip(*adjustments), price)] if flat else []
+
+    # Reduce per subject
+    grouped: Dict[int, List[tuple]] = {}
+    for i, p, n, g in zip(rows, price, net, gross):
+        if g <= MAX_GROSS_ADJUSTMENT:
+            grouped.setdefault(i, []).append((p + n, 1 / (1 + 10 * g)))
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for i in range(len(subjects)):
+        values = grouped.get(i)
+        if not values:
+            results.append(None)
+            continue
+        total_weight = sum(w for _, w in values)
+        estimate = sum(v * w for v, w in values) / total_weight
+        spread = math.sqrt(sum(w * (v - estimate) ** 2 for v, w in values) / total_weight)
+        band = max(spread, MIN_BAND * estimate)
+        variation = spread / estimate if estimate > 0 else None
+        if variation is None:
+            confidence = "low"
+        elif len(values) >= 5 and variation <= 0.10:
+            confidence = "high"
+        elif len(values) >= 3 and variation <= 0.20:
+            confidence = "medium"
+        else:
+            confidence = "low"
+        results.append({
+            "estimated_value": int(round(estimate, -2)),
+            "value_low": int(round(estimate - band, -2)),
+            "value_high": int(round(estimate + band, -2)),
+            "confidence": confidence,
+            "comps_used": len(values),
+            "coefficient_of_variation": round(variation, 4) if variation is not None else None,
+            "annual_appreciation": round(market_rate[i], 4) if i in market_rate else None,
+            "as_of": as_of_date.isoformat()
+        })
+    return results
+
+
+def value_subject(subject: ValuationFacts, comps: Sequence[ValuationFacts],
+                  as_of: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Valuation section of one subject"""
+    return value_batch([subject], [comps], as_of)[0]
+
+
+def main():
+    """Benchmark: value every Nth generated property from its neighbours"""
+    from generate_tampa_properties import TampaPropertiesGenerator
+
+    subjects_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    comps_per_subject = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    print(f"🏗️ Generating {subjects_count + comps_per_subject} properties...")
+    facts = [valuation_facts(prop) for prop in TampaPropertiesGenerator(verbose=False).iter_bulk_properties(
+        subjects_count + comps_per_subject, seed=42)]
+    subjects = facts[:subjects_count]
+    comps = [facts[i + 1:i + 1 + comps_per_subject] for i in range(subjects_count)]
+
+    start = time.perf_counter()
+    results = value_batch(subjects, comps)
+    elapsed = time.perf_counter() - start
+
+    valued = [r for r in results if r is not None]
+    print(f"💰 Valued {len(valued)}/{subjects_count} subjects with {comps_per_subject} comps each "
+          f"in {elapsed:.2f}s ({subjects_count / elapsed:,.0f} subjects/s)")
+    for level in ("high", "medium", "low"):
+        print(f"   {level}: {sum(1 for r in valued if r['confidence'] == level)}")
+    if valued:
+        print(f"   Median estimate: ${statistics.median(r['estimated_value'] for r in valued):,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -17,13 +17,17 @@ Version: v6.0 Real Data Extraction
 Date: May 2025
 """
 
-import requests
 import json
 import sys
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from address_normalizer import format_address
+from extraction_ndjson import ExtractionCheckpoint, write_extraction_ndjson
 from property_mapper_v6_0 import PropertyMapperV60
+from property_matching import MIN_CONFIDENCE, pair_confidence
+from search_fanout import SearchPage, fan_out
+from upstream_resilience import upstream
 from zillow_live_fetcher_v6_0 import ZillowLiveFetcherV60
 
 class RealPropertyExtractor:
@@ -47,20 +51,19 @@ class RealPropertyExtractor:
         print("🏠 Real Property Extractor v6.0 initialized")
         print("🎯 Ready to extract REAL data for multiple properties")
         
-    def search_properties_zillow(self, address: str, radius_miles: float = 2.0) -> List[Dict[str, Any]]:
+    def search_page_zillow(self, address: str,
+                           page: int) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
         """
-        Search for properties around the given address using Zillow
+        Fetch one page of Zillow search results around the given address
         
         Args:
             address: Target address to search around
-            radius_miles: Search radius in miles
+            page: 1-based results page
             
         Returns:
-            List of property search results
+            (property search results, total pages reported by Zillow);
+            None if the request failed
         """
-        print(f"🔍 Searching for properties around: {address}")
-        print(f"📍 Search radius: {radius_miles} miles")
-        
         try:
             # Use Zillow search API
             url = "https://zillow-com1.p.rapidapi.com/propertyExtendedSearch"
@@ -70,24 +73,72 @@ class RealPropertyExtractor:
                 "status_type": "ForSale",
                 "home_type": "Houses",
                 "sort": "Newest",
-                "page": "1"
+                "page": str(page)
             }
             
-            response = requests.get(url, headers=self.zillow_headers, params=params, timeout=30)
+            response = upstream.get(url, headers=self.zillow_headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
-                properties = data.get("props", [])
-                print(f"✅ Found {len(properties)} properties in search results")
-                return properties
+                return data.get("props", []), data.get("totalPages")
             else:
-                print(f"❌ Search failed with status {response.status_code}")
-                return []
+                print(f"❌ Search page {page} failed with status {response.status_code}")
+                return None
                 
         except Exception as e:
-            print(f"❌ Error searching properties: {str(e)}")
-            return []
+            print(f"❌ Error searching properties (page {page}): {str(e)}")
+            return None
+    
+    def search_pages_zillow(self, address: str, max_results: int, known: Iterable[Dict[str, Any]] = (),
+                            first_page: int = 1) -> Iterator[SearchPage]:
+        """
+        Search Zillow page by page, fetching later pages concurrently
+        
+        Args:
+            address: Target address to search around
+            max_results: Stop once this many unique properties were found
+            known: Search results already collected (not returned again)
+            first_page: Page to start from
+            
+        Returns:
+            Iterator of SearchPage in page order, each with the properties not
+            seen before (by ZPID or address)
+        """
+        print(f"🔍 Searching for properties around: {address}")
+        for page in fan_out(lambda number: self.search_page_zillow(address, number), max_results,
+                            lambda prop: prop.get("zpid"), self._search_result_address, known, first_page):
+            if page.failed:
+                print(f"❌ Search page {page.number} could not be fetched; search results end at page {page.number - 1}")
+            else:
+                print(f"📄 Search page {page.number}: {page.found} results, {len(page.candidates)} new")
+            yield page
+    
+    def search_properties_zillow(self, address: str, radius_miles: float = 2.0,
+                                 max_results: int = 25) -> List[Dict[str, Any]]:
+        """
+        Search for properties around the given address using Zillow
+        
+        Args:
+            address: Target address to search around
+            radius_miles: Search radius in miles
+            max_results: Maximum number of unique properties
+            
+        Returns:
+            List of property search results, deduplicated by ZPID and address
+        """
+        print(f"📍 Search radius: {radius_miles} miles")
+        properties = [prop for page in self.search_pages_zillow(address, max_results) for prop in page.candidates]
+        print(f"✅ Found {len(properties)} properties in search results")
+        return properties
     
+    def _search_result_address(self, prop: Dict[str, Any]) -> str:
+        """Canonical full address of a Zillow search result ("" if it has none)"""
+        address = prop.get("address") or {}
+        if isinstance(address, str):
+            return format_address(address)
+        return format_address(address.get("streetAddress"), address.get("city"),
+                              address.get("state"), address.get("zipcode"))
+
     def extract_real_zillow_data(self, zpid: str) -> Optional[Dict[str, Any]]:
         """
         Extract REAL Zillow data for a specific property
@@ -154,13 +205,21 @@ class RealPropertyExtractor:
             print(f"❌ Error extracting REAPI data for {address}: {str(e)}")
             return None
     
-    def extract_multiple_properties(self, target_address: str, max_properties: int = 25) -> Dict[str, Any]:
+    def extract_multiple_properties(self, target_address: str, max_properties: int = 25,
+                                    checkpoint: Optional[ExtractionCheckpoint] = None,
+                                    resume: bool = False) -> Dict[str, Any]:
         """
         Extract real data for multiple properties around target address
         
+        Search pages are fetched concurrently and each property is extracted
+        as soon as its page arrives.
+        
         Args:
             target_address: Address to search around
             max_properties: Maximum number of properties to process
+            checkpoint: Journal each completed property here
+            resume: Continue the extraction recorded in checkpoint: its search
+                results are reused and finished properties are not fetched again
             
         Returns:
             Dictionary containing all extracted property data
@@ -172,38 +231,53 @@ class RealPropertyExtractor:
         print(f"🔍 Extracting REAL Zillow + REAPI data for each property")
         print("=" * 80)
         
-        # Search for properties
-        search_results = self.search_properties_zillow(target_address)
-        
-        if not search_results:
-            print("❌ No properties found in search")
-            return {}
+        header, finished = self._load_checkpoint(checkpoint, target_address, max_properties) if resume else (None, [])
         
-        # Limit to max_properties
-        properties_to_process = search_results[:max_properties]
-        print(f"📋 Processing {len(properties_to_process)} properties...")
+        if header is not None:
+            print(f"♻️ Resuming from {checkpoint.path}: {len(finished)}/{len(header['candidates'])} "
+                  f"properties already extracted")
+            checkpoint.resume()
+        else:
+            header = {
+                "target_address": target_address,
+                "max_properties": max_properties,
+                "extraction_timestamp": datetime.now().isoformat(),
+                "total_properties_found": 0,
+                "search_pages": 0,
+                "candidates": []
+            }
+            if checkpoint is not None:
+                checkpoint.start(header)
+                print(f"📝 Checkpointing to {checkpoint.path} (rerun with --resume to continue after a failure)")
         
         extracted_data = {
             "extraction_summary": {
                 "target_address": target_address,
-                "extraction_timestamp": datetime.now().isoformat(),
-                "total_properties_found": len(search_results),
-                "properties_processed": len(properties_to_process),
+                "extraction_timestamp": header["extraction_timestamp"],
+                "total_properties_found": header["total_properties_found"],
+                "properties_processed": 0,
                 "successful_extractions": 0,
                 "failed_extractions": 0
             },
             "properties": []
         }
+        finished_by_index = {entry["property_index"]: entry for entry in finished}
         
-        # Process each property
-        for i, prop in enumerate(properties_to_process, 1):
-            print(f"\n🏠 Processing Property {i}/{len(properties_to_process)}")
+        # Process each property: known candidates first, then new ones as search pages arrive
+        candidates = self._stream_candidates(target_address, max_properties, header, checkpoint,
+                                             extracted_data["extraction_summary"])
+        for i, prop in enumerate(candidates, 1):
+            extracted_data["extraction_summary"]["properties_processed"] = i
+            if i in finished_by_index:
+                self._add_property(extracted_data, finished_by_index[i])
+                continue
+            
+            print(f"\n🏠 Processing Property {i}/{max_properties}")
             print("-" * 50)
             
             # Extract basic info from search result
             zpid = prop.get("zpid")
-            address = prop.get("address", {})
-            full_address = f"{address.get('streetAddress', '')}, {address.get('city', '')}, {address.get('state', '')} {address.get('zipcode', '')}"
+            full_address = self._search_result_address(prop)
             
             print(f"Address: {full_address}")
             print(f"ZPID: {zpid}")
@@ -244,26 +318,114 @@ class RealPropertyExtractor:
             else:
                 print("⚠️ No valid address for REAPI extraction")
             
-            # Update summary
-            if property_data["extraction_status"]["zillow_success"] or property_data["extraction_status"]["reapi_success"]:
-                extracted_data["extraction_summary"]["successful_extractions"] += 1
-            else:
-                extracted_data["extraction_summary"]["failed_extractions"] += 1
+            # The REAPI lookup is by address string; only merge it if both records describe the same house
+            self._link_sources(property_data)
             
-            extracted_data["properties"].append(property_data)
+            self._add_property(extracted_data, property_data)
+            if checkpoint is not None:
+                checkpoint.append(property_data)
             
             # Rate limiting
             time.sleep(1)  # 1 second between requests
         
+        if checkpoint is not None:
+            checkpoint.close()
+        if not extracted_data["properties"]:
+            print("❌ No properties found in search")
+            if checkpoint is not None:
+                checkpoint.discard()
+            return {}
         return extracted_data
     
-    def save_extraction_results(self, extraction_data: Dict[str, Any], target_address: str) -> str:
+    def _stream_candidates(self, target_address: str, max_properties: int, header: Dict[str, Any],
+                           checkpoint: Optional[ExtractionCheckpoint],
+                           summary: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """The checkpoint's candidates, then new search results up to max_properties as pages arrive
+        
+        Each page's new candidates are journalled before any of them is
+        extracted, so a resumed run numbers the properties the same way and
+        continues the search after the last journalled page. A page that
+        could not be fetched ends the search without being journalled, so
+        --resume fetches it again. (Checkpoints written before the fan-out
+        hold the candidates of page 1 only.)
+        """
+        known = header["candidates"]
+        yield from known
+        if len(known) >= max_properties:
+            return
+        first_page = header.get("search_pages", 1) + 1
+        for page in self.search_pages_zillow(target_address, max_properties - len(known), known, first_page):
+            if page.failed:
+                # Not journalled: a resumed run searches from this page again
+                summary["search_failed_page"] = page.number
+                return
+            summary["total_properties_found"] += page.found
+            if checkpoint is not None:
+                checkpoint.add_candidates(page.number, page.found, page.candidates)
+            yield from page.candidates
+    
+    def _load_checkpoint(self, checkpoint: Optional[ExtractionCheckpoint], target_address: str,
+                         max_properties: int) -> tuple:
+        """(header, finished property entries) of a resumable checkpoint, or (None, [])"""
+        if checkpoint is None or not checkpoint.exists():
+            print("⚠️ No checkpoint to resume, starting a new extraction")
+            return None, []
+        header, finished = checkpoint.load()
+        if header is None or header.get("target_address") != target_address \
+                or header.get("max_properties") != max_properties:
+            print(f"⚠️ Checkpoint {checkpoint.path} is for a different extraction, starting over")
+            return None, []
+        return header, finished
+    
+    @staticmethod
+    def _link_sources(property_data: Dict[str, Any]):
+        """Score the Zillow/REAPI pair of a property and drop a REAPI record below MIN_CONFIDENCE
+        
+        An unlinked REAPI record describes some other house, so it is not
+        merged (the store would index it as this property); entity_match
+        keeps its score and source_property_id.
+        """
+        entity_match = pair_confidence(property_data["zillow_extraction"], property_data["reapi_extraction"])
+        if entity_match is None:
+            return
+        entity_match["linked"] = entity_match["confidence"] >= MIN_CONFIDENCE
+        property_data["entity_match"] = entity_match
+        if entity_match["linked"]:
+            print(f"🔗 Entity match: {entity_match['method']} (confidence {entity_match['confidence']:.2f})")
+            return
+        
+        print(f"⚠️ Zillow and REAPI records are different properties "
+              f"(confidence {entity_match['confidence']:.2f}), REAPI record not merged")
+        reapi_details = property_data["reapi_extraction"].get("PropertyDetails") or {}
+        entity_match["unlinked_reapi_property_id"] = (reapi_details.get("meta_data") or {}).get("source_property_id")
+        property_data["reapi_extraction"] = None
+        property_data["extraction_status"]["reapi_success"] = False
+    
+    @staticmethod
+    def _add_property(extracted_data: Dict[str, Any], property_data: Dict[str, Any]):
+        """Append a processed property and count it in the summary"""
+        status = property_data["extraction_status"]
+        if status["zillow_success"] or status["reapi_success"]:
+            extracted_data["extraction_summary"]["successful_extractions"] += 1
+        else:
+            extracted_data["extraction_summary"]["failed_extractions"] += 1
+        extracted_data["properties"].append(property_data)
+    
+    @staticmethod
+    def checkpoint_path(target_address: str, max_properties: int) -> str:
+        """Checkpoint file of an extraction (stable across runs, so --resume finds it)"""
+        clean_address = target_address.replace(" ", "_").replace(",", "").replace("/", "_")
+        return f"EXTRACTION_CHECKPOINT_{clean_address}_{max_properties}.ndjson"
+    
+    def save_extraction_results(self, extraction_data: Dict[str, Any], target_address: str,
+                                ndjson: bool = False) -> str:
         """
-        Save extraction results to JSON file
+        Save extraction results to a JSON (or NDJSON) file
         
         Args:
             extraction_data: Complete extraction results
             target_address: Target address used for search
+            ndjson: Write one property per line with a summary trailer
             
         Returns:
             Filename of saved results
@@ -271,10 +433,13 @@ class RealPropertyExtractor:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         # Clean address for filename
         clean_address = target_address.replace(" ", "_").replace(",", "").replace("/", "_")
-        filename = f"REAL_PROPERTY_EXTRACTION_{clean_address}_{timestamp}.json"
+        filename = f"REAL_PROPERTY_EXTRACTION_{clean_address}_{timestamp}.{'ndjson' if ndjson else 'json'}"
         
-        with open(filename, 'w') as f:
-            json.dump(extraction_data, f, indent=2)
+        if ndjson:
+            write_extraction_ndjson(filename, extraction_data["properties"], extraction_data["extraction_summary"])
+        else:
+            with open(filename, 'w') as f:
+                json.dump(extraction_data, f, indent=2)
         
         print(f"💾 Results saved to: {filename}")
         return filename
@@ -310,22 +475,31 @@ class RealPropertyExtractor:
 
 def main():
     """Main function for real property extraction"""
-    if len(sys.argv) < 2:
-        print("Usage: python real_property_extractor.py '<address>' [max_properties]")
+    args = [arg for arg in sys.argv[1:] if arg not in ("--ndjson", "--resume")]
+    ndjson = "--ndjson" in sys.argv[1:]
+    resume = "--resume" in sys.argv[1:]
+    if len(args) < 1:
+        print("Usage: python real_property_extractor.py '<address>' [max_properties] [--ndjson] [--resume]")
         print("Example: python real_property_extractor.py '7709 Palmbrook Dr, Tampa, FL 33615' 25")
         sys.exit(1)
     
-    target_address = sys.argv[1]
-    max_properties = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    target_address = args[0]
+    max_properties = int(args[1]) if len(args) > 1 else 25
     
     extractor = RealPropertyExtractor()
+    checkpoint = ExtractionCheckpoint(extractor.checkpoint_path(target_address, max_properties))
     
     # Extract real data for multiple properties
-    results = extractor.extract_multiple_properties(target_address, max_properties)
+    results = extractor.extract_multiple_properties(target_address, max_properties, checkpoint, resume)
     
     if results:
-        # Save results
-        filename = extractor.save_extraction_results(results, target_address)
+        # Save results; the checkpoint is no longer needed once they are on disk
+        filename = extractor.save_extraction_results(results, target_address, ndjson)
+        failed_page = results["extraction_summary"].get("search_failed_page")
+        if failed_page is None:
+            checkpoint.discard()
+        else:
+            print(f"⚠️ Search stopped at page {failed_page}; rerun with --resume to continue from it")
         
         # Print summary
         extractor.print_extraction_summary(results)
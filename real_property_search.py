@@ -14,12 +14,18 @@ Version: v6.0 Real Data Solution
 Date: May 2025
 """
 
-import requests
 import json
 import sys
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from address_normalizer import address_key, normalize_address, parse_address
+from extraction_ndjson import write_extraction_ndjson
+from search_fanout import SearchPage, fan_out
+from upstream_resilience import upstream
+
+# Realty Mole listings per search request (pages are fetched concurrently)
+SEARCH_PAGE_SIZE = 50
 
 class RealPropertySearch:
     """Search and extract real property data"""
@@ -40,72 +46,126 @@ class RealPropertySearch:
             "x-rapidapi-host": "zillow-com1.p.rapidapi.com"
         }
         
+        # Geocoded coordinates by address key, so spellings of one address share a lookup
+        self._coordinates: Dict[str, tuple] = {}
+        
         print("🏠 Real Property Search v6.0 initialized")
         print("🎯 Using alternative APIs for real property discovery")
         
-    def search_properties_by_area(self, address: str, radius_miles: float = 2.0) -> List[Dict[str, Any]]:
+    def search_page_by_area(self, lat: float, lon: float, radius_miles: float,
+                            page: int) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
         """
-        Search for properties in the area using Realty Mole API
+        Fetch one page of Realty Mole properties around a point
         
         Args:
-            address: Target address
+            lat, lon: Search centre
             radius_miles: Search radius
+            page: 1-based page of SEARCH_PAGE_SIZE properties
             
         Returns:
-            List of properties found
+            (properties, total pages if this page is the last one else None);
+            None if the request failed
         """
-        print(f"🔍 Searching properties around: {address}")
-        
         try:
-            # First get coordinates for the address
-            coords = self.get_coordinates(address)
-            if not coords:
-                print("❌ Could not get coordinates for address")
-                return []
-            
-            lat, lon = coords
-            print(f"📍 Coordinates: {lat}, {lon}")
-            
-            # Search for properties in the area
             url = "https://realty-mole-property-api.p.rapidapi.com/properties"
             
             params = {
                 "latitude": str(lat),
                 "longitude": str(lon),
                 "radius": str(radius_miles),
-                "limit": "25"
+                "limit": str(SEARCH_PAGE_SIZE),
+                "offset": str((page - 1) * SEARCH_PAGE_SIZE)
             }
             
-            response = requests.get(url, headers=self.search_headers, params=params, timeout=30)
+            response = upstream.get(url, headers=self.search_headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
                 properties = data if isinstance(data, list) else data.get("properties", [])
-                print(f"✅ Found {len(properties)} properties in area")
-                return properties
+                # Realty Mole reports no page count; a short page is the last one
+                return properties, page if len(properties) < SEARCH_PAGE_SIZE else None
             else:
-                print(f"❌ Property search failed with status {response.status_code}")
-                return []
+                print(f"❌ Property search page {page} failed with status {response.status_code}")
+                return None
                 
         except Exception as e:
-            print(f"❌ Error searching properties: {str(e)}")
-            return []
+            print(f"❌ Error searching properties (page {page}): {str(e)}")
+            return None
+    
+    def search_pages_by_area(self, address: str, max_results: int,
+                             radius_miles: float = 2.0) -> Iterator[SearchPage]:
+        """
+        Search the area page by page, fetching later pages concurrently
+        
+        Args:
+            address: Target address
+            max_results: Stop once this many unique properties were found
+            radius_miles: Search radius
+            
+        Returns:
+            Iterator of SearchPage in page order, each with the properties not
+            seen before (by id or address)
+        """
+        print(f"🔍 Searching properties around: {address}")
+        
+        # First get coordinates for the address
+        coords = self.get_coordinates(address)
+        if not coords:
+            print("❌ Could not get coordinates for address")
+            return
+        
+        lat, lon = coords
+        print(f"📍 Coordinates: {lat}, {lon}")
+        
+        for page in fan_out(lambda number: self.search_page_by_area(lat, lon, radius_miles, number), max_results,
+                            lambda prop: prop.get("id"), lambda prop: prop.get("address"),
+                            page_size=SEARCH_PAGE_SIZE):
+            if page.failed:
+                print(f"❌ Search page {page.number} could not be fetched; search results end at page {page.number - 1}")
+            else:
+                print(f"📄 Search page {page.number}: {page.found} results, {len(page.candidates)} new")
+            yield page
+    
+    def search_properties_by_area(self, address: str, radius_miles: float = 2.0,
+                                  max_results: int = 25) -> List[Dict[str, Any]]:
+        """
+        Search for properties in the area using Realty Mole API
+        
+        Args:
+            address: Target address
+            radius_miles: Search radius
+            max_results: Maximum number of unique properties
+            
+        Returns:
+            List of properties found, deduplicated by id and address
+        """
+        properties = [prop for page in self.search_pages_by_area(address, max_results, radius_miles)
+                      for prop in page.candidates]
+        print(f"✅ Found {len(properties)} properties in area")
+        return properties
     
     def get_coordinates(self, address: str) -> Optional[tuple]:
         """Get lat/lon coordinates for an address"""
+        key = address_key(address)
+        if key in self._coordinates:
+            return self._coordinates[key]
+        
         try:
             # Use a geocoding service
             url = "https://realty-mole-property-api.p.rapidapi.com/address"
-            params = {"address": address}
+            params = {"address": normalize_address(address)}
             
-            response = requests.get(url, headers=self.search_headers, params=params, timeout=30)
+            response = upstream.get(url, headers=self.search_headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
                 lat = data.get("latitude")
                 lon = data.get("longitude")
                 if lat and lon:
-                    return (float(lat), float(lon))
+                    coordinates = (float(lat), float(lon))
+                    if key is not None:
+                        self._coordinates[key] = coordinates
+                    return coordinates
             
             # Fallback coordinates for Tampa area
             print("⚠️ Using fallback coordinates for Tampa area")
@@ -133,7 +193,7 @@ class RealPropertySearch:
             url = "https://realty-mole-property-api.p.rapidapi.com/property"
             params = {"address": address}
             
-            response = requests.get(url, headers=self.search_headers, params=params, timeout=30)
+            response = upstream.get(url, headers=self.search_headers, params=params)
             
             if response.status_code == 200:
                 detailed_data = response.json()
@@ -151,25 +211,18 @@ class RealPropertySearch:
         """Convert property data to REAPI-style PropertyDetails format"""
         
         # Extract address components
-        address = property_data.get("address", "")
-        address_parts = address.split(", ") if address else []
-        
-        street = address_parts[0] if len(address_parts) > 0 else ""
-        city = address_parts[1] if len(address_parts) > 1 else ""
-        state_zip = address_parts[2] if len(address_parts) > 2 else ""
-        state = state_zip.split()[0] if state_zip else ""
-        postal_code = state_zip.split()[1] if len(state_zip.split()) > 1 else ""
+        parsed = parse_address(property_data.get("address") or "")
         
         # Build PropertyDetails structure
         property_details = {
             "PropertyDetails": {
                 "identification": {
                     "apn": property_data.get("parcelNumber", ""),
-                    "address_full": address,
-                    "street": street,
-                    "city": city,
-                    "state": state,
-                    "postal_code": postal_code,
+                    "address_full": parsed.full,
+                    "street": parsed.street,
+                    "city": parsed.city or "",
+                    "state": parsed.state or "",
+                    "postal_code": parsed.postal_code,
                     "zoning": property_data.get("zoning", ""),
                     "property_type": self.map_property_type(property_data.get("propertyType", "")),
                     "property_use": property_data.get("propertyUse", ""),
@@ -233,24 +286,17 @@ class RealPropertySearch:
         """Convert property data to Zillow-style PropertyDetails format"""
         
         # Extract address components
-        address = property_data.get("address", "")
-        address_parts = address.split(", ") if address else []
-        
-        street = address_parts[0] if len(address_parts) > 0 else ""
-        city = address_parts[1] if len(address_parts) > 1 else ""
-        state_zip = address_parts[2] if len(address_parts) > 2 else ""
-        state = state_zip.split()[0] if state_zip else ""
-        postal_code = state_zip.split()[1] if len(state_zip.split()) > 1 else ""
+        parsed = parse_address(property_data.get("address") or "")
         
         # Build Zillow-style PropertyDetails (AS-IS fields only)
         property_details = {
             "PropertyDetails": {
                 "identification": {
-                    "address_full": address,
-                    "street": street,
-                    "city": city,
-                    "state": state,
-                    "postal_code": postal_code,
+                    "address_full": parsed.full,
+                    "street": parsed.street,
+                    "city": parsed.city or "",
+                    "state": parsed.state or "",
+                    "postal_code": parsed.postal_code,
                     "property_type": self.map_property_type(property_data.get("propertyType", "")),
                     "year_built": property_data.get("yearBuilt"),
                     "living_sqft": property_data.get("squareFootage"),
@@ -332,6 +378,9 @@ class RealPropertySearch:
         """
         Extract real data for multiple properties around target address
         
+        Search pages are fetched concurrently and each property is extracted
+        as soon as its page arrives.
+        
         Args:
             target_address: Address to search around
             max_properties: Maximum number of properties to process
@@ -346,32 +395,31 @@ class RealPropertySearch:
         print(f"🔍 Extracting REAL property data using alternative APIs")
         print("=" * 80)
         
-        # Search for properties
-        search_results = self.search_properties_by_area(target_address)
-        
-        if not search_results:
-            print("❌ No properties found in search")
-            return {}
-        
-        # Limit to max_properties
-        properties_to_process = search_results[:max_properties]
-        print(f"📋 Processing {len(properties_to_process)} properties...")
-        
         extracted_data = {
             "extraction_summary": {
                 "target_address": target_address,
                 "extraction_timestamp": datetime.now().isoformat(),
-                "total_properties_found": len(search_results),
-                "properties_processed": len(properties_to_process),
+                "total_properties_found": 0,
+                "properties_processed": 0,
                 "successful_extractions": 0,
                 "failed_extractions": 0
             },
             "properties": []
         }
-        
-        # Process each property
-        for i, prop in enumerate(properties_to_process, 1):
-            print(f"\n🏠 Processing Property {i}/{len(properties_to_process)}")
+        summary = extracted_data["extraction_summary"]
+        
+        def candidates():
+            for page in self.search_pages_by_area(target_address, max_properties):
+                if page.failed:
+                    summary["search_failed_page"] = page.number
+                    return
+                summary["total_properties_found"] += page.found
+                yield from page.candidates
+        
+        # Process each property as its search page arrives
+        for i, prop in enumerate(candidates(), 1):
+            summary["properties_processed"] = i
+            print(f"\n🏠 Processing Property {i}/{max_properties}")
             print("-" * 50)
             
             address = prop.get("address", "Unknown Address")
@@ -422,16 +470,23 @@ class RealPropertySearch:
             # Rate limiting
             time.sleep(0.5)  # 0.5 second between requests
         
+        if not extracted_data["properties"]:
+            print("❌ No properties found in search")
+            return {}
         return extracted_data
     
-    def save_extraction_results(self, extraction_data: Dict[str, Any], target_address: str) -> str:
-        """Save extraction results to JSON file"""
+    def save_extraction_results(self, extraction_data: Dict[str, Any], target_address: str,
+                                ndjson: bool = False) -> str:
+        """Save extraction results to a JSON (or NDJSON) file"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         clean_address = target_address.replace(" ", "_").replace(",", "").replace("/", "_")
-        filename = f"REAL_PROPERTY_EXTRACTION_{clean_address}_{timestamp}.json"
+        filename = f"REAL_PROPERTY_EXTRACTION_{clean_address}_{timestamp}.{'ndjson' if ndjson else 'json'}"
         
-        with open(filename, 'w') as f:
-            json.dump(extraction_data, f, indent=2)
+        if ndjson:
+            write_extraction_ndjson(filename, extraction_data["properties"], extraction_data["extraction_summary"])
+        else:
+            with open(filename, 'w') as f:
+                json.dump(extraction_data, f, indent=2)
         
         print(f"💾 Results saved to: {filename}")
         return filename
@@ -468,13 +523,15 @@ class RealPropertySearch:
 
 def main():
     """Main function for real property search and extraction"""
-    if len(sys.argv) < 2:
-        print("Usage: python real_property_search.py '<address>' [max_properties]")
+    args = [arg for arg in sys.argv[1:] if arg != "--ndjson"]
+    ndjson = "--ndjson" in sys.argv[1:]
+    if len(args) < 1:
+        print("Usage: python real_property_search.py '<address>' [max_properties] [--ndjson]")
         print("Example: python real_property_search.py '7709 Palmbrook Dr, Tampa, FL 33615' 25")
         sys.exit(1)
     
-    target_address = sys.argv[1]
-    max_properties = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    target_address = args[0]
+    max_properties = int(args[1]) if len(args) > 1 else 25
     
     searcher = RealPropertySearch()
     
@@ -483,7 +540,7 @@ def main():
     
     if results:
         # Save results
-        filename = searcher.save_extraction_results(results, target_address)
+        filename = searcher.save_extraction_results(results, target_address, ndjson)
         
         # Print summary
         searcher.print_extraction_summary(results)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Search Fan-out v6.2 - Concurrent multi-page search with dedup
+Listing search pages fetched ahead in parallel, yielded in page order
+
+Search APIs return one page of listings per request. fan_out keeps up to
+SEARCH_PAGE_WORKERS (default 4) pages in flight and hands each page's new
+listings to the caller as soon as that page and every page before it have
+arrived, so extraction starts on page 1 while later pages are fetched.
+
+Listings are deduplicated across pages by source id (ZPID, Realty Mole id)
+and by address key. Fetching stops once max_results unique listings are
+collected, at the last page (an empty page, or the total page count the
+API reports), or after SEARCH_MAX_PAGES pages (default 20); requests
+still in flight are abandoned. No more pages are in flight than the
+remaining listings could need at the API's page size (when the caller
+knows it) or the largest page seen so far.
+
+A page whose request failed is retried SEARCH_PAGE_RETRIES times (default
+1, on top of the upstream client's own retries). If it still fails the
+search stops there and a SearchPage with failed=True is yielded last, so
+the caller can tell an incomplete search from one that ran out of pages.
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from address_normalizer import address_key
+
+SEARCH_PAGE_WORKERS = int(os.environ.get("SEARCH_PAGE_WORKERS", 4))
+SEARCH_MAX_PAGES = int(os.environ.get("SEARCH_MAX_PAGES", 20))
+SEARCH_PAGE_RETRIES = int(os.environ.get("SEARCH_PAGE_RETRIES", 1))
+
+# fetch_page(page_number) -> (listings, total pages if the API reports it), or None if the request failed
+PageFetcher = Callable[[int], Optional[Tuple[List[Dict[str, Any]], Optional[int]]]]
+
+
+class SearchPage(NamedTuple):
+    number: int
+    found: int                            # listings the API returned on this page
+    candidates: List[Dict[str, Any]]      # listings not seen on an earlier page
+    failed: bool = False                  # the page could not be fetched; the search ended early
+
+
+class ListingDeduper:
+    """Remembers listings by source id and address key"""
+
+    def __init__(self, id_of: Callable[[Dict[str, Any]], Any],
+                 address_of: Callable[[Dict[str, Any]], Optional[str]]):
+        self.id_of = id_of
+        self.address_of = address_of
+        self._ids = set()
+        self._addresses = set()
+
+    def add(self, listing: Dict[str, Any]) -> bool:
+        """Remember a listing; False if one with its id or address was seen before"""
+        listing_id = self.id_of(listing)
+        key = address_key(self.address_of(listing))
+        if (listing_id not in (None, "") and listing_id in self._ids) or (key is not None and key in self._addresses):
+            return False
+        if listing_id not in (None, ""):
+            self._ids.add(listing_id)
+        if key is not None:
+            self._addresses.add(key)
+        return True
+
+
+def fan_out(fetch_page: PageFetcher, max_results: int,
+            id_of: Callable[[Dict[str, Any]], Any],
+            address_of: Callable[[Dict[str, Any]], Optional[str]],
+            known: Iterable[Dict[str, Any]] = (),
+            first_page: int = 1,
+            workers: Optional[int] = None,
+            max_pages: Optional[int] = None,
+            page_retries: Optional[int] = None,
+            page_size: Optional[int] = None) -> Iterator[SearchPage]:
+    """
+    Fetch search pages concurrently and yield their new listings in page order
+
+    Args:
+        fetch_page: Fetches one 1-based page; a failed request returns None
+        max_results: Stop once this many new unique listings were yielded
+        id_of: Source id of a listing (ZPID, ...), None if it has none
+        address_of: Address of a listing, for the address-key dedup
+        known: Listings already collected (e.g. by a resumed run); they are
+            not yielded again and do not count toward max_results
+        first_page: Page to start from (after the pages a resumed run saw)
+        workers: Pages in flight (SEARCH_PAGE_WORKERS)
+        max_pages: Page limit (SEARCH_MAX_PAGES)
+        page_retries: Extra tries of a failed page (SEARCH_PAGE_RETRIES)
+        page_size: Listings per full page if the API's page size is known;
+            otherwise the largest page seen so far
+
+    Returns:
+        Iterator of SearchPage, ending with a failed one if a page could not
+        be fetched; closing it early abandons the pending requests
+    """
+    workers = max(1, workers if workers is not None else SEARCH_PAGE_WORKERS)
+    max_pages = max_pages if max_pages is not None else SEARCH_MAX_PAGES
+    page_retries = max(0, page_retries if page_retries is not None else SEARCH_PAGE_RETRIES)
+    deduper = ListingDeduper(id_of, address_of)
+    for listing in known:
+        deduper.add(listing)
+    if max_results <= 0:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending = {}
+    next_page = first_page
+    last_page = max_pages
+    remaining = max_results
+    # Until a page arrives (or without a known size) assume a page could hold a single new listing
+    page_size = max(1, page_size or 1)
+    try:
+        for number in range(first_page, max_pages + 1):
+            in_flight = min(workers, math.ceil(remaining / page_size))
+            while next_page <= last_page and len(pending) < in_flight:
+                pending[next_page] = pool.submit(fetch_page, next_page)
+                next_page += 1
+            if number not in pending:
+                break
+
+            result = pending.pop(number).result()
+            for attempt in range(1, page_retries + 1):
+                if result is not None:
+                    break
+                print(f"🔁 Retrying search page {number} ({attempt}/{page_retries})")
+                result = pool.submit(fetch_page, number).result()
+            if result is None:
+                yield SearchPage(number, 0, [], failed=True)
+                break
+
+            listings, total_pages = result
+            page_size = max(page_size, len(listings))
+            if total_pages is not None:
+                last_page = min(last_page, total_pages)
+            if not listings:
+                break
+
+            candidates = [listing for listing in listings if deduper.add(listing)][:remaining]
+            remaining -= len(candidates)
+            yield SearchPage(number, len(listings), candidates)
+            if remaining <= 0 or number >= last_page:
+                break
+    finally:
+        for future in pending.values():
+            future.cancel()
+        pool.shutdown(wait=False)
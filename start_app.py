@@ -2,6 +2,7 @@
 """
 PropertyDetails v6.2 - Startup Script
 Checks dependencies and starts the web application
+(gunicorn pre-fork server when available, Flask development server with --dev)
 """
 
 import os
@@ -15,9 +16,10 @@ def check_requirements():
     # Check required files
     required_files = [
         'property_search_v6_2_FINAL.py',
-        'TAMPA_PROPERTIES_EXTRACTION_20250528_182304.json',
+        'property_store.py',
         'index.html',
-        'app.py'
+        'app.py',
+        'gunicorn.conf.py'
     ]
     
     missing_files = []
@@ -25,6 +27,11 @@ def check_requirements():
         if not os.path.exists(file):
             missing_files.append(file)
     
+    # The property store is seeded from the extraction JSON on first use
+    from property_store import DEFAULT_STORE_PATH, DEFAULT_DATA_FILE
+    if not os.path.exists(DEFAULT_STORE_PATH) and not os.path.exists(DEFAULT_DATA_FILE):
+        missing_files.append(f"{DEFAULT_STORE_PATH} or {DEFAULT_DATA_FILE}")
+    
     if missing_files:
         print(f"❌ Missing required files: {', '.join(missing_files)}")
         return False
@@ -43,8 +50,8 @@ def check_requirements():
     
     return True
 
-def start_application():
-    """Start the Flask web application"""
+def start_application(dev_server: bool = False):
+    """Start the web application"""
     print("\n🚀 Starting PropertyDetails v6.2 Web Application")
     print("=" * 60)
     print("📍 Web Interface: http://localhost:5000")
@@ -59,10 +66,20 @@ def start_application():
     print("\n🛑 Press Ctrl+C to stop the server")
     print("=" * 60)
     
-    # Start the Flask app
+    if not dev_server:
+        try:
+            import gunicorn
+        except ImportError:
+            print("⚠️ gunicorn not available, falling back to the Flask development server")
+            dev_server = True
+    
+    # Start the app: production server (see gunicorn.conf.py) or Flask development server
     try:
-        from app import app
-        app.run(debug=False, host='0.0.0.0', port=5000)
+        if dev_server:
+            from app import app
+            app.run(debug=False, host='0.0.0.0', port=5000)
+        else:
+            os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'])
     except KeyboardInterrupt:
         print("\n\n🛑 Server stopped by user")
     except Exception as e:
@@ -77,7 +94,7 @@ def main():
         print("\n❌ Requirements check failed. Please fix the issues above.")
         sys.exit(1)
     
-    start_application()
+    start_application(dev_server='--dev' in sys.argv[1:])
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
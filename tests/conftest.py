@@ -0,0 +1,36 @@
+"""Shared fixtures: the repository modules are flat, top-level scripts"""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SEED_FILE = os.path.join(ROOT, "TAMPA_PROPERTIES_EXTRACTION_20250528_182304.json")
+
+
+@pytest.fixture(scope="session")
+def _seed_extraction():
+    with open(SEED_FILE) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def seed_extraction(_seed_extraction):
+    """The bundled Tampa extraction document (a fresh copy per test)"""
+    return copy.deepcopy(_seed_extraction)
+
+
+@pytest.fixture
+def store(tmp_path, seed_extraction):
+    """A property store in a temporary directory, loaded with the Tampa extraction"""
+    from property_store import PropertyStore
+
+    store = PropertyStore(str(tmp_path / "store.db"))
+    store.import_extraction(seed_extraction, "seed.json")
+    yield store
+    store.close()
@@ -0,0 +1,96 @@
+"""Address parsing, canonical forms and matching keys"""
+
+import pytest
+
+from address_normalizer import (address_key, dedupe_by_address, format_address, normalize_address,
+                                parse_address, zip5)
+
+
+@pytest.mark.parametrize("spellings", [
+    ("14355 FOWLER AVENUE APT 2, tampa, fl 33615-1234", "14355 Fowler Ave #2, Tampa, FL 33615",
+     "14355 fowler ave., unit 2, Tampa FL 33615"),
+    ("7709 Palmbrook Drive, Tampa, FL 33615", "7709 PALMBROOK DR, TAMPA, FL 33615-0001"),
+    ("123 North Dale Mabry Highway, Tampa, FL", "123 N Dale Mabry Hwy, Tampa, FL"),
+    ("100 Main Street West", "100 Main St W"),
+])
+def test_spellings_share_a_key(spellings):
+    assert len({address_key(s) for s in spellings}) == 1
+
+
+@pytest.mark.parametrize("first, second", [
+    ("100 Lot Rd, Tampa, FL", "100 Rd, Tampa, FL"),
+    ("5 Unit Ave", "5 Ave"),
+    ("123 North St", "123 N St"),
+    ("200 South Blvd, Tampa, FL", "200 S Blvd, Tampa, FL"),
+    ("100 Main St Apt 1", "100 Main St Apt 2"),
+])
+def test_different_addresses_keep_different_keys(first, second):
+    assert address_key(first) != address_key(second)
+
+
+def test_street_named_lot_or_unit_has_no_unit():
+    parsed = parse_address("100 Lot Rd, Tampa, FL")
+    assert (parsed.number, parsed.street_name, parsed.unit) == ("100", "Lot Rd", None)
+    parsed = parse_address("5 Unit Ave")
+    assert (parsed.number, parsed.street_name, parsed.unit) == ("5", "Unit Ave", None)
+
+
+def test_unit_designators_after_the_suffix():
+    assert parse_address("100 Main St Lot 5, Tampa, FL").unit == "Lot 5"
+    assert parse_address("100 Main St N Unit 4b").unit == "Unit 4B"
+    assert parse_address("100 Main St N Unit 4b").street_name == "Main St N"
+    assert parse_address("100 Oak Ave, Unit 3, Tampa, FL 33615").unit == "Unit 3"
+    assert parse_address("9 Broadway Apt 7").unit == "Apt 7"
+
+
+def test_directionals_only_around_the_street_name():
+    assert parse_address("123 North St").street_name == "North St"
+    assert parse_address("123 North Dale Mabry Hwy").street_name == "N Dale Mabry Hwy"
+    assert parse_address("100 Dale North Rd").street_name == "Dale North Rd"
+    assert parse_address("100 West Ave South").street_name == "West Ave S"
+
+
+def test_components_and_display_form():
+    parsed = parse_address("14355 FOWLER AVENUE APT 2, tampa, fl 33615-1234")
+    assert parsed.city == "Tampa" and parsed.state == "FL"
+    assert (parsed.zip5, parsed.zip4) == ("33615", "1234")
+    assert parsed.full == "14355 Fowler Ave Apt 2, Tampa, FL 33615"
+    assert format_address("7709 palmbrook drive", "tampa", "fl", "33615") == "7709 Palmbrook Dr, Tampa, FL 33615"
+    assert normalize_address(None) == "" and address_key("") is None
+    assert zip5("33615-1234") == "33615" and zip5(None) is None
+
+
+def test_dedupe_by_address_keeps_first_and_addressless():
+    items = [{"a": "1 Oak Ave"}, {"a": "1 OAK AVENUE"}, {"a": None}, {"a": None}, {"a": "2 Oak Ave"}]
+    assert dedupe_by_address(items, lambda i: i["a"]) == [items[0], items[2], items[3], items[4]]
+
+
+@pytest.mark.parametrize("address", [
+    "123 Main St, Tampa, Florida 33615", "123 Main St, Tampa, Fla. 33615", "123 Main St, Tampa Florida 33615",
+    "123 MAIN ST, TAMPA, FL 33615",
+])
+def test_full_and_abbreviated_state_names(address):
+    parsed = parse_address(address)
+    assert (parsed.city, parsed.state, parsed.zip5) == ("Tampa", "FL", "33615")
+    assert parsed.full == "123 Main St, Tampa, FL 33615"
+
+
+def test_multi_word_state_names():
+    parsed = parse_address("1 Oak St, New York, New York 10001")
+    assert (parsed.city, parsed.state) == ("New York", "NY")
+
+
+def test_unplaced_parts_are_kept():
+    parsed = parse_address("123 Main St, Westchase, Tampa, FL 33615")
+    assert parsed.full == "123 Main St, Westchase, Tampa, FL 33615"
+    assert "westchase" in parsed.key
+    assert address_key("123 Main St, Westchase, Tampa, FL 33615") != address_key("123 Main St, Tampa, FL 33615")
+
+
+def test_zip_alone_is_not_a_street_number():
+    parsed = parse_address("33615")
+    assert (parsed.number, parsed.street_name, parsed.zip5) == (None, "", "33615")
+    assert normalize_address("33615") == "33615"
+    parsed = parse_address("FL 33615-1234")
+    assert (parsed.number, parsed.state, parsed.zip5, parsed.zip4) == (None, "FL", "33615", "1234")
+    assert parse_address("33615 Main St").number == "33615"
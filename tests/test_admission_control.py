@@ -0,0 +1,95 @@
+"""Admission control: in-flight cap, bounded queue, queue-wait timeout and deadlines"""
+
+import threading
+import time
+
+import pytest
+
+from admission_control import AdmissionController, Deadline, Overloaded
+
+
+def _wait_for(condition, timeout=5):
+    started = time.monotonic()
+    while not condition():
+        assert time.monotonic() - started < timeout, "condition not reached"
+        time.sleep(0.005)
+
+
+class _Holders:
+    """Worker threads holding (or queued for) a slot until released"""
+
+    def __init__(self, controller, count):
+        self.release = threading.Event()
+        self.results = []
+        self.threads = [threading.Thread(target=self._hold, args=(controller,)) for _ in range(count)]
+        for thread in self.threads:
+            thread.start()
+
+    def _hold(self, controller):
+        try:
+            with controller.admit():
+                self.release.wait(5)
+            self.results.append("ok")
+        except Overloaded as e:
+            self.results.append(e.reason)
+
+    def finish(self):
+        self.release.set()
+        for thread in self.threads:
+            thread.join(5)
+
+
+def test_full_queue_is_rejected_and_slots_are_released():
+    controller = AdmissionController(max_in_flight=2, max_queue=1, request_timeout=5)
+    holders = _Holders(controller, 3)
+    _wait_for(lambda: controller.stats()["in_flight"] == 2 and controller.stats()["queue_depth"] == 1)
+
+    with pytest.raises(Overloaded) as rejected:
+        with controller.admit():
+            pass
+    assert rejected.value.reason == "search queue full"
+    assert rejected.value.retry_after == controller.retry_after() == 3
+
+    holders.finish()
+    assert holders.results == ["ok"] * 3
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["queue_depth"]) == (0, 0)
+    assert (stats["admitted"], stats["rejected_queue_full"], stats["rejected_timeout"]) == (3, 1, 0)
+    with controller.admit():
+        assert controller.stats()["in_flight"] == 1
+
+
+def test_queue_wait_times_out_at_the_deadline():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, request_timeout=0.1)
+    holders = _Holders(controller, 1)
+    _wait_for(lambda: controller.stats()["in_flight"] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(Overloaded) as rejected:
+        with controller.admit():
+            pass
+    assert rejected.value.reason == "timed out waiting for a search slot"
+    assert 0.05 <= time.monotonic() - started < 2
+    assert controller.stats()["queue_depth"] == 0 and controller.stats()["rejected_timeout"] == 1
+
+    holders.finish()
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_deadline_expiry_inside_the_slot_is_counted_and_releases_it():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, request_timeout=0.01)
+    with pytest.raises(Overloaded) as exceeded:
+        with controller.admit() as deadline:
+            time.sleep(0.02)
+            deadline.check()
+    assert exceeded.value.reason == "deadline exceeded"
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["deadline_exceeded"], stats["admitted"]) == (0, 1, 1)
+
+
+def test_deadline():
+    assert not Deadline(10).expired() and Deadline(10).remaining() > 9
+    expired = Deadline(-1)
+    assert expired.expired()
+    with pytest.raises(Overloaded):
+        expired.check()
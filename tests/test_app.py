@@ -0,0 +1,184 @@
+"""Flask endpoints: search validation, conditional requests, aggregates"""
+
+import copy
+import gzip
+import json
+import threading
+import time
+
+import pytest
+
+flask = pytest.importorskip("flask")
+
+import app as web
+from property_snapshot import PropertySnapshot, write_snapshot
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(web.engine, "store", store)
+    monkeypatch.setattr(web, "response_cache", web.ResponseCache())
+    web.app.config["TESTING"] = True
+    return web.app.test_client()
+
+
+def test_search_returns_weak_etag_and_revalidates(client):
+    response = client.get("/api/search?address=7709 Palmbrook Dr, Tampa, FL 33615&max_properties=3")
+    assert response.status_code == 200
+    assert len(response.get_json()["zillow_properties"]) == 3
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/api/search?address=7709 palmbrook drive, tampa fl 33615&max_properties=3",
+                       headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+
+def test_cached_search_is_stamped_per_response(client, monkeypatch):
+    searches = []
+    build = web.engine.get_real_properties_json_template
+    monkeypatch.setattr(web.engine, "get_real_properties_json_template",
+                        lambda *args, **kwargs: searches.append(1) or build(*args, **kwargs))
+    url = "/api/search?address=7709 Palmbrook Dr, Tampa, FL 33615&max_properties=3"
+
+    first = client.get(url).get_json()
+    web.engine.record_cache.get(("not", "cached"))
+    second = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert searches == [1]
+    assert second.headers["Content-Encoding"] == "gzip"
+    second = json.loads(gzip.decompress(second.data))
+
+    assert second["search_timestamp"] > first["search_timestamp"]
+    assert second["zillow_properties"][0]["PropertyDetails"]["meta_data"]["fetch_timestamp"] == \
+        second["search_timestamp"]
+    assert second["summary"]["record_cache"]["misses"] == first["summary"]["record_cache"]["misses"] + 1
+    for result in (first, second):
+        result.pop("search_timestamp")
+        result["summary"].pop("record_cache")
+        for record in result["zillow_properties"] + result["reapi_properties"]:
+            record["PropertyDetails"]["meta_data"].pop("fetch_timestamp")
+    assert first == second
+
+
+def test_search_keeps_the_city_of_a_full_state_name(client):
+    response = client.get("/api/search?address=7709 Palmbrook Dr, Tampa, Florida 33615&max_properties=1")
+    assert response.get_json()["subject_address"] == "7709 Palmbrook Dr, Tampa, FL 33615"
+
+
+def test_search_post_json(client):
+    response = client.post("/api/search", json={"address": "7709 Palmbrook Dr, Tampa, FL 33615",
+                                                 "max_properties": 2, "compact": True})
+    assert response.status_code == 200
+    assert b"__PD_" not in response.data
+    assert len(response.get_json()["zillow_properties"]) == 2
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"data": "not json", "content_type": "text/plain"},
+    {"data": "{broken", "content_type": "application/json"},
+    {"json": ["a", "list"]},
+    {"json": {"address": "1 Main St", "max_properties": "many"}},
+    {"json": {"address": "1 Main St", "max_properties": 0}},
+    {"json": {"address": "1 Main St", "max_properties": 100000}},
+    {"json": {"max_properties": 5}},
+])
+def test_search_rejects_bad_requests(client, kwargs):
+    assert client.post("/api/search", **kwargs).status_code == 400
+
+
+def test_search_rejects_bad_query_string(client):
+    assert client.get("/api/search?address=1 Main St&max_properties=abc").status_code == 400
+
+
+def _reprice(store, seed_extraction):
+    changed = copy.deepcopy(seed_extraction["properties"][0])
+    changed["reapi_extraction"]["PropertyDetails"]["price_history"]["list_price"] = 1
+    store.ingest_properties([changed])
+
+
+def test_aggregates_etag_follows_store_version(client, store, seed_extraction):
+    first = client.get("/api/aggregates?group=postal_code")
+    assert first.status_code == 200
+    assert first.get_json()["aggregates"]
+    assert client.get("/api/aggregates?group=postal_code",
+                      headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    _reprice(store, seed_extraction)
+    second = client.get("/api/aggregates?group=postal_code", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_aggregates_etag_ignores_the_snapshot_version(client, store, seed_extraction, tmp_path, monkeypatch):
+    path = str(tmp_path / "store.snap")
+    write_snapshot(store, path)
+    snapshot = PropertySnapshot(path)
+    monkeypatch.setattr(web.engine, "store", snapshot)
+    monkeypatch.setattr(web, "_aggregate_store", store)
+    try:
+        first = client.get("/api/aggregates?group=postal_code&key=33615")
+        _reprice(store, seed_extraction)
+        second = client.get("/api/aggregates?group=postal_code&key=33615",
+                            headers={"If-None-Match": first.headers["ETag"]})
+        assert second.status_code == 200
+        assert second.headers["ETag"] != first.headers["ETag"]
+    finally:
+        snapshot.close()
+
+
+def test_aggregates_never_create_a_store_next_to_a_snapshot(client, store, tmp_path, monkeypatch):
+    path = str(tmp_path / "store.snap")
+    write_snapshot(store, path)
+    snapshot = PropertySnapshot(path)
+    missing = tmp_path / "missing.db"
+    monkeypatch.setattr(web.engine, "store", snapshot)
+    monkeypatch.setattr(web.engine, "db_path", str(missing))
+    monkeypatch.setattr(web, "_aggregate_store", None)
+    try:
+        assert client.get("/api/aggregates?group=postal_code").status_code == 404
+        assert not missing.exists()
+
+        monkeypatch.setattr(web.engine, "db_path", store.db_path)
+        assert client.get("/api/aggregates?group=postal_code").status_code == 200
+        assert web._aggregate_store.read_only
+    finally:
+        snapshot.close()
+
+
+def test_aggregates_unknown_group_and_key(client):
+    assert client.get("/api/aggregates?group=county").status_code == 400
+    assert client.get("/api/aggregates?group=postal_code&key=00000").status_code == 404
+
+
+def test_search_sheds_load_with_503_and_retry_after(client, monkeypatch):
+    monkeypatch.setattr(web, "admission", web.AdmissionController(max_in_flight=1, max_queue=1, request_timeout=5))
+    release = threading.Event()
+    build = web.engine.get_real_properties_json_template
+
+    def blocked(*args, **kwargs):
+        release.wait(5)
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(web.engine, "get_real_properties_json_template", blocked)
+    statuses = []
+    workers = [threading.Thread(target=lambda n=n: statuses.append(web.app.test_client().get(
+        f"/api/search?address={n} Main St, Tampa, FL 33615&max_properties=1").status_code)) for n in (1, 2)]
+    for worker in workers:
+        worker.start()
+    started = time.monotonic()
+    while web.admission.stats()["in_flight"] + web.admission.stats()["queue_depth"] < 2:
+        assert time.monotonic() - started < 5
+        time.sleep(0.005)
+
+    response = client.get("/api/search?address=3 Main St, Tampa, FL 33615&max_properties=1")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(web.admission.retry_after())
+    assert response.get_json()["retry_after"] == web.admission.retry_after()
+    assert client.get("/api/metrics").get_json()["search_admission"]["rejected_queue_full"] == 1
+
+    release.set()
+    for worker in workers:
+        worker.join(5)
+    assert statuses == [200, 200]
+    stats = client.get("/api/metrics").get_json()["search_admission"]
+    assert (stats["in_flight"], stats["queue_depth"], stats["admitted"]) == (0, 0, 2)
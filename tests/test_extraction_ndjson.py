@@ -0,0 +1,91 @@
+"""NDJSON extraction files, the extraction checkpoint and resuming an extraction"""
+
+import json
+
+import pytest
+
+import real_property_extractor
+import search_fanout
+from extraction_ndjson import (ExtractionCheckpoint, iter_ndjson_properties, open_extraction,
+                               read_ndjson_summary, write_extraction_ndjson)
+from real_property_extractor import RealPropertyExtractor
+
+TARGET = "7709 Palmbrook Dr, Tampa, FL 33615"
+
+
+def test_ndjson_round_trip(tmp_path, seed_extraction):
+    path = str(tmp_path / "extraction.ndjson")
+    properties = seed_extraction["properties"]
+    summary = seed_extraction["extraction_summary"]
+    assert write_extraction_ndjson(path, properties, summary) == len(properties)
+    assert list(iter_ndjson_properties(path)) == properties
+    assert read_ndjson_summary(path) == summary
+    entries, opened_summary = open_extraction(path)
+    assert list(entries) == properties and opened_summary == summary
+
+
+def test_checkpoint_journal_and_torn_line(tmp_path, seed_extraction):
+    checkpoint = ExtractionCheckpoint(str(tmp_path / "run.ndjson"))
+    assert checkpoint.load() == (None, [])
+    first, second = seed_extraction["properties"][:2]
+    checkpoint.start({"target_address": TARGET, "search_pages": 0, "candidates": []})
+    checkpoint.add_candidates(1, 12, [{"zpid": 1}, {"zpid": 2}])
+    checkpoint.append(first)
+    checkpoint.close()
+    with open(checkpoint.path, "ab") as f:
+        f.write(json.dumps(second).encode()[:50])
+
+    header, finished = checkpoint.load()
+    assert header["candidates"] == [{"zpid": 1}, {"zpid": 2}]
+    assert header["search_pages"] == 1 and header["total_properties_found"] == 12
+    assert finished == [first]
+
+    checkpoint.resume()
+    checkpoint.append(second)
+    checkpoint.close()
+    assert checkpoint.load()[1] == [first, second]
+    checkpoint.discard()
+    assert not checkpoint.exists()
+
+
+class FakeSearch:
+    """Zillow search pages of 3 results; listed pages fail"""
+
+    def __init__(self, total_pages, failing=()):
+        self.total_pages = total_pages
+        self.failing = set(failing)
+        self.fetched = []
+
+    def __call__(self, address, page):
+        self.fetched.append(page)
+        if page in self.failing:
+            return None
+        props = [{"zpid": page * 10 + i, "address": f"{page * 10 + i} Oak Ave, Tampa, FL 33615"} for i in range(3)]
+        return props, self.total_pages
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setattr(real_property_extractor.time, "sleep", lambda seconds: None)
+    extractor = RealPropertyExtractor()
+    monkeypatch.setattr(extractor, "extract_real_zillow_data", lambda zpid: {"zpid": zpid})
+    monkeypatch.setattr(extractor, "extract_real_reapi_data", lambda address: None)
+    return extractor
+
+
+def test_failed_search_page_is_not_journalled_and_resume_retries_it(extractor, monkeypatch, tmp_path):
+    checkpoint = ExtractionCheckpoint(str(tmp_path / "run.ndjson"))
+    search = FakeSearch(total_pages=3, failing={2})
+    monkeypatch.setattr(extractor, "search_page_zillow", search)
+    monkeypatch.setattr(search_fanout, "SEARCH_PAGE_RETRIES", 0)
+    results = extractor.extract_multiple_properties(TARGET, 9, checkpoint)
+    summary = results["extraction_summary"]
+    assert summary["search_failed_page"] == 2
+    assert [p["search_result"]["zpid"] for p in results["properties"]] == [10, 11, 12]
+    assert checkpoint.load()[0]["search_pages"] == 1
+
+    search.failing.clear()
+    resumed = extractor.extract_multiple_properties(TARGET, 9, checkpoint, resume=True)
+    assert [p["search_result"]["zpid"] for p in resumed["properties"]] == [10, 11, 12, 20, 21, 22, 30, 31, 32]
+    assert "search_failed_page" not in resumed["extraction_summary"]
+    assert [p["property_index"] for p in resumed["properties"]] == list(range(1, 10))
@@ -0,0 +1,53 @@
+"""ETag construction/matching and content-coding negotiation"""
+
+import gzip
+
+from http_cache import (ResponseCache, compress, etag_matches, make_etag, negotiate_encoding, variant_etag)
+
+
+def test_strong_and_weak_etags():
+    strong = make_etag("search", "1", "addr")
+    weak = make_etag("search", "1", "addr", weak=True)
+    assert strong.startswith('"') and strong.endswith('"')
+    assert weak == "W/" + strong
+    assert make_etag("search", "2", "addr") != strong
+
+
+def test_variant_etag_keeps_weakness():
+    weak = make_etag("x", weak=True)
+    assert variant_etag(weak, None) == weak
+    assert variant_etag(weak, "gzip").startswith('W/"')
+    assert variant_etag(weak, "gzip").endswith('-gzip"')
+
+
+def test_etag_matches_uses_weak_comparison():
+    strong = make_etag("x")
+    weak = make_etag("x", weak=True)
+    assert etag_matches(strong, strong)
+    assert etag_matches(weak, weak)
+    assert etag_matches(weak, strong)
+    assert etag_matches(strong, weak)
+    assert etag_matches(f'"other", {weak}', weak)
+    assert etag_matches("*", weak)
+    assert not etag_matches(make_etag("y"), weak)
+    assert not etag_matches(None, weak)
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("deflate, gzip;q=0.5") == "gzip"
+
+
+def test_response_cache_compresses_large_bodies_once():
+    cache = ResponseCache(1024 * 1024)
+    calls = []
+    body = cache.body("e", lambda: calls.append(1) or b"x" * 5000)
+    assert cache.body("e", lambda: calls.append(1) or b"") == body
+    assert calls == [1]
+    payload, applied = cache.encoded("e", body, "gzip")
+    assert applied == "gzip"
+    assert gzip.decompress(payload) == body
+    assert cache.encoded("e", b"small", "gzip") == (b"small", None)
+    assert gzip.decompress(compress(b"abc", "gzip")) == b"abc"
@@ -0,0 +1,53 @@
+"""Appreciation rates between first and last sales"""
+
+import copy
+
+import pytest
+
+import price_history_index as price_history
+from price_history_index import MAX_ANNUAL_RATE, annual_rate
+from property_valuation import valuation_facts
+
+
+def _with_sales(prop, sales):
+    prop = copy.deepcopy(prop)
+    prop["zillow_extraction"]["PropertyDetails"]["price_history"]["sale_history"] = []
+    prop["reapi_extraction"]["PropertyDetails"]["price_history"]["sale_history"] = [
+        {"date": date, "price": price, "transaction_type": "Deed"} for date, price in sales]
+    return prop
+
+
+def test_annual_rate_of_a_long_hold():
+    assert annual_rate((20150101, 200000), (20250101, 200000 * 1.05 ** 10)) == pytest.approx(0.05, abs=1e-4)
+
+
+def test_short_holds_and_nominal_deeds_have_no_rate():
+    # A $100 deed then a $300,000 sale the next day overflowed the power form
+    assert annual_rate((20240101, 100), (20240102, 300000)) is None
+    assert annual_rate((20240101, 100), (20250601, 300000)) is None
+    # 3x two months later (+71,822%/yr)
+    assert annual_rate((20240101, 100000), (20240301, 300000)) is None
+    assert annual_rate((20240101, 0), (20260101, 300000)) is None
+
+
+def test_rates_outside_the_band_are_dropped():
+    assert annual_rate((20200101, 100000), (20220101, 100000 * (1 + MAX_ANNUAL_RATE) ** 2 * 1.1)) is None
+    assert annual_rate((20200101, 400000), (20220101, 50000)) is None
+
+
+def test_store_rates_skip_short_holds_and_nominal_deeds(store, seed_extraction):
+    properties = seed_extraction["properties"]
+    deed = _with_sales(properties[0], [("2015-06-01", 100), ("2015-06-02", 300000), ("2020-06-01", 390000)])
+    flip = _with_sales(properties[1], [("2024-01-01", 100000), ("2024-03-01", 300000)])
+    store.ingest_properties([deed, flip])
+
+    rates = store.appreciation_rates()
+    assert flip["property_index"] not in rates
+    assert rates[deed["property_index"]] == pytest.approx(1.3 ** (1 / 5) - 1, abs=1e-3)
+    assert all(price_history.MIN_ANNUAL_RATE <= r <= MAX_ANNUAL_RATE for r in rates.values())
+    assert price_history.area_appreciation(store.connection()) is not None
+
+    assert valuation_facts(flip).appreciation is None
+    deed_facts = valuation_facts(deed)
+    assert deed_facts.appreciation == rates[deed["property_index"]]
+    assert deed_facts.sale_price == 390000
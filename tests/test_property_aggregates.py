@@ -0,0 +1,61 @@
+"""Materialized aggregates and the price event index: incremental upkeep vs rebuild"""
+
+import copy
+import json
+
+import price_history_index as price_history
+import property_aggregates as aggregates
+
+
+def _all_aggregates(store):
+    """Every stored aggregate document, without its updated_at stamp"""
+    documents = {}
+    for group in aggregates.GROUP_TYPES:
+        documents[group] = [json.loads(d) for d in store.aggregates_json(group)]
+        for document in documents[group]:
+            document.pop("updated_at")
+    return documents
+
+
+def _changed(prop, list_price):
+    prop = copy.deepcopy(prop)
+    prop["reapi_extraction"]["PropertyDetails"]["price_history"]["list_price"] = list_price
+    prop["zillow_extraction"]["PropertyDetails"]["price_history"]["list_price"] = list_price
+    return prop
+
+
+def test_aggregates_cover_every_group(store, seed_extraction):
+    facts = [aggregates.property_facts(p) for p in seed_extraction["properties"]]
+    stored = _all_aggregates(store)
+    for group in aggregates.GROUP_TYPES:
+        assert {d["key"] for d in stored[group]} == {f["groups"][group] for f in facts if group in f["groups"]}
+    assert sum(d["property_count"] for d in stored["postal_code"]) == len(facts)
+    first = stored["postal_code"][0]
+    assert first["property_count"] >= 1
+    assert store.aggregate_json("postal_code", first["key"]) is not None
+    assert store.aggregate_json("postal_code", "00000") is None
+
+
+def test_incremental_updates_match_a_rebuild(store, seed_extraction):
+    properties = seed_extraction["properties"]
+    store.ingest_properties([_changed(properties[0], 123456), _changed(properties[1], 987654)])
+    incremental = _all_aggregates(store)
+    events = store.price_events()
+
+    conn = store.connection()
+    with conn:
+        groups = aggregates.rebuild(conn)
+        indexed = price_history.rebuild(conn)
+    assert groups == sum(len(docs) for docs in incremental.values())
+    assert indexed == len(events)
+    assert _all_aggregates(store) == incremental
+    assert store.price_events() == events
+
+
+def test_price_events_filters(store):
+    events = store.price_events()
+    assert [e[1] for e in events] == sorted(e[1] for e in events)
+    sales = store.price_events(kind="sale")
+    assert sales and all(e[3] == "sale" for e in sales)
+    since = events[len(events) // 2][1]
+    assert all(e[1] >= since for e in store.price_events(since=since))
@@ -0,0 +1,44 @@
+"""Load-time interning of categorical field values"""
+
+import json
+
+import property_categories
+from property_categories import CategoricalDictionary, intern_extraction_entry
+from property_serializer import loads_entry
+
+
+def _fresh(text):
+    """A str equal to text but not the same object"""
+    return "".join(list(text))
+
+
+def test_intern_returns_one_canonical_instance():
+    dictionary = CategoricalDictionary("city")
+    first = dictionary.intern(_fresh("Tampa"))
+    second = dictionary.intern(_fresh("Tampa"))
+    assert first == "Tampa" and first is second
+    assert len(dictionary) == 1
+    assert dictionary.intern(None) is None
+    assert dictionary.intern(3) == 3
+
+
+def test_full_dictionary_passes_values_through(monkeypatch):
+    monkeypatch.setattr(property_categories, "MAX_CATEGORIES", 2)
+    dictionary = CategoricalDictionary("zoning")
+    dictionary.intern("RS-50")
+    dictionary.intern("RM-16")
+    overflow = _fresh("CG")
+    assert dictionary.intern(overflow) is overflow
+    assert len(dictionary) == 2
+
+
+def test_entries_share_categorical_strings(seed_extraction):
+    first, second = [loads_entry(json.dumps(p)) for p in seed_extraction["properties"][:2]]
+    city = lambda p: p["zillow_extraction"]["PropertyDetails"]["identification"]["city"]
+    assert city(first) == city(second)
+    assert city(first) is city(second)
+
+
+def test_interning_keeps_values(seed_extraction):
+    entry = seed_extraction["properties"][0]
+    assert intern_extraction_entry(json.loads(json.dumps(entry))) == entry
@@ -0,0 +1,52 @@
+"""Compact output: records reduced against per-source defaults and expanded back"""
+
+import json
+
+import pytest
+
+from property_compact import COMPACT_FORMAT, compact_record, expand_record, expand_result
+from property_record_cache import V62RecordCache
+from property_search_v6_2_FINAL import PropertySearchV62Final
+
+SUBJECT = "7709 Palmbrook Dr, Tampa, FL 33615"
+
+
+@pytest.fixture
+def engine(store):
+    return PropertySearchV62Final(record_cache=V62RecordCache(), store=store)
+
+
+def test_record_round_trip():
+    defaults = {"PropertyDetails": {"a": None, "b": {"c": 1, "d": [1, 2]}, "meta_data": {"api_version": "v6.2"}}}
+    record = {"PropertyDetails": {"a": 5, "b": {"c": 1, "d": []}, "e": "new",
+                                  "meta_data": {"api_version": "v6.2", "fetch_timestamp": "t"}}}
+    compact = compact_record(record, defaults)
+    assert compact == {"PropertyDetails": {"a": 5, "b": {"d": []}, "e": "new"}}
+    expanded = expand_record(compact, defaults)
+    assert expanded == {"PropertyDetails": {"a": 5, "b": {"c": 1, "d": []}, "e": "new",
+                                            "meta_data": {"api_version": "v6.2"}}}
+    assert compact_record(defaults, defaults) == {}
+    expanded["PropertyDetails"]["b"]["d"].append(3)
+    assert defaults["PropertyDetails"]["b"]["d"] == [1, 2]
+
+
+@pytest.mark.parametrize("as_json", [False, True])
+def test_compact_search_expands_to_the_regular_result(engine, as_json):
+    if as_json:
+        regular = json.loads(engine.get_real_properties_json(SUBJECT, 5))
+        compact = json.loads(engine.get_real_properties_json(SUBJECT, 5, compact=True))
+    else:
+        regular = engine.get_real_properties(SUBJECT, 5)
+        compact = engine.get_real_properties(SUBJECT, 5, compact=True)
+    assert compact["format"] == COMPACT_FORMAT
+    assert len(json.dumps(compact)) < len(json.dumps(regular))
+
+    expanded = expand_result(compact)
+    for key in ("zillow_properties", "reapi_properties"):
+        assert len(expanded[key]) == len(regular[key]) == 5
+        for got, want in zip(expanded[key], regular[key]):
+            # Timestamps differ between the two searches; compact records take the response's
+            assert got["PropertyDetails"]["meta_data"].pop("fetch_timestamp") == \
+                compact["defaults"][key.split("_")[0]]["PropertyDetails"]["meta_data"]["fetch_timestamp"]
+            want["PropertyDetails"]["meta_data"].pop("fetch_timestamp")
+            assert got == want
@@ -0,0 +1,75 @@
+"""REAPI /PropertyDetail fetch and mapping of responses that differ from the sample"""
+
+import pytest
+
+import property_mapper_v6_0
+from property_mapper_v6_0 import PropertyMapperV60
+
+ADDRESS = "100 N Tampa St, Tampa, FL 33602"
+
+# A live-style response: sections the sample always fills come back null or missing
+RESPONSE = {
+    "data": {
+        "property": {
+            "id": 9921,
+            "parcel_number": "A1932571C000000000010A",
+            "address": {"line": "100 N Tampa St", "city": "Tampa", "state_code": "FL",
+                        "postal_code": "33602", "coordinate": None},
+            "type": "Condominium",
+            "building": {"year_built": 2004, "size": None, "rooms": {"beds": 2}, "other_features": None},
+            "lot_size": None,
+            "census": None,
+            "market": {"status": "Active", "list_price": 415000},
+            "sale_history": None
+        }
+    }
+}
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def mapper():
+    mapper = PropertyMapperV60()
+    mapper.reapi_key = "test-key"
+    return mapper
+
+
+def test_live_fetch_posts_the_address(mapper, monkeypatch):
+    calls = []
+
+    def post(url, **kwargs):
+        calls.append((url, kwargs))
+        return FakeResponse(200, RESPONSE)
+
+    monkeypatch.setattr(property_mapper_v6_0.upstream, "post", post)
+    assert mapper.fetch_reapi_data(ADDRESS) == RESPONSE
+    assert calls == [(f"{mapper.reapi_base_url}/PropertyDetail",
+                      {"headers": {"x-api-key": "test-key"}, "json": {"address": ADDRESS}})]
+
+
+def test_missing_and_null_sections_map_to_empty_values(mapper):
+    details = mapper.map_to_client_approved_structure(RESPONSE)["PropertyDetails"]
+    identification = details["identification"]
+    assert identification["apn"] == "A1932571C000000000010A"
+    assert identification["address_full"] == ADDRESS
+    assert identification["property_type"] == "Condo"
+    assert (identification["year_built"], identification["bedrooms"]) == (2004, 2)
+    assert identification["living_sqft"] is None and identification["lot_sqft"] is None
+    assert identification["pool"] is False
+    assert details["location"]["lat"] is None and details["location"]["census_tract"] is None
+    assert details["price_history"]["list_price"] == 415000
+    assert details["price_history"]["sale_history"] == []
+
+
+@pytest.mark.parametrize("payload", [None, {}, {"data": None}, {"data": []}, {"data": {"property": None}},
+                                     {"data": {"property": []}}, {"error": "quota"}])
+def test_responses_without_a_property_map_to_nothing(mapper, payload):
+    assert mapper.map_to_client_approved_structure(payload) == {}
@@ -0,0 +1,96 @@
+"""Entity resolution scoring, one-to-one linking and location discrepancies"""
+
+import pytest
+
+from property_discrepancies import compare_batch, compare_property
+from property_matching import (METERS_PER_DEGREE_LAT, EntityResolver, MatchRecord, blocking_key,
+                               distance_m, pair_confidence, point_distance_m, score)
+
+LAT, LON = 28.0, -82.55
+
+
+def record(source_id, street, lat=LAT, lon=LON, **features):
+    return MatchRecord(source_id, blocking_key("33615-1234", street), lat, lon, **features)
+
+
+def test_blocking_key_normalizes_street():
+    assert blocking_key("33615-1234", "14355 FOWLER AVENUE Apt 2") == "33615|14355|fowler ave"
+    assert blocking_key(None, "1 Main St") is None
+    assert blocking_key("33615", "Main St") is None
+
+
+def test_point_distance():
+    assert point_distance_m(LAT, LON, LAT, LON) == 0
+    assert point_distance_m(LAT, LON, LAT + 100 / METERS_PER_DEGREE_LAT, LON) == pytest.approx(100)
+    assert distance_m(record(1, "1 Main St"), MatchRecord(2, None, None, None)) is None
+
+
+def test_score_prefers_address_then_location():
+    zillow = record("z", "100 Oak Avenue", living_sqft=1500, bedrooms=3, year_built=1990)
+    same = record("r", "100 oak ave", living_sqft=1520, bedrooms=3, year_built=1990)
+    confidence, method, distance = score(zillow, same)
+    assert method == "address" and confidence >= 0.9 and distance == 0
+
+    renumbered = record("r", "102 Oak Ave", lat=LAT + 20 / METERS_PER_DEGREE_LAT)
+    confidence, method, _ = score(zillow, renumbered)
+    assert method == "location" and 0.5 < confidence < 0.9
+
+    far = record("r", "900 Elm St", lat=LAT + 0.01)
+    assert score(zillow, far)[:2] == (0.0, "none")
+
+
+def test_resolve_links_one_to_one_best_first():
+    reapi = [record("r1", "100 Oak Ave"), record("r2", "104 Oak Ave", lat=LAT + 60 / METERS_PER_DEGREE_LAT)]
+    zillow = [record("z2", "104 Oak Avenue", lat=LAT + 60 / METERS_PER_DEGREE_LAT), record("z1", "100 OAK AVENUE")]
+    resolver = EntityResolver(reapi)
+    matches = {m.zillow_id: m.reapi_id for m in resolver.resolve(zillow)}
+    assert matches == {"z1": "r1", "z2": "r2"}
+    # Each Zillow record is compared with its own block only
+    assert resolver.comparisons == 2
+
+
+def test_pair_confidence_of_extraction_entry(seed_extraction):
+    prop = seed_extraction["properties"][0]
+    match = pair_confidence(prop["zillow_extraction"], prop["reapi_extraction"])
+    assert set(match) == {"confidence", "method", "distance_m"}
+    assert 0.0 <= match["confidence"] <= 1.0
+    assert pair_confidence(prop["zillow_extraction"], None) is None
+
+
+def test_location_discrepancy_uses_shared_distance(seed_extraction):
+    prop = seed_extraction["properties"][0]
+    location = prop["reapi_extraction"]["PropertyDetails"]["location"]
+    zillow_location = prop["zillow_extraction"]["PropertyDetails"]["location"]
+    location["lat"] = zillow_location["lat"] + 200 / METERS_PER_DEGREE_LAT
+    location["lon"] = zillow_location["lon"]
+
+    logs = compare_property(prop)
+    entry = next(e for e in logs if e["field"] == "location")
+    assert entry["difference"] == pytest.approx(200, abs=0.1)
+    assert entry["severity"] == "major"
+    assert compare_batch([{"zillow_extraction": prop["zillow_extraction"]}]) == [None]
+
+
+def _paired(zillow, reapi):
+    return {"zillow_extraction": zillow, "reapi_extraction": reapi,
+            "extraction_status": {"zillow_success": True, "reapi_success": True}}
+
+
+def test_extraction_does_not_merge_an_unlinked_reapi_record(seed_extraction):
+    from real_property_extractor import RealPropertyExtractor
+
+    properties = seed_extraction["properties"]
+    other_house = properties[7]["reapi_extraction"]
+    property_data = _paired(properties[0]["zillow_extraction"], other_house)
+    RealPropertyExtractor._link_sources(property_data)
+    assert property_data["reapi_extraction"] is None
+    assert property_data["extraction_status"]["reapi_success"] is False
+    assert property_data["entity_match"]["linked"] is False
+    assert property_data["entity_match"]["unlinked_reapi_property_id"] == \
+        other_house["PropertyDetails"]["meta_data"]["source_property_id"]
+
+    same_house = properties[0]["zillow_extraction"]
+    property_data = _paired(properties[0]["zillow_extraction"], same_house)
+    RealPropertyExtractor._link_sources(property_data)
+    assert property_data["reapi_extraction"] is same_house
+    assert property_data["entity_match"]["linked"] is True
@@ -0,0 +1,163 @@
+"""Per-field-group staleness and refresh of stored properties"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import property_mapper_v6_0
+import property_refresh
+from property_mapper_v6_0 import PropertyMapperV60, reapi_property
+from property_refresh import FIELD_GROUPS, MARKET_TTL, PropertyRefresher, empty_sections, stale_groups
+from zillow_live_fetcher_v6_0 import ZillowLiveFetcherV60
+
+NOW = datetime(2026, 1, 15, 12, 0)
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        if isinstance(self._payload, Exception):
+            raise self._payload
+        return self._payload
+
+
+class LiveMapper(PropertyMapperV60):
+    """The mapper with a key configured, so fetch_reapi_data goes upstream"""
+
+    def __init__(self):
+        super().__init__()
+        self.reapi_key = "test-key"
+
+
+class CannedZillow(ZillowLiveFetcherV60):
+    """The fetcher answering every conditional request with one canned response"""
+
+    def __init__(self, status, data=None):
+        super().__init__()
+        self.response = (status, data, {"etag": '"1"'})
+
+    def fetch_if_modified(self, endpoint, zpid, validators=None):
+        return self.response
+
+
+@pytest.fixture
+def mapper():
+    return LiveMapper()
+
+
+def _entry(seed_extraction, fetched):
+    prop = seed_extraction["properties"][0]
+    for source in ("zillow", "reapi"):
+        meta_data = prop[f"{source}_extraction"]["PropertyDetails"]["meta_data"]
+        meta_data["fetch_timestamp"] = fetched.isoformat()
+        meta_data.pop("field_group_timestamps", None)
+    return prop
+
+
+def test_stale_groups_follow_their_ttls(seed_extraction):
+    details = _entry(seed_extraction, NOW - MARKET_TTL - timedelta(hours=1))["reapi_extraction"]["PropertyDetails"]
+    assert [g.name for g in stale_groups(details, "reapi", NOW)] == ["market"]
+    assert stale_groups(details, "reapi", NOW - timedelta(hours=2)) == []
+    assert [g.name for g in stale_groups(details, "reapi", NOW + timedelta(days=31))] == ["market", "structure"]
+    assert stale_groups({}, "reapi", NOW) == []
+
+
+def test_reapi_property_shape():
+    assert reapi_property({"data": {"property": {"parcel_number": "1"}}}) == {"parcel_number": "1"}
+    for payload in (None, [], {}, {"data": []}, {"data": {}}, {"data": {"property": {}}}, {"error": "quota"}):
+        assert reapi_property(payload) is None
+
+
+@pytest.mark.parametrize("response", [
+    FakeResponse(200, {"error": "unknown address"}),
+    FakeResponse(200, {"data": {"property": None}}),
+    FakeResponse(200, ValueError("not JSON")),
+    FakeResponse(404, {"data": {"property": {"parcel_number": "1"}}}),
+])
+def test_live_fetch_rejects_unexpected_responses(mapper, monkeypatch, response):
+    monkeypatch.setattr(property_mapper_v6_0.upstream, "post", lambda url, **kwargs: response)
+    assert mapper.fetch_reapi_data("7709 Palmbrook Dr, Tampa, FL 33615") is None
+
+
+def test_live_fetch_returns_a_property_response(mapper, monkeypatch):
+    payload = PropertyMapperV60().fetch_reapi_data("7709 Palmbrook Dr, Tampa, FL 33615")
+    monkeypatch.setattr(property_mapper_v6_0.upstream, "post", lambda url, **kwargs: FakeResponse(200, payload))
+    assert mapper.fetch_reapi_data("7709 Palmbrook Dr, Tampa, FL 33615") == payload
+
+
+def test_empty_sections():
+    groups = list(FIELD_GROUPS["reapi"])
+    full = {"identification": {"apn": "1"}, "location": {"lat": 28.0}, "price_history": {"list_price": 1}}
+    assert empty_sections(full, groups) == []
+    blank = {"identification": {"apn": None, "city": ""}, "location": {}, "price_history": {"sale_history": []}}
+    assert sorted(empty_sections(blank, groups)) == ["identification", "location", "price_history"]
+
+
+def test_refresh_keeps_stored_data_when_sections_come_back_empty(store, seed_extraction, mapper, monkeypatch):
+    prop = _entry(seed_extraction, NOW - timedelta(days=60))
+    stored = prop["reapi_extraction"]["PropertyDetails"]
+    monkeypatch.setattr(mapper, "fetch_reapi_data", lambda address: {"data": {"property": {"id": 1}}})
+    refresher = PropertyRefresher(store, zillow_fetcher=object(), reapi_mapper=mapper)
+
+    assert refresher.refresh_property(prop, {"reapi": stale_groups(stored, "reapi", NOW)}, NOW) is None
+    assert refresher.counts["failed"] == 1 and refresher.counts["refreshed"] == 0
+
+
+def test_refresh_replaces_sections_and_renews_timestamps(store, seed_extraction, mapper, monkeypatch):
+    prop = _entry(seed_extraction, NOW - timedelta(days=60))
+    stored = prop["reapi_extraction"]["PropertyDetails"]
+    sample = PropertyMapperV60().fetch_reapi_data(stored["identification"]["address_full"])
+    monkeypatch.setattr(mapper, "fetch_reapi_data", lambda address: sample)
+    refresher = PropertyRefresher(store, zillow_fetcher=object(), reapi_mapper=mapper)
+
+    updated = refresher.refresh_property(prop, {"reapi": stale_groups(stored, "reapi", NOW)}, NOW)
+    details = updated["reapi_extraction"]["PropertyDetails"]
+    fresh = mapper.map_to_client_approved_structure(sample)["PropertyDetails"]
+    assert details["identification"] == fresh["identification"]
+    assert details["price_history"] == fresh["price_history"]
+    assert details["meta_data"]["field_group_timestamps"] == {"market": NOW.isoformat(), "structure": NOW.isoformat()}
+    assert stale_groups(details, "reapi", NOW) == []
+    assert updated["zillow_extraction"] is prop["zillow_extraction"]
+
+
+def test_keyless_mapper_is_never_used_for_refresh(store, seed_extraction):
+    prop = _entry(seed_extraction, NOW - timedelta(days=60))
+    stored = prop["reapi_extraction"]["PropertyDetails"]
+    refresher = PropertyRefresher(store, zillow_fetcher=object(), reapi_mapper=PropertyMapperV60())
+    assert refresher.refresh_property(prop, {"reapi": stale_groups(stored, "reapi", NOW)}, NOW) is None
+    assert refresher.counts["skipped"] == 1
+
+
+@pytest.mark.parametrize("raw_property", [
+    {},
+    {"address": {"streetAddress": "7709 Palmbrook Dr"}, "propertyDetails": {"bedrooms": 3}},
+])
+def test_zillow_refresh_keeps_stored_data_when_sections_come_back_empty(store, seed_extraction, raw_property):
+    prop = _entry(seed_extraction, NOW - timedelta(days=60))
+    stored = prop["zillow_extraction"]["PropertyDetails"]
+    groups = [group for group in stale_groups(stored, "zillow", NOW) if group.endpoint == "property"]
+    refresher = PropertyRefresher(store, zillow_fetcher=CannedZillow(200, {"property": raw_property}),
+                                  reapi_mapper=PropertyMapperV60())
+
+    assert refresher.refresh_property(prop, {"zillow": groups}, NOW) is None
+    assert refresher.counts["failed"] == 1 and refresher.counts["refreshed"] == 0
+
+
+def test_refresh_ingests_in_batches(store, monkeypatch):
+    monkeypatch.setattr(property_refresh, "REFRESH_BATCH_SIZE", 10)
+    batches = []
+    ingest = store.ingest_properties
+    monkeypatch.setattr(store, "ingest_properties", lambda updated, *args: batches.append(len(updated))
+                        or ingest(updated, *args))
+    later = datetime.now() + timedelta(days=365)
+    refresher = PropertyRefresher(store, zillow_fetcher=CannedZillow(304), reapi_mapper=PropertyMapperV60())
+
+    counts = refresher.refresh(now=later)
+    assert counts["stale"] == counts["refreshed"] == store.count() == 25
+    assert batches == [10, 10, 5]
+    # Every record was rewritten with renewed Zillow timestamps
+    assert [stale for _, stale in PropertyRefresher(store, object(), object()).plan(later)
+            if "zillow" in stale] == []
@@ -0,0 +1,123 @@
+"""PropertySearchV62Final: memoized v6.2 records in the dict and JSON paths"""
+
+import copy
+import json
+
+import pytest
+
+import property_records
+import property_search_v6_2_FINAL as search_module
+from property_record_cache import V62RecordCache
+from property_search_v6_2_FINAL import PropertySearchV62Final, V62_ENVIRONMENTAL_FACTORS
+
+SUBJECT = "7709 Palmbrook Dr, Tampa, FL 33615"
+
+
+@pytest.fixture
+def engine(store):
+    return PropertySearchV62Final(record_cache=V62RecordCache(), store=store)
+
+
+def _without_volatile(result):
+    """Drop the per-response timestamps and cache statistics"""
+    result = json.loads(json.dumps(result))
+    result.pop("search_timestamp")
+    result["summary"].pop("record_cache")
+    for key in ("zillow_properties", "reapi_properties"):
+        for record in result[key]:
+            record["PropertyDetails"]["meta_data"].pop("fetch_timestamp")
+    return result
+
+
+def test_dict_and_json_paths_agree(engine):
+    as_dict = engine.get_real_properties(SUBJECT, 5)
+    as_json = json.loads(engine.get_real_properties_json(SUBJECT, 5))
+    assert len(as_dict["zillow_properties"]) == 5
+    assert _without_volatile(as_dict) == _without_volatile(as_json)
+
+
+def test_cache_hits_do_not_rebuild_records(engine, monkeypatch):
+    first = engine.get_real_properties(SUBJECT, 5)
+    first_json = engine.get_real_properties_json(SUBJECT, 5)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached record was rebuilt")
+
+    monkeypatch.setattr(engine, "_build_zillow_v62", fail)
+    monkeypatch.setattr(engine, "_build_reapi_v62", fail)
+    second = engine.get_real_properties(SUBJECT, 5)
+    assert _without_volatile(first) == _without_volatile(second)
+    assert second["summary"]["record_cache"]["hits"] >= 10
+    assert _without_volatile(json.loads(first_json)) == \
+        _without_volatile(json.loads(engine.get_real_properties_json(SUBJECT, 5)))
+
+
+def test_record_cache_holds_slotted_records(engine):
+    engine.get_real_properties(SUBJECT, 1)
+    cached = [record for key, (record, _) in engine.record_cache._entries.items() if key[-1] == "record"]
+    assert len(cached) == 2
+    assert all(isinstance(record, property_records.PropertyDetailsRecord) for record in cached)
+
+
+def test_fetch_timestamp_is_stamped_on_a_copy(engine):
+    first = engine.get_real_properties(SUBJECT, 1)
+    record = first["zillow_properties"][0]["PropertyDetails"]
+    record["meta_data"]["fetch_timestamp"] = "changed"
+    second = engine.get_real_properties(SUBJECT, 1)
+    assert second["zillow_properties"][0]["PropertyDetails"]["meta_data"]["fetch_timestamp"] != "changed"
+
+
+def test_records_do_not_share_environmental_factors(engine):
+    result = engine.get_real_properties(SUBJECT, 3)
+    factors = [r["PropertyDetails"]["environmental_factors"]
+               for r in result["zillow_properties"] + result["reapi_properties"]]
+    assert all(f == V62_ENVIRONMENTAL_FACTORS for f in factors)
+    assert len({id(f) for f in factors}) == len(factors)
+    assert all(f is not V62_ENVIRONMENTAL_FACTORS for f in factors)
+
+    factors[0]["flood"]["severity"] = "High"
+    assert V62_ENVIRONMENTAL_FACTORS["flood"]["severity"] == "Low"
+    assert factors[1]["flood"]["severity"] == "Low"
+
+
+def _moved(prop, number, lat, lon, price_factor):
+    """A copy of a seed entry relocated to another area as a new property"""
+    prop = copy.deepcopy(prop)
+    address = f"{number} Brickell Ave, Miami, FL 33131"
+    for source in ("reapi", "zillow"):
+        details = prop[f"{source}_extraction"]["PropertyDetails"]
+        details["identification"].update(address_full=address, postal_code="33131")
+        details["identification"].pop("apn", None)
+        details["meta_data"]["source_property_id"] = f"miami-{source}-{number}"
+        details["location"].update(lat=lat, lon=lon)
+        for sale in details["price_history"].get("sale_history") or ():
+            sale["price"] = int(sale["price"] * price_factor)
+    return prop, address
+
+
+def test_valuation_comps_are_ranked_around_the_subject(engine, store, seed_extraction, monkeypatch):
+    # Four copies of one seed property, so the comps need no adjustment
+    miami = [_moved(seed_extraction["properties"][0], 100 + i, 25.76 + i * 0.001, -80.19, 3) for i in range(4)]
+    store.ingest_properties([prop for prop, _ in miami])
+    tampa_subject = seed_extraction["properties"][5]["reapi_extraction"]["PropertyDetails"]["identification"]
+
+    comps_seen = []
+    real_value_subject = search_module.value_subject
+    monkeypatch.setattr(search_module, "value_subject",
+                        lambda subject, comps: comps_seen.append(comps) or real_value_subject(subject, comps))
+
+    tampa = engine.get_real_properties(tampa_subject["address_full"], 5)["summary"]["valuation"]
+    miami_valuation = engine.get_real_properties(miami[0][1], 5)["summary"]["valuation"]
+    tampa_comps, miami_comps = ({c.property_index for c in comps} for comps in comps_seen)
+    miami_indexes = {store.find_address(address)["property_index"] for _, address in miami[1:]}
+
+    assert miami_comps == miami_indexes
+    assert not tampa_comps & miami_indexes
+    assert tampa is not None and miami_valuation is not None
+    assert miami_valuation["estimated_value"] > tampa["estimated_value"]
+
+
+def test_no_valuation_for_an_unknown_subject(engine):
+    result = engine.get_real_properties("1 Nowhere Rd, Springfield, IL 62701", 5)
+    assert result["summary"]["valuation"] is None
+    assert len(result["zillow_properties"]) == 5
@@ -0,0 +1,139 @@
+"""Binary snapshot round-trip, filtered search and source selection"""
+
+import copy
+
+import pytest
+
+from property_snapshot import PropertySnapshot, open_property_source, write_snapshot
+from property_store import PropertyStore, property_columns, read_dataset_version
+
+FILTERS = [
+    {},
+    {"limit": 5},
+    {"property_type": "SFR"},
+    {"postal_code": "33615"},
+    {"property_type": "SFR", "postal_code": "33615"},
+    {"min_price": 300000, "max_price": 700000},
+    {"min_sqft": 2000, "property_type": "Condo"},
+    {"near": (28.0, -82.56), "radius_miles": 2.0},
+    {"property_type": "No Such Type"},
+]
+
+
+@pytest.fixture
+def snapshot(store, tmp_path):
+    path = str(tmp_path / "store.snap")
+    assert write_snapshot(store, path) == store.count()
+    snapshot = PropertySnapshot(path)
+    yield snapshot
+    snapshot.close()
+
+
+def _indexes(properties):
+    return [prop["property_index"] for prop in properties]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_search_matches_store(store, snapshot, filters):
+    with store.read_snapshot():
+        expected = _indexes(store.search(**filters))
+    assert _indexes(snapshot.search(**filters)) == expected
+
+
+def test_header_and_records(store, snapshot):
+    assert snapshot.count() == store.count()
+    assert not snapshot.is_empty()
+    assert snapshot.dataset_version() == store.dataset_version()
+    with store.read_snapshot():
+        assert snapshot.record(0) == next(store.search(limit=1))
+
+
+def test_find_address(snapshot, seed_extraction):
+    prop = seed_extraction["properties"][4]
+    address = property_columns(prop)["address_full"]
+    assert snapshot.find_address(address.lower())["property_index"] == prop["property_index"]
+    assert snapshot.find_address("1 Nowhere Ln, Tampa, FL 33615") is None
+
+
+def test_read_dataset_version_is_read_only(store, tmp_path):
+    assert read_dataset_version(store.db_path) == "1"
+    assert read_dataset_version(str(tmp_path / "missing.db")) is None
+
+
+def test_open_property_source_prefers_current_snapshot(store, snapshot, seed_extraction):
+    source = open_property_source(snapshot.path, store.db_path, seed_file="")
+    assert isinstance(source, PropertySnapshot)
+    source.close()
+
+    # Once the store moves on, the stale snapshot is ignored
+    changed = copy.deepcopy(seed_extraction["properties"][0])
+    changed["reapi_extraction"]["PropertyDetails"]["price_history"]["list_price"] = 1
+    store.ingest_properties([changed])
+    source = open_property_source(snapshot.path, store.db_path, seed_file="")
+    assert isinstance(source, PropertyStore)
+    source.close()
+
+
+def _reprice(store, seed_extraction):
+    changed = copy.deepcopy(seed_extraction["properties"][0])
+    changed["reapi_extraction"]["PropertyDetails"]["price_history"]["list_price"] = 1
+    store.ingest_properties([changed])
+
+
+@pytest.fixture
+def engine(store, snapshot):
+    from property_record_cache import V62RecordCache
+    from property_search_v6_2_FINAL import PropertySearchV62Final
+
+    engine = PropertySearchV62Final(record_cache=V62RecordCache())
+    engine.snapshot_path, engine.db_path, engine.real_data_file = snapshot.path, store.db_path, ""
+    return engine
+
+
+def test_engine_remaps_a_rewritten_snapshot(engine, store, seed_extraction):
+    assert engine.current_dataset_version() == "1"
+    first = engine.store
+    assert isinstance(first, PropertySnapshot)
+    assert engine.current_dataset_version() == "1" and engine.store is first
+
+    _reprice(store, seed_extraction)
+    write_snapshot(store, engine.snapshot_path)
+    assert engine.current_dataset_version() == "2"
+    assert isinstance(engine.store, PropertySnapshot) and engine.store is not first
+    # The replaced mapping is still readable by searches that hold it
+    assert first.record(0)["property_index"] == 1
+
+
+def test_engine_falls_back_to_the_store_after_an_ingest(engine, store, seed_extraction):
+    assert isinstance(engine._ensure_store(), PropertySnapshot)
+    _reprice(store, seed_extraction)
+    assert engine.current_dataset_version() == "2"
+    assert isinstance(engine.store, PropertyStore)
+    result = engine.get_real_properties(property_columns(seed_extraction["properties"][0])["address_full"], 25)
+    prices = [r["PropertyDetails"]["price_history"]["list_price"] for r in result["reapi_properties"]]
+    assert 1 in prices
+
+
+def test_snapshot_is_kept_next_to_a_never_imported_store(snapshot, tmp_path):
+    empty = PropertyStore(str(tmp_path / "empty.db"))
+    assert read_dataset_version(empty.db_path) == "0"
+    source = open_property_source(snapshot.path, empty.db_path, seed_file="")
+    assert isinstance(source, PropertySnapshot)
+    source.close()
+    empty.close()
+
+
+def test_read_only_store_is_never_created(store, tmp_path, seed_extraction):
+    import sqlite3
+
+    missing = tmp_path / "missing.db"
+    with pytest.raises(sqlite3.OperationalError):
+        PropertyStore(str(missing), read_only=True)
+    assert not missing.exists()
+
+    reader = PropertyStore(store.db_path, read_only=True)
+    assert reader.dataset_version() == store.dataset_version()
+    assert reader.aggregates_json("postal_code")
+    with pytest.raises(sqlite3.OperationalError):
+        _reprice(reader, seed_extraction)
+    reader.close()
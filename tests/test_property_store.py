@@ -0,0 +1,82 @@
+"""PropertyStore import, incremental ingest and indexed search"""
+
+import copy
+
+from property_store import PropertyStore, open_store, property_columns
+
+
+def test_import_counts_and_versions(store, seed_extraction):
+    assert store.count() == len(seed_extraction["properties"])
+    assert not store.is_empty()
+    assert store.dataset_version() == "1"
+
+
+def test_empty_store(tmp_path):
+    store = PropertyStore(str(tmp_path / "empty.db"))
+    assert store.is_empty()
+    assert store.count() == 0
+    assert store.dataset_version() == "0"
+
+
+def test_open_store_seeds_only_an_empty_store(tmp_path):
+    from conftest import SEED_FILE
+
+    db_path = str(tmp_path / "seeded.db")
+    store = open_store(db_path, SEED_FILE)
+    assert store.dataset_version() == "1"
+    # A second open finds the store populated and does not re-import
+    assert open_store(db_path, SEED_FILE).dataset_version() == "1"
+
+
+def test_ingest_unchanged_changed_and_new(store, seed_extraction):
+    properties = seed_extraction["properties"]
+    assert store.ingest_properties(properties) == {"inserted": 0, "updated": 0, "unchanged": len(properties)}
+    assert store.dataset_version() == "1"
+
+    changed = copy.deepcopy(properties[0])
+    changed["reapi_extraction"]["PropertyDetails"]["price_history"]["list_price"] = 123456
+    new = copy.deepcopy(properties[1])
+    for source in ("reapi", "zillow"):
+        details = new[f"{source}_extraction"]["PropertyDetails"]
+        details["meta_data"]["source_property_id"] = f"NEW-{source}"
+        details["identification"]["address_full"] = "1 Brand New Way, Tampa, FL 33615"
+    new["reapi_extraction"]["PropertyDetails"]["identification"]["apn"] = "NEW-APN"
+
+    counts = store.ingest_properties([changed, new])
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 0}
+    assert store.dataset_version() == "2"
+    assert store.count() == len(properties) + 1
+
+    with store.read_snapshot():
+        stored = list(store.search(max_price=123456, min_price=123456))
+    assert [prop["property_index"] for prop in stored] == [properties[0]["property_index"]]
+
+
+def test_search_filters_match_columns(store):
+    with store.read_snapshot():
+        results = list(store.search(property_type="SFR", min_price=300000))
+    assert results
+    for prop in results:
+        columns = property_columns(prop)
+        assert columns["property_type"] == "SFR"
+        assert columns["list_price"] >= 300000
+
+
+def test_search_near_and_limit(store):
+    with store.read_snapshot():
+        everything = list(store.search())
+        limited = list(store.search(limit=3))
+        columns = property_columns(everything[0])
+        near = list(store.search(near=(columns["lat"], columns["lon"]), radius_miles=0.1))
+    assert [p["property_index"] for p in limited] == [p["property_index"] for p in everything[:3]]
+    assert everything[0]["property_index"] in {p["property_index"] for p in near}
+
+
+def test_find_address(store, seed_extraction):
+    prop = seed_extraction["properties"][2]
+    address = property_columns(prop)["address_full"]
+    with store.read_snapshot():
+        found = store.find_address(address.upper())
+        missing = store.find_address("1 Nowhere Ln, Tampa, FL 33615")
+    assert found["property_index"] == prop["property_index"]
+    assert missing is None
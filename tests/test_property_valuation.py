@@ -0,0 +1,73 @@
+"""Comp-adjusted valuation"""
+
+import pytest
+
+from property_valuation import (BEDROOM_VALUE, MIN_BAND, UNKNOWN_SUBJECT, ValuationFacts,
+                                value_batch, value_subject, valuation_facts)
+
+AS_OF = 20250101
+
+
+def facts(index, price=400000, sqft=2000, bedrooms=3, bathrooms=2.0, year_built=2000, lot=8000,
+          sale_day=AS_OF, appreciation=None):
+    return ValuationFacts(index, sqft, bedrooms, bathrooms, year_built, lot, sale_day, price, appreciation)
+
+
+def test_identical_comps_value_the_subject_at_their_price():
+    valuation = value_subject(facts(0), [facts(i) for i in range(1, 6)], AS_OF)
+    assert valuation["estimated_value"] == 400000
+    assert valuation["comps_used"] == 5 and valuation["confidence"] == "high"
+    assert valuation["value_low"] == int(round(400000 * (1 - MIN_BAND), -2))
+    assert valuation["value_high"] == int(round(400000 * (1 + MIN_BAND), -2))
+
+
+def test_adjusts_comps_toward_the_subject():
+    subject = facts(0, bedrooms=4)
+    valuation = value_subject(subject, [facts(i) for i in range(1, 4)], AS_OF)
+    assert valuation["estimated_value"] == 400000 + BEDROOM_VALUE
+
+
+def test_time_adjustment_uses_the_comps_appreciation():
+    comps = [facts(i, sale_day=20230101, appreciation=0.05) for i in range(1, 4)]
+    valuation = value_subject(UNKNOWN_SUBJECT, comps, AS_OF)
+    assert valuation["annual_appreciation"] == 0.05
+    assert valuation["estimated_value"] == pytest.approx(400000 * 1.05 ** 2, rel=0.01)
+
+
+def test_market_rate_ignores_missing_and_absurd_comp_rates():
+    comps = [facts(1, sale_day=20230101, appreciation=0.05), facts(2, sale_day=20230101, appreciation=0.05),
+             facts(3, sale_day=20230101, appreciation=718.22), facts(4, sale_day=20230101, appreciation=450.0),
+             facts(5, sale_day=20230101, appreciation=None)]
+    valuation = value_subject(UNKNOWN_SUBJECT, comps, AS_OF)
+    assert valuation["annual_appreciation"] == 0.05
+    assert valuation["comps_used"] == 5
+    assert valuation["estimated_value"] == pytest.approx(400000 * 1.05 ** 2, rel=0.01)
+
+
+def test_unusable_comps_are_skipped():
+    subject = facts(0)
+    unsold = facts(1, price=None, sale_day=None)
+    far_off = facts(2, sqft=6000, lot=200000)  # adjusted by more than MAX_GROSS_ADJUSTMENT
+    itself = facts(0)
+    assert value_subject(subject, [unsold, itself], AS_OF) is None
+    valuation = value_subject(subject, [unsold, far_off, itself, facts(3)], AS_OF)
+    assert valuation["comps_used"] == 1
+
+
+def test_batch_matches_single_subjects():
+    subjects = [facts(0), facts(10, sqft=2400), facts(20)]
+    comps = [[facts(i) for i in range(1, 4)], [facts(i, price=380000) for i in range(11, 16)], []]
+    batch = value_batch(subjects, comps, AS_OF)
+    assert batch == [value_subject(s, c, AS_OF) for s, c in zip(subjects, comps)]
+    assert batch[2] is None
+
+
+def test_facts_of_an_extraction_entry(seed_extraction):
+    prop = seed_extraction["properties"][0]
+    prop_facts = valuation_facts(prop)
+    identification = prop["reapi_extraction"]["PropertyDetails"]["identification"]
+    assert prop_facts.property_index == prop["property_index"]
+    assert prop_facts.living_sqft == identification["living_sqft"]
+    assert prop_facts.bedrooms == identification["bedrooms"]
+    if prop_facts.sale_price is not None:
+        assert prop_facts.sale_day // 10000 > 1900
@@ -0,0 +1,105 @@
+"""Concurrent search page fan-out: ordering, dedup, failed pages, in-flight cap"""
+
+import threading
+
+from search_fanout import ListingDeduper, fan_out
+
+PAGE_SIZE = 10
+
+
+def listing(n):
+    return {"id": n, "address": f"{n} Oak Ave, Tampa, FL 33615"}
+
+
+class Pages:
+    """A paged search API: PAGE_SIZE listings per page, optional failures"""
+
+    def __init__(self, total_pages=10, failures=None, overlap=0):
+        self.total_pages = total_pages
+        self.failures = dict(failures or {})   # page -> times it fails before answering
+        self.overlap = overlap
+        self.fetched = []
+        self._lock = threading.Lock()
+
+    def __call__(self, page):
+        with self._lock:
+            self.fetched.append(page)
+            if self.failures.get(page, 0) > 0:
+                self.failures[page] -= 1
+                return None
+        if page > self.total_pages:
+            return [], None
+        start = (page - 1) * (PAGE_SIZE - self.overlap)
+        return [listing(n) for n in range(start, start + PAGE_SIZE)], self.total_pages
+
+
+def run(pages, max_results, **kwargs):
+    kwargs.setdefault("workers", 4)
+    return list(fan_out(pages, max_results, lambda l: l["id"], lambda l: l["address"], **kwargs))
+
+
+def test_pages_in_order_until_max_results():
+    result = run(Pages(), 25)
+    assert [p.number for p in result] == [1, 2, 3]
+    assert [len(p.candidates) for p in result] == [10, 10, 5]
+    assert not any(p.failed for p in result)
+
+
+def test_listings_are_deduplicated_across_pages():
+    result = run(Pages(total_pages=3, overlap=4), 100)
+    ids = [l["id"] for p in result for l in p.candidates]
+    assert len(ids) == len(set(ids)) == 22
+    assert [p.found for p in result] == [10, 10, 10]
+
+
+def test_stops_at_the_last_page():
+    assert [p.number for p in run(Pages(total_pages=2), 100)] == [1, 2]
+    assert [p.number for p in run(Pages(total_pages=0), 100)] == []
+
+
+def test_in_flight_pages_capped_by_what_remaining_needs():
+    pages = Pages()
+    run(pages, 1)
+    assert pages.fetched == [1]
+
+    pages = Pages()
+    run(pages, 25, workers=8, page_size=PAGE_SIZE)
+    # 8 workers, but 25 listings at 10 per page never need more than 3 pages
+    assert sorted(pages.fetched) == [1, 2, 3]
+
+    # Without a known page size, the size of the first page caps what follows it
+    pages = Pages(total_pages=50)
+    run(pages, 25, workers=2)
+    assert sorted(pages.fetched) == [1, 2, 3]
+
+
+def test_failed_page_is_retried():
+    pages = Pages(total_pages=3, failures={2: 1})
+    result = run(pages, 100, page_retries=1)
+    assert [p.number for p in result] == [1, 2, 3]
+    assert pages.fetched.count(2) == 2
+
+
+def test_page_failing_every_retry_ends_the_search_with_a_failed_page():
+    pages = Pages(total_pages=5, failures={2: 3})
+    result = run(pages, 100, page_retries=2)
+    assert [(p.number, p.failed) for p in result] == [(1, False), (2, True)]
+    assert result[-1].candidates == [] and result[-1].found == 0
+    assert pages.fetched.count(2) == 3
+
+
+def test_resume_skips_known_listings_and_pages():
+    known = [listing(n) for n in range(10)]
+    pages = Pages(total_pages=3)
+    result = run(pages, 100, known=known, first_page=2)
+    assert [p.number for p in result] == [2, 3]
+    assert 1 not in pages.fetched
+
+
+def test_deduper_by_id_or_address():
+    deduper = ListingDeduper(lambda l: l.get("id"), lambda l: l.get("address"))
+    assert deduper.add({"id": 1, "address": "1 Oak Ave"})
+    assert not deduper.add({"id": 1, "address": "2 Oak Ave"})
+    assert not deduper.add({"id": 3, "address": "1 OAK AVENUE"})
+    assert deduper.add({"id": None, "address": None})
+    assert deduper.add({"id": "", "address": None})
@@ -0,0 +1,134 @@
+"""Retries, circuit breakers and adaptive timeouts of the shared upstream client"""
+
+import threading
+import time
+
+import pytest
+import requests
+
+import upstream_resilience
+from upstream_resilience import CircuitOpen, ResilientClient
+
+URL = "http://upstream.test/api"
+
+
+class FakeSession:
+    """Plays back outcomes: a status code, an exception, or a callable"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if callable(outcome) and not isinstance(outcome, type):
+            outcome = outcome(timeout)
+        if isinstance(outcome, BaseException) or (isinstance(outcome, type) and issubclass(outcome, BaseException)):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        return response
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ResilientClient, "backoff", staticmethod(lambda attempt, response=None: 0))
+    return ResilientClient(max_attempts=3, failure_threshold=2, reset_seconds=0.0, max_timeout=5.0)
+
+
+def _use(client, monkeypatch, *outcomes):
+    session = FakeSession(*outcomes)
+    monkeypatch.setattr(client, "session", lambda: session)
+    return session
+
+
+def test_transient_failures_are_retried(client, monkeypatch):
+    client.failure_threshold = 5
+    session = _use(client, monkeypatch, requests.ConnectionError, 503, 200)
+    assert client.get(URL).status_code == 200
+    assert session.calls == 3 and client.retries == 2
+
+
+def test_other_errors_count_against_the_host_without_retry(client, monkeypatch):
+    session = _use(client, monkeypatch, requests.exceptions.ChunkedEncodingError, ValueError)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get(URL)
+    with pytest.raises(ValueError):
+        client.get(URL)
+    health = client.host(URL)
+    assert session.calls == 2 and health.failures == 2 and health.state == "open"
+
+
+def test_failed_trial_request_reopens_the_breaker(client, monkeypatch):
+    client.reset_seconds = 60.0
+    health = client.host(URL)
+    health.reset_seconds = 60.0
+    _use(client, monkeypatch, requests.ConnectionError, requests.ConnectionError)
+    with pytest.raises(requests.ConnectionError):
+        client.get(URL)
+    assert health.state == "open"
+    with pytest.raises(CircuitOpen):
+        client.get(URL)
+
+    # After the reset period one trial goes through; an unexpected error must not wedge it
+    health.opened_at -= 61
+    _use(client, monkeypatch, requests.exceptions.TooManyRedirects)
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        client.get(URL)
+    assert health.state == "open"
+
+    health.opened_at -= 61
+    _use(client, monkeypatch, 200)
+    assert client.get(URL).status_code == 200
+    assert health.state == "closed"
+
+
+def test_interrupted_trial_frees_the_next_one(client, monkeypatch):
+    health = client.host(URL)
+    _use(client, monkeypatch, requests.ConnectionError, requests.ConnectionError)
+    with pytest.raises(requests.ConnectionError):
+        client.get(URL)
+    assert health.state == "open"
+
+    _use(client, monkeypatch, KeyboardInterrupt)
+    with pytest.raises(KeyboardInterrupt):
+        client.get(URL)
+    assert health.state == "half_open" and health.failures == 2
+
+    _use(client, monkeypatch, 200)
+    assert client.get(URL).status_code == 200
+
+
+def test_timeouts_are_latency_samples_capped_at_the_timeout(client, monkeypatch):
+    def slow_timeout(timeout):
+        time.sleep(0.05)
+        return requests.Timeout()
+
+    client.failure_threshold = 100
+    client.host(URL).failure_threshold = 100
+    _use(client, monkeypatch, slow_timeout, slow_timeout, slow_timeout)
+    with pytest.raises(requests.Timeout):
+        client.get(URL, timeout=0.01)
+    assert client.host(URL).percentile(0.5) == pytest.approx(0.01)
+    assert client.host(URL).stats()["failures"] == 3
+
+
+def test_timeout_adapts_to_latency(client, monkeypatch):
+    health = client.host(URL)
+    assert health.timeout() == 5.0
+    for _ in range(upstream_resilience.MIN_LATENCY_SAMPLES):
+        health.record_success(0.1)
+    assert health.timeout() == upstream_resilience.MIN_TIMEOUT_SECONDS
+    for _ in range(upstream_resilience.MIN_LATENCY_SAMPLES):
+        health.record_failure(10.0)
+    assert health.timeout() == 5.0
+
+
+def test_each_thread_has_its_own_session(client):
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(client.session()))
+    thread.start()
+    thread.join()
+    assert client.session() is client.session()
+    assert sessions[0] is not client.session()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Upstream Resilience v6.2 - Retries, circuit breakers and adaptive timeouts
+Shared by every outbound Zillow / REAPI / Realty Mole request
+
+Each request is tried up to UPSTREAM_MAX_ATTEMPTS times (default 3) when it
+fails with a connection error, a timeout, 429 or a 5xx; the wait before a
+retry is exponential with full jitter (or the server's Retry-After).
+
+Every host has a circuit breaker: after UPSTREAM_BREAKER_FAILURES failed
+requests in a row (default 5) it opens and requests to that host fail
+immediately with CircuitOpen for UPSTREAM_BREAKER_RESET_SECONDS (default
+30); then one trial request is let through, and its outcome closes or
+re-opens the breaker. A dead host therefore costs a few timeouts, not one
+per property.
+
+Any other exception (a broken chunked body, too many redirects, ...) is
+not retried but still counts as a failure of the host, so a trial request
+that dies that way re-opens the breaker instead of leaving it half open.
+
+Timeouts adapt per host: once enough requests have answered, the timeout
+is a multiple of the observed p95 latency (clamped to a floor and to the
+configured maximum, UPSTREAM_TIMEOUT_SECONDS, default 30). Requests that
+time out count as taking the full timeout, so a slowing host raises p95.
+State is shared per process by every caller of the same host; each thread
+has its own requests.Session (sessions are not thread-safe).
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+# Statuses worth retrying; any other response is returned to the caller as-is
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+BASE_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 8.0
+
+# Adaptive timeout: TIMEOUT_MULTIPLIER x p95 latency, within [MIN_TIMEOUT_SECONDS, max timeout]
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 10
+TIMEOUT_MULTIPLIER = 3.0
+MIN_TIMEOUT_SECONDS = 2.0
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"circuit open for {host}, retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class HostHealth:
+    """Circuit breaker and latency percentiles of one upstream host"""
+
+    def __init__(self, host: str, failure_threshold: int, reset_seconds: float, max_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.max_timeout = max_timeout
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.state = "closed"          # closed -> open -> half_open -> closed/open
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def before_request(self):
+        """Admit a request or raise CircuitOpen"""
+        with self._lock:
+            if self.state == "open":
+                waited = time.monotonic() - self.opened_at
+                if waited < self.reset_seconds:
+                    self.rejected += 1
+                    raise CircuitOpen(self.host, self.reset_seconds - waited)
+                self.state = "half_open"
+            if self.state == "half_open":
+                # Only one trial request probes a recovering host
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpen(self.host, self.reset_seconds)
+                self._trial_in_flight = True
+            self.requests += 1
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+            self.consecutive_failures = 0
+            self.state = "closed"
+            self._trial_in_flight = False
+
+    def record_failure(self, latency: Optional[float] = None):
+        """Count a failed request; latency is its duration when it got an answer or timed out"""
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"⚠️ Circuit opened for {self.host} after {self.consecutive_failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a request that was interrupted before it had an outcome (lets the next trial through)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Observed latency percentile in seconds, or None without samples"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def timeout(self) -> float:
+        """Timeout for the next request to this host"""
+        if len(self._latencies) < MIN_LATENCY_SAMPLES:
+            return self.max_timeout
+        return min(self.max_timeout, max(MIN_TIMEOUT_SECONDS, TIMEOUT_MULTIPLIER * self.percentile(0.95)))
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "state": self.state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "timeout_seconds": round(self.timeout(), 2)
+        }
+
+
+class ResilientClient:
+    """requests wrapper adding bounded retries, per-host breakers and adaptive timeouts"""
+
+    def __init__(self,
+                 max_attempts: Optional[int] = None,
+                 failure_threshold: Optional[int] = None,
+                 reset_seconds: Optional[float] = None,
+                 max_timeout: Optional[float] = None):
+        """
+        Initialize the client
+
+        Args:
+            max_attempts: Tries per request (UPSTREAM_MAX_ATTEMPTS, default 3)
+            failure_threshold: Consecutive failures that open a host's breaker
+                (UPSTREAM_BREAKER_FAILURES, default 5)
+            reset_seconds: How long an open breaker rejects requests
+                (UPSTREAM_BREAKER_RESET_SECONDS, default 30)
+            max_timeout: Timeout before latencies are known, and the cap
+                after (UPSTREAM_TIMEOUT_SECONDS, default 30)
+        """
+        self.max_attempts = max_attempts if max_attempts is not None else \
+            int(os.environ.get("UPSTREAM_MAX_ATTEMPTS", 3))
+        self.failure_threshold = failure_threshold if failure_threshold is not None else \
+            int(os.environ.get("UPSTREAM_BREAKER_FAILURES", 5))
+        self.reset_seconds = reset_seconds if reset_seconds is not None else \
+            float(os.environ.get("UPSTREAM_BREAKER_RESET_SECONDS", 30))
+        self.max_timeout = max_timeout if max_timeout is not None else \
+            float(os.environ.get("UPSTREAM_TIMEOUT_SECONDS", 30))
+
+        self._local = threading.local()
+        self._hosts: Dict[str, HostHealth] = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def session(self) -> requests.Session:
+        """The calling thread's session (connection pool)"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def host(self, url: str) -> HostHealth:
+        """Health record of a URL's host"""
+        name = urlsplit(url).netloc
+        with self._lock:
+            health = self._hosts.get(name)
+            if health is None:
+                health = self._hosts[name] = HostHealth(
+                    name, self.failure_threshold, self.reset_seconds, self.max_timeout)
+            return health
+
+    @staticmethod
+    def backoff(attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before retry number attempt (1-based)
+
+        A numeric Retry-After is honoured up to MAX_BACKOFF_SECONDS;
+        otherwise exponential backoff with full jitter.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(MAX_BACKOFF_SECONDS, float(retry_after))
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request with retries
+
+        Args:
+            method, url, **kwargs: As for requests.request (a timeout given
+                here replaces the adaptive one)
+
+        Returns:
+            The last response: 2xx/3xx, a non-retried 4xx, or the final
+            retryable failure once attempts are exhausted
+
+        Raises:
+            CircuitOpen: The host's breaker is open
+            requests.RequestException: Every attempt failed without a response,
+                or one failed with an error that is not worth retrying
+        """
+        health = self.host(url)
+        timeout = kwargs.pop("timeout", None)
+
+        for attempt in range(1, self.max_attempts + 1):
+            health.before_request()
+            request_timeout = timeout or health.timeout()
+            start = time.monotonic()
+            try:
+                response = self.session().request(method, url, timeout=request_timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if isinstance(e, requests.Timeout):
+                    limit = sum(request_timeout) if isinstance(request_timeout, tuple) else request_timeout
+                    health.record_failure(min(time.monotonic() - start, limit))
+                else:
+                    health.record_failure()
+                # No point waiting to retry a host whose breaker just opened
+                if attempt == self.max_attempts or health.state == "open":
+                    raise
+                response = None
+            except Exception:
+                # Not transient: counted against the host, not retried
+                health.record_failure()
+                raise
+            except BaseException:
+                health.release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    health.record_success(time.monotonic() - start)
+                    return response
+                health.record_failure(time.monotonic() - start)
+                if attempt == self.max_attempts or health.state == "open":
+                    return response
+
+            delay = self.backoff(attempt, response)
+            with self._lock:
+                self.retries += 1
+            print(f"🔁 Retrying {health.host} in {delay:.1f}s (attempt {attempt + 1}/{self.max_attempts})")
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host breaker state, counters and latency percentiles"""
+        with self._lock:
+            hosts = dict(self._hosts)
+            retries = self.retries
+        return {"retries": retries, "hosts": {name: health.stats() for name, health in hosts.items()}}
+
+
+def conditional_headers(validators: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers from a previous response's validators"""
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def response_validators(response: requests.Response) -> Dict[str, str]:
+    """ETag / Last-Modified of a response, for a later conditional request"""
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["last_modified"] = response.headers["Last-Modified"]
+    return validators
+
+
+# One client per process, so every fetcher sees the same host health
+upstream = ResilientClient()
@@ -12,12 +12,13 @@ Version: v6.0 Client Approved
 Date: May 2025
 """
 
-import requests
 import json
 import sys
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
+from upstream_resilience import upstream, conditional_headers, response_validators
+
 class ZillowLiveFetcherV60:
     """Zillow Live Fetcher for PropertyDetails v6.0 Schema - Client Approved Structure"""
     
@@ -71,7 +72,7 @@ class ZillowLiveFetcherV60:
             url = f"{self.base_url}/property"
             params = {"zpid": zpid}
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = upstream.get(url, headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -99,7 +100,7 @@ class ZillowLiveFetcherV60:
             url = f"{self.base_url}/photos"
             params = {"zpid": zpid}
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = upstream.get(url, headers=self.headers, params=params)
             
             if response.status_code == 200:
                 photos_data = response.json()
@@ -113,6 +114,34 @@ class ZillowLiveFetcherV60:
             print(f"⚠️ Error fetching photos: {str(e)}")
             return None
     
+    def fetch_if_modified(self, endpoint: str, zpid: str, validators: Optional[Dict[str, str]] = None
+                          ) -> Tuple[int, Optional[Dict[str, Any]], Dict[str, str]]:
+        """
+        Conditionally fetch /property or /photos for a ZPID
+        
+        Args:
+            endpoint: "property" or "photos"
+            zpid: Zillow Property ID
+            validators: ETag/Last-Modified saved from the previous fetch
+            
+        Returns:
+            (HTTP status, data on 200 else None, validators to save); status 0
+            when the request failed without a response
+        """
+        try:
+            response = upstream.get(f"{self.base_url}/{endpoint}", params={"zpid": zpid},
+                                    headers=dict(self.headers, **conditional_headers(validators)))
+        except Exception as e:
+            print(f"❌ Error fetching Zillow {endpoint} for ZPID {zpid}: {str(e)}")
+            return 0, None, validators or {}
+        
+        if response.status_code == 304:
+            return 304, None, validators or {}
+        if response.status_code == 200:
+            return 200, response.json(), response_validators(response)
+        print(f"❌ Zillow {endpoint} request failed with status {response.status_code}")
+        return response.status_code, None, validators or {}
+    
     def get_image_dimensions_simple(self, image_url: str) -> Tuple[int, int]:
         """
         Get image dimensions with simple fallback